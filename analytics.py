@@ -0,0 +1,280 @@
+import math
+import os
+import queue
+import re
+import threading
+import tkinter as tk
+
+from document_stats import TextCounter, longest_line
+
+
+
+
+# Words read per minute for the reading time.
+READING_SPEED = 230
+
+# A word for the unique word count, which ignores case and punctuation.
+_WORD = re.compile(r"\w+")
+
+
+
+
+class WordCount:
+    """The word, line and char counts as shown by the Text Area."""
+
+
+    def __init__(self, request: dict):
+        self.counter = TextCounter()
+
+
+    def feed(self, chunk: str) -> None:
+        self.counter.feed(chunk)
+
+
+    def result(self) -> dict:
+        return {"words": self.counter.words,
+            "reading_time": math.ceil(self.counter.words / READING_SPEED)}
+
+
+class LongestLine:
+    """The length of the longest line."""
+
+
+    def __init__(self, request: dict):
+        self.longest = 0
+        self.carry = 0
+
+
+    def feed(self, chunk: str) -> None:
+        longest, self.carry = longest_line(chunk, self.carry)
+        self.longest = max(self.longest, longest)
+
+
+    def result(self) -> dict:
+        return {"longest_line": self.longest}
+
+
+class UniqueWords:
+    """The number of different words, ignoring case."""
+
+
+    def __init__(self, request: dict):
+        self.words = set()
+        self.carry = ""                        # word cut off by the last chunk
+
+
+    def feed(self, chunk: str) -> None:
+        text = self.carry + chunk.lower()
+        words = _WORD.findall(text)
+
+        # A word at the end of the chunk may go on in the next one.
+        self.carry = words.pop() if words and _WORD.match(text[-1:]) else ""
+        self.words.update(words)
+
+
+    def result(self) -> dict:
+        carried = self.carry != "" and self.carry not in self.words
+        return {"unique_words": len(self.words) + carried}
+
+
+class DiskSize:
+    """
+    The size of the text when saved in its encoding and newlines.
+
+    The compressed size cannot be known without compressing the text, so
+    an unmodified compressed file reports the size of the file and a
+    modified one its uncompressed size.
+
+    """
+
+
+    def __init__(self, request: dict):
+        self.text_format = request["text_format"]
+        self.compressed = self.text_format.compression is not None
+        self.size = None
+
+        if self.compressed and not request["modified"] \
+                and request["filepath"] is not None:
+            try:
+                self.size = os.stat(request["filepath"]).st_size
+            except OSError:
+                pass
+        self.from_file = self.size is not None
+        if self.from_file:
+            return
+
+        # The saver writes a final newline and a byte order mark.
+        self.size = self._encoded(self.text_format.newline)
+        if self.text_format.bom:
+            self.size += self._encoded("\ufeff")
+
+
+    def _encoded(self, text: str) -> int:
+        return len(text.encode(self.text_format.encoding, errors="replace"))
+
+
+    def feed(self, chunk: str) -> None:
+        if self.from_file:
+            return
+        if self.text_format.newline != "\n":
+            chunk = chunk.replace("\n", self.text_format.newline)
+        self.size += self._encoded(chunk)
+
+
+    def result(self) -> dict:
+        return {"disk_size": self.size,
+            "uncompressed": self.compressed and not self.from_file}
+
+
+class SelectionCount:
+    """The word, line and char counts of the selection."""
+
+
+    def __init__(self, request: dict):
+        self.counter = TextCounter()
+
+
+    def feed(self, chunk: str) -> None:
+        self.counter.feed(chunk)
+
+
+    def result(self) -> dict:
+        return {"selection": (self.counter.chars, self.counter.lines,
+            self.counter.words)}
+
+
+# The metrics computed over the whole text and over the selection. A
+# metric is a class with feed and result methods, adding one only adds
+# work to the worker thread.
+METRICS = (WordCount, LongestLine, UniqueWords, DiskSize)
+SELECTION_METRICS = (SelectionCount,)
+
+
+
+
+class AnalyticsWorker:
+    """
+    Computes the statistics of the notebooks on a background thread.
+
+    A request holds a snapshot of a notebook's text, which costs the
+    same whatever the size of the text, so the main loop never waits
+    for the statistics. The worker keeps only the newest request of each
+    notebook and checks between chunks of the text that its request is
+    still the newest, so a burst of edits stops the work on the stale
+    snapshots rather than queueing it. Results are passed back through a
+    queue and shown by the main loop.
+
+    """
+
+    poll_interval = 50                         # ms between checks for results
+
+
+    def __init__(self, manager: tk.Tk):
+        self.manager = manager
+        self._latest = {}                      # newest request of each notebook
+        self._ready = []                       # notebooks with a new request
+        self._condition = threading.Condition()
+        self._results = queue.Queue()
+        self._thread = None
+        self._job = None                       # pending poll after id
+
+
+    def submit(self, notebook: tk.Toplevel) -> None:
+        """Compute the statistics of NOTEBOOK from its current text."""
+
+        text_area = notebook.text_area
+        selection = text_area.tag_ranges(tk.SEL)
+        request = {
+            "document": text_area.document.snapshot(),
+            "selection": (text_area.offset(selection[0]),
+                text_area.offset(selection[1])) if selection else None,
+            "text_format": notebook.menu.file_menu.text_format,
+            "filepath": notebook.menu.file_menu.filepath,
+            "modified": bool(text_area.edit_modified()),
+        }
+
+        with self._condition:
+            if notebook not in self._latest:
+                self._ready.append(notebook)
+            self._latest[notebook] = request
+            self._condition.notify()
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        if self._job is None:
+            self._job = self.manager.after(self.poll_interval, self._poll)
+
+
+    def forget(self, notebook: tk.Toplevel) -> None:
+        """Drop any work for NOTEBOOK, which is being closed."""
+        with self._condition:
+            self._latest.pop(notebook, None)
+
+
+    def _run(self) -> None:
+        """Internal function. Compute the requests as they arrive."""
+        while True:
+            with self._condition:
+                while not self._ready:
+                    self._condition.wait()
+                notebook = self._ready.pop(0)
+                request = self._latest.get(notebook)
+            if request is None:
+                continue
+
+            results = self._compute(notebook, request)
+            with self._condition:
+                # The results are queued before the request is removed so
+                # the main loop keeps polling until it has them. A newer
+                # request for the same notebook is computed next.
+                if results is not None:
+                    self._results.put((notebook, results))
+                if self._latest.get(notebook) is request:
+                    del self._latest[notebook]
+                elif notebook in self._latest:
+                    self._ready.append(notebook)
+
+
+    def _compute(self, notebook: tk.Toplevel, request: dict) -> dict | None:
+        """
+        Internal function.
+
+        Return the statistics for REQUEST, or None if a newer request
+        for NOTEBOOK arrived before they were finished.
+
+        """
+        document = request["document"]
+        results = {}
+        ranges = [(METRICS, None)]
+        if request["selection"] is not None:
+            ranges.append((SELECTION_METRICS, request["selection"]))
+
+        for metrics, span in ranges:
+            metrics = [metric(request) for metric in metrics]
+            for chunk in document.chunks(*(span or ())):
+                if self._latest.get(notebook) is not request:
+                    return None
+                for metric in metrics:
+                    metric.feed(chunk)
+            for metric in metrics:
+                results.update(metric.result())
+        return results
+
+
+    def _poll(self) -> None:
+        """Internal function. Show the results which have arrived."""
+
+        self._job = None
+        with self._condition:
+            busy = bool(self._latest)
+        while True:
+            try:
+                notebook, results = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if notebook.winfo_exists():
+                notebook.status_bar.update_analytics(results)
+
+        if busy:
+            self._job = self.manager.after(self.poll_interval, self._poll)
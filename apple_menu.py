@@ -10,10 +10,23 @@ class AppleMenu(tk.Menu):
     def __init__(self, parent: tk.Menu):
         self.notebook_menu = parent
 
-        super().__init__(parent, name="apple")
+        # The commands are only added when the menu is first opened so
+        # that a new window does not pay for a menu it may never use.
+        super().__init__(parent, name="apple",
+            postcommand=self._configure_menu)
+
+
+    def _configure_menu(self) -> None:
+        """Internal function. Configure menu commands."""
+
+        # Only build the commands once.
+        self.configure(postcommand="")
 
         self.add_command(label="About Notebook", command=self._open_about)
         self.add_separator()
+        self.add_command(label="Latency Monitor...", 
+            command=self.notebook_menu.notebook.manager.open_debug_panel)
+        self.add_separator()
 
 
     def _open_about(self) -> None:
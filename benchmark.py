@@ -0,0 +1,613 @@
+"""
+Benchmarks for the hot paths of the notebook editor.
+
+The document model benchmarks run without a display, and without Tk if
+only they are selected. The benchmarks of the Tk widgets need one, on a
+machine without a screen run them under Xvfb, for example:
+
+    xvfb-run python benchmark.py --sizes 1K,1M,100M
+
+Results are written as JSON. Saving them with --output and passing the
+file back with --compare on a later run reports every benchmark which
+has become slower than the baseline by more than the tolerance and
+exits with a non-zero status. The baseline kept with the code is
+benchmarks/baseline.json, it is updated with:
+
+    xvfb-run python benchmark.py --output benchmarks/baseline.json
+
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import batch_stats
+from document import Document
+from document_stats import DocumentStats
+from journal import Journal, JournalWriter
+
+
+
+
+# Registered benchmarks as (name, needs display, function) tuples.
+BENCHMARKS = []
+
+# Words used to build the synthetic documents.
+WORDS = ("the", "notebook", "editor", "line", "text", "a", "of", "status",
+    "cursor", "window", "0x1f", "error:", "INFO", "def", "return")
+
+
+
+
+def benchmark(name: str, gui: bool = False):
+    """Register the decorated function as benchmark NAME."""
+    def register(func):
+        BENCHMARKS.append((name, gui, func))
+        return func
+    return register
+
+
+def measure(func, repeat: int, setup=None) -> list:
+    """Return the times taken by REPEAT calls of FUNC in seconds."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def parse_size(size: str) -> int:
+    """Return the number of bytes in SIZE, such as 512, 64K or 100M."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    size = size.strip().upper()
+    if size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    """Return a synthetic document of about SIZE characters."""
+
+    # Generate a block of up to 1 MB and repeat it rather than generating
+    # every line so building a 100 MB document stays quick.
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < min(size, 1 << 20):
+        words = rng.choices(WORDS, k=rng.randint(0, 16))
+        line = ("\t" if rng.random() < 0.2 else "") + " ".join(words)
+        lines.append(line)
+        total += len(line) + 1
+    block = "\n".join(lines) + "\n"
+    return (block * (size // len(block) + 1))[:size]
+
+
+def wait(app, condition, timeout: float = 600) -> None:
+    """Run the event loop of APP until CONDITION returns True."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark did not finish")
+        app.update()
+
+
+
+
+class Context:
+    """The shared state passed to each benchmark."""
+
+
+    def __init__(self, text: str, repeat: int, app=None, notebook=None):
+        self.text = text
+        self.repeat = repeat
+        self.app = app
+        self.notebook = notebook
+        self.directory = Path(tempfile.mkdtemp(prefix="notebook-bench-"))
+
+
+
+
+# Document model benchmarks, these do not need a display.
+
+@benchmark("document_build")
+def bench_document_build(ctx: Context) -> list:
+    return measure(lambda: Document(ctx.text), ctx.repeat)
+
+
+@benchmark("document_edit")
+def bench_document_edit(ctx: Context) -> list:
+    document = Document(ctx.text)
+    rng = random.Random(1)
+
+    def edit():
+        for _ in range(1000):
+            offset = rng.randint(0, len(document))
+            document.insert(offset, "x")
+            document.delete(offset, offset + 1)
+    return measure(edit, ctx.repeat)
+
+
+@benchmark("document_line_start")
+def bench_document_line_start(ctx: Context) -> list:
+    document = Document(ctx.text)
+    rng = random.Random(2)
+
+    def lookup():
+        for _ in range(1000):
+            document.line_start(rng.randint(0, document.line_count))
+    return measure(lookup, ctx.repeat)
+
+
+@benchmark("stats_build")
+def bench_stats_build(ctx: Context) -> list:
+    return measure(lambda: DocumentStats(ctx.text), ctx.repeat)
+
+
+@benchmark("stats_replace_line")
+def bench_stats_replace_line(ctx: Context) -> list:
+    stats = DocumentStats(ctx.text)
+    line = stats.lines // 2
+    return measure(lambda: stats.replace_lines(line, line + 1, ["a b c"]),
+        ctx.repeat)
+
+
+@benchmark("stats_file")
+def bench_stats_file(ctx: Context) -> list:
+    filepath = ctx.directory / "stats.txt"
+    filepath.write_text(ctx.text)
+    return measure(lambda: batch_stats.file_stats(str(filepath)), ctx.repeat)
+
+
+@benchmark("journal_edit")
+def bench_journal_edit(ctx: Context) -> list:
+    filepath = ctx.directory / "journal.txt"
+    filepath.write_text(ctx.text)
+    document = Document(ctx.text)
+    writer = JournalWriter(ctx.directory / "journal")
+    writer.commit_delay = 0
+    journal = Journal(document, writer)
+    journal.rebase(filepath)
+
+    # One character typed and committed to disk.
+    def edit():
+        document.insert(0, "x")
+        journal.record(0, "", "x")
+        writer.flush()
+    return measure(edit, ctx.repeat)
+
+
+@benchmark("syntax_lex")
+def bench_syntax_lex(ctx: Context) -> list:
+    from syntax_highlight import PYTHON
+
+    lines = ctx.text.split("\n", 1000)[:1000]
+
+    def lex():
+        state = 0
+        for line in lines:
+            _, state = PYTHON.lex(line, state)
+    return measure(lex, ctx.repeat)
+
+
+
+
+# Text Area, menu and window benchmarks, these need a display. Tk is
+# only imported by the benchmarks which use it.
+
+@benchmark("update_word_count", gui=True)
+def bench_update_word_count(ctx: Context) -> list:
+    return measure(ctx.notebook.text_area._update_word_count, ctx.repeat)
+
+
+@benchmark("update_char_line_count", gui=True)
+def bench_update_char_line_count(ctx: Context) -> list:
+    text_area = ctx.notebook.text_area
+
+    def update():
+        text_area._update_char_count()
+        text_area._update_line_count()
+    return measure(update, ctx.repeat)
+
+
+@benchmark("update_cursor", gui=True)
+def bench_update_cursor(ctx: Context) -> list:
+    import tkinter as tk
+
+    text_area = ctx.notebook.text_area
+    text_area.mark_set(tk.INSERT, "end-1c")
+    return measure(text_area._update_cursor, ctx.repeat)
+
+
+@benchmark("keystroke", gui=True)
+def bench_keystroke(ctx: Context) -> list:
+    import tkinter as tk
+
+    text_area = ctx.notebook.text_area
+    text_area.mark_set(tk.INSERT, "end-1c")
+
+    def type_char():
+        text_area.insert(tk.INSERT, "x")
+        text_area.updates.flush()
+    return measure(type_char, ctx.repeat)
+
+
+@benchmark("keystroke_long_line", gui=True)
+def bench_keystroke_long_line(ctx: Context) -> list:
+    import tkinter as tk
+
+    # The whole text on one line, typed into half way along.
+    notebook = ctx.app.open_notebook("Benchmark long line")
+    text_area = notebook.text_area
+    text_area.set_long_lines(True)
+    text_area.insert("1.0", ctx.text.replace("\n", " "))
+    text_area.mark_set(tk.INSERT, f"1.{len(ctx.text) // 2}")
+    ctx.app.update()
+
+    def type_char():
+        text_area.insert(tk.INSERT, "x")
+        text_area.updates.flush()
+        ctx.app.update_idletasks()
+    try:
+        return measure(type_char, ctx.repeat)
+    finally:
+        ctx.app.notebooks.pop(notebook.name).destroy()
+
+
+@benchmark("keystroke_highlighted", gui=True)
+def bench_keystroke_highlighted(ctx: Context) -> list:
+    import tkinter as tk
+
+    text_area = ctx.notebook.text_area
+    file_menu = ctx.notebook.menu.file_menu
+    file_menu._update_filetype(".py")
+    highlighter = ctx.notebook.highlighter
+    text_area.mark_set(tk.INSERT, "1.0")
+    text_area.see(tk.INSERT)
+    highlighter.updates.flush()
+
+    def type_char():
+        text_area.insert(tk.INSERT, "x")
+        highlighter.updates.flush()
+    times = measure(type_char, ctx.repeat)
+    file_menu._update_filetype(".txt")
+    return times
+
+
+@benchmark("configure_case", gui=True)
+def bench_configure_case(ctx: Context) -> list:
+    edit_menu = ctx.notebook.menu.edit_menu
+    cases = iter(["upper", "lower"] * ctx.repeat)
+
+    def transform():
+        edit_menu.selectall()
+        edit_menu._configure_case(next(cases))
+        wait(ctx.app, lambda: edit_menu.transform is None)
+    return measure(transform, ctx.repeat)
+
+
+@benchmark("copy", gui=True)
+def bench_copy(ctx: Context) -> list:
+    edit_menu = ctx.notebook.menu.edit_menu
+    return measure(edit_menu.copy, ctx.repeat, setup=edit_menu.selectall)
+
+
+@benchmark("cut_paste", gui=True)
+def bench_cut_paste(ctx: Context) -> list:
+    edit_menu = ctx.notebook.menu.edit_menu
+
+    def cut_paste():
+        edit_menu.cut()
+        edit_menu.paste()
+        wait(ctx.app, lambda: edit_menu.paster is None)
+    return measure(cut_paste, ctx.repeat, setup=edit_menu.selectall)
+
+
+@benchmark("scroll", gui=True)
+def bench_scroll(ctx: Context) -> list:
+    text_area = ctx.notebook.text_area
+
+    # A page down and the redraw of the text and line numbers after it.
+    def scroll():
+        text_area.yview_scroll(1, "pages")
+        ctx.app.update()
+    return measure(scroll, ctx.repeat, setup=lambda: text_area.yview_moveto(0))
+
+
+@benchmark("file_open", gui=True)
+def bench_file_open(ctx: Context) -> list:
+    from tkinter import filedialog
+
+    filepath = ctx.directory / "open.txt"
+    filepath.write_text(ctx.text)
+    file_menu = ctx.notebook.menu.file_menu
+    original = filedialog.askopenfilename
+    filedialog.askopenfilename = lambda **kwargs: str(filepath)
+
+    def file_open():
+        file_menu.file_open()
+        notebook = ctx.app.notebooks[filepath.name]
+        wait(ctx.app, lambda: notebook.loader is None)
+        ctx.app.notebooks.pop(filepath.name).destroy()
+    try:
+        return measure(file_open, ctx.repeat)
+    finally:
+        filedialog.askopenfilename = original
+
+
+@benchmark("file_reload", gui=True)
+def bench_file_reload(ctx: Context) -> list:
+    from file_reload import Reload
+
+    # The file alternates between the text and the text with a few
+    # lines added in the middle.
+    filepath = ctx.directory / "reload.txt"
+    middle = ctx.text.find("\n", len(ctx.text) // 2) + 1
+    texts = [ctx.text[:middle] + "added\n" * 3 + ctx.text[middle:], ctx.text]
+    runs = iter(texts * ctx.repeat)
+
+    def reload():
+        filepath.write_text(next(runs))
+        Reload(ctx.notebook, filepath).start()
+        wait(ctx.app, lambda: ctx.notebook.reloader is None)
+    return measure(reload, ctx.repeat)
+
+
+@benchmark("spill_restore", gui=True)
+def bench_spill_restore(ctx: Context) -> list:
+    from memory_budget import Spill
+
+    # The text is written out and the window emptied, then put back.
+    def spill_restore():
+        spill = Spill(ctx.notebook)
+        spill.start()
+        wait(ctx.app, lambda: spill.spilled or spill.done)
+        spill.restore()
+        wait(ctx.app, lambda: spill.done)
+    return measure(spill_restore, ctx.repeat)
+
+
+@benchmark("file_save", gui=True)
+def bench_file_save(ctx: Context) -> list:
+    file_menu = ctx.notebook.menu.file_menu
+    file_menu.filepath = ctx.directory / "save.txt"
+
+    def file_save():
+        file_menu.file_save()
+        wait(ctx.app, lambda: not file_menu.saving)
+    try:
+        return measure(file_save, ctx.repeat)
+    finally:
+        file_menu.filepath = None
+
+
+@benchmark("open_notebook", gui=True)
+def bench_open_notebook(ctx: Context) -> list:
+
+    def open_notebook():
+        notebook = ctx.app.open_notebook()
+        ctx.app.update_idletasks()
+        ctx.app.notebooks.pop(notebook.name).destroy()
+
+    # Each window is shown from a full pool.
+    def fill_pool():
+        wait(ctx.app, lambda: len(ctx.app.pool) == ctx.app.pool_size)
+    return measure(open_notebook, ctx.repeat, setup=fill_pool)
+
+
+@benchmark("open_notebook_cold", gui=True)
+def bench_open_notebook_cold(ctx: Context) -> list:
+    pool_size = ctx.app.pool_size
+    ctx.app.pool_size = 0
+    while ctx.app.pool:
+        ctx.app.pool.pop().destroy()
+
+    def open_notebook():
+        notebook = ctx.app.open_notebook()
+        ctx.app.update_idletasks()
+        ctx.app.notebooks.pop(notebook.name).destroy()
+    try:
+        return measure(open_notebook, ctx.repeat)
+    finally:
+        ctx.app.pool_size = pool_size
+        ctx.app._schedule_fill_pool()
+
+
+@benchmark("session_restore", gui=True)
+def bench_session_restore(ctx: Context) -> list:
+    from session import Session
+
+    app = ctx.app
+    session = Session(app, ctx.directory / "session.zip")
+
+    # A session of 50 windows, each with up to 64K of unsaved text. The
+    # benchmark window is left out of it.
+    app.notebooks.pop(ctx.notebook.name)
+    for i in range(50):
+        notebook = app.open_notebook(f"Session {i}")
+        notebook.text_area.insert("1.0", ctx.text[:1 << 16])
+    app.update()
+    session.save()
+
+    def close_windows():
+        session.close()
+        for name in list(app.notebooks):
+            app.notebooks.pop(name).destroy()
+
+    def restore():
+        session.restore()
+        wait(app, lambda: not session.restoring)
+    try:
+        return measure(restore, ctx.repeat, setup=close_windows)
+    finally:
+        close_windows()
+        app.notebooks[ctx.notebook.name] = ctx.notebook
+
+
+@benchmark("startup", gui=True)
+def bench_startup(ctx: Context) -> list:
+    main = Path(__file__).with_name("main.py")
+
+    # The time to the first window is reported by the application itself
+    # so the interpreter start up is not included.
+    def startup():
+        output = subprocess.run([sys.executable, str(main), "--startup-time"],
+            capture_output=True, text=True, check=True).stdout
+        return float(output.strip().splitlines()[-1])
+    return [startup() for _ in range(ctx.repeat)]
+
+
+
+
+def run(sizes: list, names: set | None, repeat: int | None) -> dict:
+    """Run the selected benchmarks for each size and return the results."""
+
+    results = {}
+    skipped = {}
+    selected = [(name, gui, func) for name, gui, func in BENCHMARKS
+        if not names or name in names]
+
+    # The application must not touch the user's session or journals, the
+    # paths are put back once the benchmarks have run.
+    state = Path(tempfile.mkdtemp(prefix="notebook-bench-"))
+    journal_directory = JournalWriter.directory
+    JournalWriter.directory = state / "journal"
+    session_path = None
+    app = None
+    tk_version = None
+    try:
+        # The display is optional, without one only the document model
+        # benchmarks are run. Tk is only imported if a benchmark of the
+        # widgets was selected.
+        if any(gui for _, gui, _ in selected):
+            import tkinter as tk
+            from manager import Manager
+            from session import Session
+
+            tk_version = tk.TkVersion
+            session_path = Session.path
+            Session.path = state / "session.zip"
+            try:
+                app = Manager()
+            except tk.TclError as error:
+                skipped["gui"] = str(error)
+
+        for size in sizes:
+            text = make_text(parse_size(size))
+            count = repeat or (3 if len(text) >= 10 << 20 else 10)
+            ctx = Context(text, count, app)
+            try:
+                if app is not None:
+                    ctx.notebook = app.open_notebook(f"Benchmark {size}")
+                    ctx.notebook.text_area.insert("1.0", text)
+                    app.update()
+
+                for name, gui, func in selected:
+                    if gui and app is None:
+                        continue
+                    times = func(ctx)
+                    results[f"{name}/{size}"] = {
+                        "median": statistics.median(times),
+                        "min": min(times),
+                        "runs": len(times),
+                    }
+                    print(f"{name + '/' + size:<32} "
+                        f"{statistics.median(times):>12.6f} s", file=sys.stderr)
+            finally:
+                if ctx.notebook is not None:
+                    app.notebooks.pop(ctx.notebook.name, None)
+                    ctx.notebook.destroy()
+                shutil.rmtree(ctx.directory, ignore_errors=True)
+    finally:
+        if app is not None:
+            app.destroy()
+        JournalWriter.directory = journal_directory
+        if session_path is not None:
+            Session.path = session_path
+        shutil.rmtree(state, ignore_errors=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "tk": tk_version,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float,
+        floor: float) -> list:
+    """
+    Return the benchmarks in RESULTS slower than in BASELINE.
+
+    A benchmark has regressed if its median is more than TOLERANCE
+    times the baseline median and slower by more than FLOOR seconds,
+    which keeps very fast benchmarks from failing on timer noise.
+
+    """
+    regressions = []
+    for key, result in results["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        if (result["median"] > base["median"] * tolerance
+                and result["median"] - base["median"] > floor):
+            regressions.append((key, base["median"], result["median"]))
+    return regressions
+
+
+def main() -> int:
+    """Entry point of the benchmark runner."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", default="1K,1M,10M,100M",
+        help="comma separated document sizes, such as 1K,1M,100M")
+    parser.add_argument("--only", default="",
+        help="comma separated names of the benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=None,
+        help="runs of each benchmark, by default based on the size")
+    parser.add_argument("--output", type=Path, default=None,
+        help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", type=Path, default=None,
+        help="baseline JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+        help="allowed slowdown relative to the baseline")
+    parser.add_argument("--floor", type=float, default=0.001,
+        help="slowdowns smaller than this many seconds are ignored")
+    args = parser.parse_args()
+
+    names = set(filter(None, args.only.split(",")))
+    results = run(args.sizes.split(","), names, args.repeat)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.tolerance, args.floor)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before:.6f} s -> {after:.6f} s",
+                file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
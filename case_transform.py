@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+import tkinter as tk
+from typing import Literal
+
+from document import Document
+
+
+
+
+class CaseTransform:
+    """
+    Changes the case of a range of the Text Area in chunks.
+
+    A worker thread reads the range from a snapshot of the document
+    model and transforms it a slice at a time, passing the slices to
+    the main loop through a bounded queue. The main loop writes each
+    changed slice back from after callbacks, spending at most BATCH_TIME
+    milliseconds per batch. The text is read only while the transform
+    runs and every slice is written within a single undo group, so one
+    undo reverses the whole transform.
+
+    """
+
+    slice_size = 1 << 16                       # chars transformed per slice
+    queue_size = 16                            # slices buffered in memory
+    batch_time = 8                             # ms spent writing per batch
+
+
+    def __init__(self, notebook: tk.Toplevel, start: int, end: int,
+            type: Literal["upper", "lower", "capitalize"]):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.range_start = start
+        self.range_end = end
+        self.type = type
+        self.position = start                  # offset of the next slice
+        self.done = False
+
+        self._slices = queue.Queue(self.queue_size)
+        self._cancelled = threading.Event()
+        self._worker = threading.Thread(target=self._transform,
+            args=(self.text_area.document.snapshot(),), daemon=True)
+        self._job = None
+
+
+    def start(self) -> None:
+        """Start transforming the range."""
+
+        self._autoseparators = self.text_area.cget("autoseparators")
+        self.text_area.edit_separator()
+        self.text_area.configure(autoseparators=False, state="disabled")
+
+        self._worker.start()
+        self._job = self.notebook.after(1, self._poll)
+
+
+    def cancel(self) -> None:
+        """Stop the transform, keeping the slices already written."""
+        if not self.done:
+            self._cancelled.set()
+            self._finish()
+
+
+    def _transform(self, document: Document) -> None:
+        """
+        Internal function.
+
+        Transform the range a slice at a time. Unchanged slices are sent
+        as None so they do not need to be written back.
+
+        """
+        first = True
+        for start in range(self.range_start, self.range_end, self.slice_size):
+            if self._cancelled.is_set():
+                return
+            text = document.get(start,
+                min(start + self.slice_size, self.range_end))
+            if self.type == "upper":
+                new_text = text.upper()
+            elif self.type == "lower":
+                new_text = text.lower()
+            elif first:
+                # Only the first character of the whole range is upper
+                # case when capitalizing, the rest is lower case.
+                new_text = text.capitalize()
+            else:
+                new_text = text.lower()
+            first = False
+            self._put((len(text), None if new_text == text else new_text))
+        self._put(None)
+
+
+    def _put(self, item) -> None:
+        """
+        Internal function.
+
+        Put ITEM in the queue, waiting while it is full unless the
+        transform is cancelled.
+
+        """
+        while not self._cancelled.is_set():
+            try:
+                self._slices.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+    def _poll(self) -> None:
+        """Internal function. Write the next batch of slices."""
+
+        self._job = None
+        deadline = time.perf_counter() + self.batch_time / 1000
+        self.text_area.configure(state="normal")
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    item = self._slices.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.done = True
+                    break
+
+                # Slices can change length, for example "ß".upper() is
+                # "SS", so the position follows the written text.
+                length, new_text = item
+                if new_text is None:
+                    self.position += length
+                else:
+                    self.text_area.replace(
+                        self.text_area.index_of(self.position),
+                        self.text_area.index_of(self.position + length),
+                        new_text)
+                    self.position += len(new_text)
+        finally:
+            self.text_area.configure(state="disabled")
+
+        if self.done:
+            self._finish()
+        else:
+            total = self.range_end - self.range_start
+            percent = min(100, 100 * (self.position - self.range_start) // total)
+            self.notebook.status_bar.update_progress(f"Transforming {percent}%")
+            self._job = self.notebook.after(1, self._poll)
+
+
+    def _finish(self) -> None:
+        """Internal function. Return the Text Area to normal editing."""
+
+        self.done = True
+        if self._job is not None:
+            self.notebook.after_cancel(self._job)
+            self._job = None
+
+        self.text_area.configure(autoseparators=self._autoseparators,
+            state="normal")
+        self.text_area.edit_separator()
+        self.notebook.status_bar.update_progress("")
+        self.notebook.menu.edit_menu.transform = None
@@ -0,0 +1,157 @@
+import collections
+import sys
+import time
+import tkinter as tk
+
+
+
+
+class ClipboardRing:
+    """
+    The texts recently cut, copied or pasted in any window.
+
+    The ring is shared by every notebook so an earlier cut can be pasted
+    again without copying it again. It holds at most MAX_ENTRIES texts
+    and MAX_BYTES of memory. Using a text moves it to the front and the
+    least recently used texts are dropped first once either limit is
+    passed. A text larger than MAX_BYTES on its own is not kept.
+
+    """
+
+    max_entries = 32                           # texts kept at most
+    max_bytes = 32 << 20                       # memory held by the texts
+
+
+    def __init__(self):
+        self.size = 0                          # memory held by the texts
+
+        # The memory held by each text, most recently used last.
+        self._texts = collections.OrderedDict()
+
+
+    def add(self, text: str) -> None:
+        """Add TEXT to the front of the ring, or move it there."""
+        if not text:
+            return
+        if text in self._texts:
+            self._texts.move_to_end(text)
+            return
+
+        size = sys.getsizeof(text)
+        if size > self.max_bytes:
+            return
+        self._texts[text] = size
+        self.size += size
+
+        while len(self._texts) > self.max_entries or self.size > self.max_bytes:
+            _, size = self._texts.popitem(last=False)
+            self.size -= size
+
+
+    def entries(self) -> list:
+        """Return the texts, most recently used first."""
+        return list(reversed(self._texts))
+
+
+    def clear(self) -> None:
+        """Forget every text."""
+        self._texts.clear()
+        self.size = 0
+
+
+
+
+class Paste:
+    """
+    Inserts a large text into the Text Area in chunks.
+
+    A single insert of a text of several megabytes blocks the window
+    while the Text widget lays it out. The text is instead inserted a
+    chunk at a time from after callbacks, spending at most BATCH_TIME
+    milliseconds per batch. The text cannot be edited while the paste
+    runs and every chunk is inserted within a single undo group, so one
+    undo removes the whole paste.
+
+    """
+
+    chunk_size = 1 << 16                       # chars inserted per chunk
+    batch_time = 8                             # ms spent inserting per batch
+
+
+    def __init__(self, notebook: tk.Toplevel, text: str):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.text = text
+        self.offset = 0                        # offset the text is pasted at
+        self.position = 0                      # chars of the text inserted
+        self.done = False
+        self._job = None
+
+
+    def start(self, selection: tuple = ()) -> None:
+        """
+        Start inserting the text at the insert cursor, replacing the
+        text between the indices in SELECTION if given.
+
+        """
+        self._autoseparators = self.text_area.cget("autoseparators")
+        self.text_area.edit_separator()
+        self.text_area.configure(autoseparators=False)
+
+        # The selection is deleted within the undo group of the paste so
+        # one undo brings it back.
+        if selection:
+            self.text_area.delete(*selection)
+        self.offset = self.text_area.offset(tk.INSERT)
+
+        self.text_area.configure(state="disabled")
+        self._job = self.notebook.after(1, self._poll)
+
+
+    def cancel(self) -> None:
+        """Stop the paste, keeping the text already inserted."""
+        if not self.done:
+            self._finish()
+
+
+    def _poll(self) -> None:
+        """Internal function. Insert the next batch of chunks."""
+
+        self._job = None
+        deadline = time.perf_counter() + self.batch_time / 1000
+        self.text_area.configure(state="normal")
+        try:
+            while self.position < len(self.text) \
+                    and time.perf_counter() < deadline:
+                chunk = self.text[self.position:
+                    self.position + self.chunk_size]
+                self.text_area.insert(
+                    self.text_area.index_of(self.offset + self.position), chunk)
+                self.position += len(chunk)
+        finally:
+            self.text_area.configure(state="disabled")
+
+        if self.position >= len(self.text):
+            self._finish()
+        else:
+            percent = 100 * self.position // len(self.text)
+            self.notebook.status_bar.update_progress(f"Pasting {percent}%")
+            self._job = self.notebook.after(1, self._poll)
+
+
+    def _finish(self) -> None:
+        """Internal function. Return the Text Area to normal editing."""
+
+        self.done = True
+        if self._job is not None:
+            self.notebook.after_cancel(self._job)
+            self._job = None
+
+        self.text_area.configure(autoseparators=self._autoseparators,
+            state="normal")
+        self.text_area.edit_separator()
+        self.text_area.mark_set(tk.INSERT,
+            self.text_area.index_of(self.offset + self.position))
+        self.text_area.see(tk.INSERT)
+        self.notebook.status_bar.update_progress("")
+        self.notebook.menu.edit_menu.paster = None
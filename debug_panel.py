@@ -0,0 +1,114 @@
+import json
+import tkinter as tk
+from tkinter import filedialog, ttk
+
+import instrumentation
+
+
+
+
+class DebugPanel(tk.Toplevel):
+    """
+    The Latency Monitor window.
+
+    Shows the rolling latency percentiles recorded for every open
+    notebook, refreshed twice a second, and lets them be saved as JSON.
+
+    """
+
+
+    def __init__(self, parent: tk.Tk):
+        self.manager = parent
+        self.recording = tk.BooleanVar(value=instrumentation.enabled)
+        self._job = None                       # pending refresh after id
+
+        super().__init__(parent)
+        self.title("Latency Monitor")
+        self.geometry("640x360")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self._configure_widgets()
+        self._refresh()
+
+
+    def destroy(self) -> None:
+        """Destroy the panel and stop refreshing it."""
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+        super().destroy()
+
+
+    def _configure_widgets(self) -> None:
+        """Internal function. Configure the widgets for the panel."""
+
+        toolbar = ttk.Frame(self)
+        toolbar.grid(row=0, column=0, sticky="ew")
+
+        ttk.Checkbutton(toolbar, text="Record latencies",
+            variable=self.recording,
+            command=lambda: instrumentation.enable(self.recording.get())
+            ).grid(row=0, column=0, padx=4, pady=4)
+        ttk.Button(toolbar, text="Reset", command=self.reset
+            ).grid(row=0, column=1, padx=4, pady=4)
+        ttk.Button(toolbar, text="Save JSON...", command=self.save
+            ).grid(row=0, column=2, padx=4, pady=4)
+
+        # One row for every notebook with its keys underneath.
+        columns = ("count", "p50", "p95", "p99", "max")
+        self.tree = ttk.Treeview(self, columns=columns)
+        self.tree.heading("#0", text="Notebook / event")
+        for column in columns:
+            self.tree.heading(column, text=column if column == "count"
+                else f"{column} ms")
+            self.tree.column(column, width=70, anchor="e")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+
+        vscroll = ttk.Scrollbar(self, orient="vertical",
+            command=self.tree.yview)
+        vscroll.grid(row=1, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=vscroll.set)
+
+
+    def summary(self) -> dict:
+        """Return the latency summary of every open notebook."""
+        return {name: notebook.metrics.summary()
+            for name, notebook in self.manager.notebooks.items()}
+
+
+    def reset(self) -> None:
+        """Forget the samples recorded for every notebook."""
+        for notebook in self.manager.notebooks.values():
+            notebook.metrics.reset()
+
+
+    def save(self) -> None:
+        """Save the latency summary as JSON to a file chosen by the user."""
+        filepath = filedialog.asksaveasfilename(defaultextension=".json",
+            filetypes=(("json files", "*.json"), ("all files", "*.*")),
+            initialfile="latency.json", parent=self)
+        if not filepath == "":
+            with open(file=filepath, mode="w") as f:
+                json.dump(self.summary(), f, indent=2)
+
+
+    def _refresh(self) -> None:
+        """Internal function. Redraw the table of latencies."""
+
+        # Rows are kept open across refreshes so the user can collapse
+        # notebooks they are not interested in.
+        opened = {item for item in self.tree.get_children()
+            if self.tree.item(item, "open")}
+        self.tree.delete(*self.tree.get_children())
+
+        for name, summary in self.summary().items():
+            parent = self.tree.insert("", "end", iid=name, text=name,
+                open=(name in opened or not opened))
+            for key, values in summary.items():
+                self.tree.insert(parent, "end", text=key, values=(
+                    values["count"],
+                    *(f"{values[column]:.3f}"
+                        for column in ("p50", "p95", "p99", "max"))))
+
+        self._job = self.after(500, self._refresh)
@@ -0,0 +1,388 @@
+import random
+from typing import Iterator
+
+
+# Largest piece of text held by a single node. Small edits are made
+# inside the node they fall in while it stays below this size.
+CHUNK_SIZE = 4096
+
+
+
+
+class _Node:
+    """
+    A node of the rope.
+
+    Nodes are never modified once created, an edit creates new nodes
+    along the path to the change and shares everything else. This makes
+    a snapshot of a document as cheap as keeping its root.
+
+    """
+
+    __slots__ = ("text", "newlines", "left", "right", "priority",
+        "length", "lines")
+
+
+    def __init__(self, text: str, left: "_Node | None", right: "_Node | None",
+            priority: float, newlines: int | None = None):
+        self.text = text
+        self.newlines = text.count("\n") if newlines is None else newlines
+        self.left = left
+        self.right = right
+        self.priority = priority
+
+        # Totals for the subtree rooted at this node.
+        self.length = len(text)
+        self.lines = self.newlines
+        if left is not None:
+            self.length += left.length
+            self.lines += left.lines
+        if right is not None:
+            self.length += right.length
+            self.lines += right.lines
+
+
+    def copy(self, left: "_Node | None", right: "_Node | None") -> "_Node":
+        """Return a copy of this node with new children."""
+        return _Node(self.text, left, right, self.priority, self.newlines)
+
+
+
+
+def _length(node: _Node | None) -> int:
+    """Internal function. Return the length of the subtree NODE."""
+    return node.length if node is not None else 0
+
+
+def _lines(node: _Node | None) -> int:
+    """Internal function. Return the newlines in the subtree NODE."""
+    return node.lines if node is not None else 0
+
+
+def _merge(a: _Node | None, b: _Node | None) -> _Node | None:
+    """Internal function. Join the subtrees A and B in that order."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return a.copy(a.left, _merge(a.right, b))
+    return b.copy(_merge(a, b.left), b.right)
+
+
+def _split(node: _Node | None, offset: int) -> tuple:
+    """
+    Internal function.
+
+    Split the subtree NODE into the subtrees before and after OFFSET.
+
+    """
+    if node is None:
+        return None, None
+
+    left_length = _length(node.left)
+    if offset <= left_length:
+        a, b = _split(node.left, offset)
+        return a, node.copy(b, node.right)
+
+    offset -= left_length
+    if offset >= len(node.text):
+        a, b = _split(node.right, offset - len(node.text))
+        return node.copy(node.left, a), b
+
+    # The offset falls inside the text of this node which is divided
+    # between the two halves. The tail is given a new priority and
+    # merged back in so no two nodes share a priority, which would let
+    # the tree degrade into a list.
+    head = _Node(node.text[:offset], node.left, None, node.priority)
+    tail = _Node(node.text[offset:], None, None, random.random())
+    return head, _merge(tail, node.right)
+
+
+def _insert(node: _Node, offset: int, text: str) -> _Node | None:
+    """
+    Internal function.
+
+    Insert TEXT at OFFSET inside the text of an existing node of the
+    subtree NODE. Returns None if the node would grow too large.
+
+    """
+    left_length = _length(node.left)
+    if offset < left_length:
+        left = _insert(node.left, offset, text)
+        return node.copy(left, node.right) if left is not None else None
+
+    offset -= left_length
+    if offset > len(node.text):
+        right = _insert(node.right, offset - len(node.text), text)
+        return node.copy(node.left, right) if right is not None else None
+
+    if len(node.text) + len(text) > CHUNK_SIZE:
+        return None
+    return _Node(node.text[:offset] + text + node.text[offset:],
+        node.left, node.right, node.priority)
+
+
+def _delete(node: _Node, start: int, end: int) -> _Node | None:
+    """
+    Internal function.
+
+    Delete the text from START up to END when it lies inside the text of
+    a single node of the subtree NODE. Returns None otherwise.
+
+    """
+    left_length = _length(node.left)
+    if end <= left_length:
+        left = _delete(node.left, start, end) if node.left else None
+        return node.copy(left, node.right) if left is not None else None
+
+    start -= left_length
+    end -= left_length
+    if start >= len(node.text):
+        if node.right is None:
+            return None
+        right = _delete(node.right, start - len(node.text),
+            end - len(node.text))
+        return node.copy(node.left, right) if right is not None else None
+
+    if start < 0 or end > len(node.text) or end - start == len(node.text):
+        return None
+    return _Node(node.text[:start] + node.text[end:],
+        node.left, node.right, node.priority)
+
+
+def _build(text: str) -> _Node | None:
+    """
+    Internal function.
+
+    Build a tree for TEXT in linear time. The text is divided into
+    chunks which are given random priorities and arranged into a treap
+    with a stack.
+
+    """
+    chunks = [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+    if not chunks:
+        return None
+    priorities = [random.random() for _ in chunks]
+
+    # Find the children of each chunk. A chunk becomes the left child of
+    # the first following chunk with a higher priority and the right
+    # child of the last preceding one.
+    left = [None] * len(chunks)
+    right = [None] * len(chunks)
+    stack = []
+    for i, priority in enumerate(priorities):
+        last = None
+        while stack and priorities[stack[-1]] < priority:
+            last = stack.pop()
+        left[i] = last
+        if stack:
+            right[stack[-1]] = i
+        stack.append(i)
+
+    # Create the nodes children first so their totals are known.
+    nodes = [None] * len(chunks)
+    order = []
+    pending = [stack[0]]
+    while pending:
+        i = pending.pop()
+        order.append(i)
+        pending.extend(c for c in (left[i], right[i]) if c is not None)
+    for i in reversed(order):
+        nodes[i] = _Node(chunks[i],
+            nodes[left[i]] if left[i] is not None else None,
+            nodes[right[i]] if right[i] is not None else None,
+            priorities[i])
+    return nodes[stack[0]]
+
+
+
+
+class Document:
+    """
+    A text document stored as a rope.
+
+    The text is held in a randomised balanced tree of chunks which also
+    records the number of newlines in each subtree, so inserting,
+    deleting and converting between offsets and lines all take
+    logarithmic time. The document is independent of Tk and can be used
+    without a display.
+
+    Offsets count characters from zero and lines are numbered from
+    zero. The document does not hold the final newline that the Text
+    widget always keeps after the text.
+
+    """
+
+
+    def __init__(self, text: str = ""):
+        self.root = _build(text)
+
+
+    def __len__(self) -> int:
+        return _length(self.root)
+
+
+    @property
+    def line_count(self) -> int:
+        """The number of lines in the document."""
+        return _lines(self.root) + 1
+
+
+    def snapshot(self) -> "Document":
+        """
+        Return a read only copy of the document.
+
+        The copy shares the tree of the document so it is taken in
+        constant time and can be read safely from another thread.
+
+        """
+        snapshot = Document()
+        snapshot.root = self.root
+        return snapshot
+
+
+    def reset(self, text: str) -> None:
+        """Replace the whole document with TEXT."""
+        self.root = _build(text)
+
+
+    def insert(self, offset: int, text: str) -> None:
+        """Insert TEXT at OFFSET."""
+        if not text:
+            return
+
+        # Small insertions are made inside an existing node so typing
+        # does not create a node for every keystroke.
+        if self.root is not None and len(text) <= CHUNK_SIZE:
+            root = _insert(self.root, offset, text)
+            if root is not None:
+                self.root = root
+                return
+
+        a, b = _split(self.root, offset)
+        self.root = _merge(_merge(a, _build(text)), b)
+
+
+    def delete(self, start: int, end: int) -> None:
+        """Delete the text from START up to END."""
+        if start >= end:
+            return
+
+        # Small deletions are made inside an existing node so they do
+        # not divide it into pieces.
+        root = _delete(self.root, start, end)
+        if root is not None:
+            self.root = root
+            return
+
+        a, rest = _split(self.root, start)
+        _, b = _split(rest, end - start)
+        self.root = _merge(a, b)
+
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        """Replace the text from START up to END with TEXT."""
+        self.delete(start, end)
+        self.insert(start, text)
+
+
+    def get(self, start: int = 0, end: int | None = None) -> str:
+        """Return the text from START up to END."""
+        return "".join(self.chunks(start, end))
+
+
+    def chunks(self, start: int = 0, end: int | None = None) -> Iterator[str]:
+        """Iterate over the text from START up to END in chunks."""
+
+        if end is None:
+            end = len(self)
+
+        # Walk down to the node holding START, remembering the nodes
+        # still to be visited in order on a stack.
+        stack = []
+        node = self.root
+        offset = 0
+        while node is not None:
+            left_length = _length(node.left)
+            if start < offset + left_length:
+                stack.append((node, offset + left_length))
+                node = node.left
+            else:
+                stack.append((node, offset + left_length))
+                offset += left_length + len(node.text)
+                if start < offset:
+                    break
+                stack.pop()
+                node = node.right
+
+        while stack and start < end:
+            node, node_start = stack.pop()
+            text = node.text[max(start - node_start, 0):end - node_start]
+            if text:
+                yield text
+            start = node_start + len(node.text)
+
+            # Push the leftmost path of the right subtree.
+            node, offset = node.right, start
+            while node is not None:
+                stack.append((node, offset + _length(node.left)))
+                node = node.left
+
+
+    def line_start(self, line: int) -> int:
+        """Return the offset of the first character of LINE."""
+
+        if line <= 0:
+            return 0
+        if line > _lines(self.root):
+            return len(self)
+
+        # Find the node holding the newline which ends the previous line.
+        node = self.root
+        offset = 0
+        while True:
+            left_lines = _lines(node.left)
+            if line <= left_lines:
+                node = node.left
+                continue
+            line -= left_lines
+            offset += _length(node.left)
+            if line <= node.newlines:
+                tail = node.text.split("\n", line)[line]
+                return offset + len(node.text) - len(tail)
+            line -= node.newlines
+            offset += len(node.text)
+            node = node.right
+
+
+    def line_end(self, line: int) -> int:
+        """Return the offset of the newline which ends LINE."""
+        if line >= _lines(self.root):
+            return len(self)
+        return self.line_start(line + 1) - 1
+
+
+    def line_of(self, offset: int) -> int:
+        """Return the line holding OFFSET."""
+
+        node = self.root
+        line = 0
+        while node is not None:
+            left_length = _length(node.left)
+            if offset < left_length:
+                node = node.left
+                continue
+            offset -= left_length
+            line += _lines(node.left)
+            if offset < len(node.text):
+                return line + node.text.count("\n", 0, offset)
+            offset -= len(node.text)
+            line += node.newlines
+            node = node.right
+        return line
+
+
+    def get_line(self, line: int) -> str:
+        """Return the text of LINE without its newline."""
+        return self.get(self.line_start(line), self.line_end(line))
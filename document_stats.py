@@ -0,0 +1,171 @@
+import re
+from array import array
+from typing import Iterable
+
+
+# Characters which end a word. This mirrors the original word counting
+# of the Text Area where only spaces and tabs separate words and a
+# newline is treated as part of a word.
+SEPARATORS = (" ", "\t")
+
+# A word is counted each time a separator directly follows a character
+# which is not a separator.
+_WORD_END = re.compile(r"[^ \t][ \t]")
+
+
+
+
+def line_words(line: str) -> int:
+    """
+    Return the word contribution of a single LINE.
+
+    LINE must not include its newline. The count includes the word ended
+    by a leading separator, which is terminated by the newline of the
+    previous line. The first line of a document has no previous line so
+    DocumentStats removes that contribution again.
+
+    """
+    return len(_WORD_END.findall(line)) + (line[:1] in SEPARATORS)
+
+
+def count_words(text: str) -> int:
+    """Return the word count of TEXT as shown by the Text Area."""
+    return len(_WORD_END.findall(text))
+
+
+def longest_line(text: str, carry: int = 0) -> tuple[int, int]:
+    """
+    Return the length of the longest line in TEXT and of its last line.
+
+    TEXT can be one chunk of a longer text, CARRY is then the length of
+    the last line of the chunks before it.
+
+    """
+    first = text.find("\n")
+    if first == -1:
+        return carry + len(text), carry + len(text)
+    longest = max(carry + first, max(map(len, text[first:].split("\n"))))
+    return longest, len(text) - text.rfind("\n") - 1
+
+
+
+
+class DocumentStats:
+    """
+    A per-line statistics index for the contents of a Text Area.
+
+    The index stores the character and word counts of every line so
+    that an edit only needs to recount the lines it touched rather than
+    the whole document. Totals are kept up to date from the difference
+    between the old and new values of the replaced lines.
+
+    """
+
+
+    def __init__(self, text: str = ""):
+        self.line_chars = array("q")           # characters on each line
+        self.line_words = array("q")           # words on each line
+        self._chars = 0                        # sum of line_chars
+        self._words = 0                        # sum of line_words
+        self._first_leading = False            # first line starts with a separator
+
+        self.reset(text)
+
+
+    @property
+    def chars(self) -> int:
+        """The number of characters, excluding the final newline."""
+        return self._chars + len(self.line_chars) - 1
+
+
+    @property
+    def lines(self) -> int:
+        """The number of lines."""
+        return len(self.line_chars)
+
+
+    @property
+    def words(self) -> int:
+        """The number of words."""
+        return self._words - self._first_leading
+
+
+    def reset(self, text: str) -> None:
+        """Rebuild the index from the complete document TEXT."""
+        self.line_chars = array("q", [0])
+        self.line_words = array("q", [0])
+        self._chars = 0
+        self._words = 0
+        self._first_leading = False
+        self.replace_lines(0, 1, text.split("\n"))
+
+
+    def replace_lines(self, start: int, end: int, lines: Iterable[str]) -> None:
+        """
+        Replace the statistics of lines START up to END with LINES.
+
+        Line numbers start from zero and END is exclusive. Each entry in
+        LINES is the new text of a line without its newline.
+
+        """
+        lines = list(lines)
+        new_chars = array("q", map(len, lines))
+        new_words = array("q", map(line_words, lines))
+
+        # Adjust the running totals by the difference between the old
+        # and new lines before swapping them into the index.
+        self._chars += sum(new_chars) - sum(self.line_chars[start:end])
+        self._words += sum(new_words) - sum(self.line_words[start:end])
+        self.line_chars[start:end] = new_chars
+        self.line_words[start:end] = new_words
+
+        # Only a change to the first line can change whether the
+        # document starts with a separator.
+        if start == 0:
+            self._first_leading = lines[0][:1] in SEPARATORS
+
+
+    def adjust_line(self, line: int, chars: int, words: int) -> None:
+        """
+        Add CHARS and WORDS to the counts of LINE.
+
+        Used for an edit within a line, not at its start, whose change
+        to the word count was worked out from the text around it.
+
+        """
+        self.line_chars[line] += chars
+        self.line_words[line] += words
+        self._chars += chars
+        self._words += words
+
+
+
+
+class TextCounter:
+    """
+    Counts the statistics of a text which is read a chunk at a time.
+
+    The counts are the same as those of DocumentStats for the complete
+    text, but only the last character of the previous chunk is kept so
+    a file of any size can be counted in constant memory.
+
+    """
+
+
+    def __init__(self):
+        self.chars = 0                         # characters, newlines included
+        self.lines = 1                         # newlines plus one
+        self.words = 0                         # words as shown by the Text Area
+        self._last = ""                        # last char of the previous chunk
+
+
+    def feed(self, chunk: str) -> None:
+        """Add the counts of the next CHUNK of the text."""
+
+        # A word ending at the start of the chunk is ended by the last
+        # char of the previous one, which a word end of two chars can
+        # only overlap once.
+        self.chars += len(chunk)
+        self.lines += chunk.count("\n")
+        self.words += count_words(self._last + chunk)
+        self._last = chunk[-1:] or self._last
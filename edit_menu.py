@@ -12,15 +12,30 @@ class EditMenu(tk.Menu):
         self.notebookmenu = parent
         self.notebook = parent.notebook
         self.text_area = parent.notebook.text_area
+        self.transform = None                  # running case transform
+        self.paster = None                     # running chunked paste
 
-        super().__init__(parent, name="edit")
+        # The commands are only added when the menu is first opened so
+        # that a new window does not pay for a menu it may never use.
+        super().__init__(parent, name="edit",
+            postcommand=self._configure_menus)
 
-        self._configure_menus()
+        # Pasting from the keyboard uses the menu command so that large
+        # pastes are inserted in chunks. A cut or copy of a selection
+        # from the keyboard is also kept in the clipboard ring.
+        self.text_area.bind("<<Paste>>", lambda _: self._on_paste(), "+")
+        self.text_area.bind("<<Cut>>",
+            lambda _: self._on_cut_copy(self.cut), "+")
+        self.text_area.bind("<<Copy>>",
+            lambda _: self._on_cut_copy(self.copy), "+")
 
 
     def _configure_menus(self) -> None:
         """Internal function. Configure the Edit menu."""
 
+        # Only build the commands once.
+        self.configure(postcommand="")
+
         # Undo and Redo commands
         self.add_command(label="Undo", accelerator="Cmd+Z", command=self.undo)
         self.add_command(label="Redo", accelerator="Shift+Cmd+Z", 
@@ -32,6 +47,8 @@ class EditMenu(tk.Menu):
         self.add_command(label="Cut", accelerator="Cmd+X", command=self.cut)
         self.add_command(label="Copy", accelerator="Cmd+C", command=self.copy)
         self.add_command(label="Paste", accelerator="Cmd+V", command=self.paste)
+        self.history_menu = tk.Menu(self, postcommand=self._configure_history)
+        self.add_cascade(label="Paste from History", menu=self.history_menu)
         self.add_command(label="Delete", command=self.delete)
         self.add_separator()
 
@@ -40,6 +57,15 @@ class EditMenu(tk.Menu):
             command=self.selectall)
         self.add_separator()
 
+        # Find and replace commands
+        self.add_command(label="Find...", accelerator="Cmd+F",
+            command=self.notebook.open_find)
+        self.add_command(label="Find Next", accelerator="Cmd+G",
+            command=self.notebook.find_next)
+        self.add_command(label="Find Previous", accelerator="Shift+Cmd+G",
+            command=lambda: self.notebook.find_next(backwards=True))
+        self.add_separator()
+
         # Tranform menu items. Includes an uppercase, lowercase and
         # capitalize transformation commands.
         transform_menu = tk.Menu(self)
@@ -52,6 +78,46 @@ class EditMenu(tk.Menu):
         self.add_cascade(label="Transformation", menu=transform_menu)
 
 
+    def _configure_history(self) -> None:
+        """
+        Internal function.
+
+        Fill the Paste from History menu with the texts of the clipboard
+        ring, most recently used first.
+
+        """
+        self.history_menu.delete(0, "end")
+        for text in self.notebook.manager.clipboard_ring.entries():
+            # Label each text with the start of its first line.
+            line = text.lstrip().split("\n", 1)[0]
+            if len(line) > 40:
+                line = line[:40] + "..."
+            self.history_menu.add_command(label=f"{line} ({len(text)} chars)",
+                command=lambda text=text: self.paste(text))
+        if self.history_menu.index("end") is None:
+            self.history_menu.add_command(label="Empty", state="disabled")
+
+
+    def _on_paste(self) -> str:
+        """Internal function. Paste from the <<Paste>> event."""
+        self.paste()
+        return "break"
+
+
+    def _on_cut_copy(self, command) -> str | None:
+        """
+        Internal function.
+
+        Run COMMAND for a <<Cut>> or <<Copy>> event if there is a
+        selection, otherwise leave the event to the Text widget.
+
+        """
+        if self.text_area.tag_ranges(tk.SEL):
+            command()
+            return "break"
+        return None
+
+
     def undo(self) -> None:
         """Undo last modification to the text area."""
         try:
@@ -87,8 +153,11 @@ class EditMenu(tk.Menu):
 
         # Use the selection if available or default to current line
         if selection:
-            # Append the selection to the clipboard
-            self.clipboard_append(self.text_area.selection_get())
+            # Append the selection to the clipboard and the clipboard
+            # ring
+            text = self.text_area.read(*selection)
+            self.clipboard_append(text)
+            self.notebook.manager.clipboard_ring.add(text)
 
             # Delete the selected text from the text widget
             self.text_area.delete(selection[0], selection[1])
@@ -99,8 +168,10 @@ class EditMenu(tk.Menu):
             # Split the insertion cursor indices to get the line number
             line = indice.split('.')[0]
 
-            # Append the line to clipboard
-            self.clipboard_append(self.text_area.get(f"{line}.0", f"{line}.end"))
+            # Append the line to clipboard and the clipboard ring
+            text = self.text_area.read(f"{line}.0", f"{line}.end")
+            self.clipboard_append(text)
+            self.notebook.manager.clipboard_ring.add(text)
 
             # Delete the selected text from the text widget
             self.text_area.delete(f"{line}.0", f"{line}.end")
@@ -122,26 +193,63 @@ class EditMenu(tk.Menu):
         selection = self.text_area.tag_ranges(tk.SEL)
 
         if selection:
-            # Append the selection to the clipboard
-            self.clipboard_append(self.text_area.selection_get())
+            text = self.text_area.read(*selection)
         else:
             # Get the indices of the insertion cursor
             indice = self.text_area.index(tk.INSERT)
 
             # Split the insertion cursor indices to get the line number
             line = indice.split('.')[0]
+            text = self.text_area.read(f"{line}.0", f"{line}.end")
 
-            # Append the line to clipboard
-            self.clipboard_append(self.text_area.get(f"{line}.0", f"{line}.end"))
+        # Append the text to the clipboard and the clipboard ring
+        self.clipboard_append(text)
+        self.notebook.manager.clipboard_ring.add(text)
 
     
-    def paste(self) -> None:
-        """Paste the contents of the clipboard to the text area."""
-        
-        clipboard_text = self.clipboard_get()
-        if not self.clipboard_get() == "":
-            cursor_index = self.text_area.index(tk.INSERT)
-            self.text_area.insert(cursor_index, clipboard_text)
+    def paste(self, text: str | None = None) -> None:
+        """
+        Paste the contents of the clipboard, or TEXT from the clipboard
+        ring, to the text area.
+
+        The clipboard is only read once. A large text is inserted in
+        chunks in the background so that the window does not block.
+
+        """
+        # Only one background edit can run at a time.
+        if self.transform is not None or self.paster is not None:
+            return
+
+        if text is None:
+            # Reading an empty clipboard is an error in Tk.
+            try:
+                text = self.clipboard_get()
+            except tk.TclError:
+                return
+        else:
+            # Text pasted from the ring becomes the clipboard again.
+            self.clipboard_clear()
+            self.clipboard_append(text)
+        if text == "":
+            return
+        self.notebook.manager.clipboard_ring.add(text)
+
+        # The chunked paste is imported on first use to keep startup fast.
+        from clipboard import Paste
+
+        # As in the Tk bindings the selection is replaced, except on X11.
+        selection = ()
+        if self.notebook.manager.platform != "x11":
+            selection = self.text_area.tag_ranges(tk.SEL)
+
+        if len(text) <= Paste.chunk_size:
+            if selection:
+                self.text_area.delete(selection[0], selection[1])
+            self.text_area.insert(tk.INSERT, text)
+            self.text_area.see(tk.INSERT)
+        else:
+            self.paster = Paste(self.notebook, text)
+            self.paster.start(selection)
 
 
     def delete(self) -> None:
@@ -179,7 +287,9 @@ class EditMenu(tk.Menu):
         """
         Configure the case of the current selection to TYPE.
         
-        If nothing is selected, defaults to the current line.
+        If nothing is selected, defaults to the current line. The text
+        is transformed in chunks in the background so that a large 
+        selection does not block the window.
         
         """
         # Get the text widget indices range for the selection
@@ -196,15 +306,16 @@ class EditMenu(tk.Menu):
             # Configure the selection as the current line
             selection = (f"{line}.0", f"{line}.end")
 
-        # Get the selection text
-        text = self.text_area.get(selection[0], selection[1])
+        # The transform runs in the background, only one background edit
+        # can run at a time.
+        if self.transform is not None or self.paster is not None:
+            return
 
-        # Replace the selection with text formatted as TYPE
-        if type == "upper":
-            self.text_area.replace(selection[0], selection[1], text.upper())
-        elif type == "lower":
-            self.text_area.replace(selection[0], selection[1], text.lower())
-        elif type == "capitalize":
-            self.text_area.replace(selection[0], selection[1], text.capitalize())
-        else:
-            pass
\ No newline at end of file
+        # The transform is imported on first use to keep startup fast.
+        from case_transform import CaseTransform
+
+        start = self.text_area.offset(selection[0])
+        end = self.text_area.offset(selection[1])
+        if start < end:
+            self.transform = CaseTransform(self.notebook, start, end, type)
+            self.transform.start()
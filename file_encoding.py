@@ -0,0 +1,298 @@
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+from pathlib import Path
+from typing import BinaryIO
+
+
+
+
+# Byte order marks, the UTF-32 marks come first as the UTF-32 LE mark
+# starts with the UTF-16 LE mark.
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Names shown in the Status Bar.
+ENCODING_NAMES = {
+    "utf-8": "UTF-8",
+    "utf-16-le": "UTF-16 LE",
+    "utf-16-be": "UTF-16 BE",
+    "utf-32-le": "UTF-32 LE",
+    "utf-32-be": "UTF-32 BE",
+    "cp1252": "Windows 1252",
+    "latin-1": "Latin-1",
+}
+
+NEWLINE_NAMES = {"\n": "LF", "\r\n": "CRLF", "\r": "CR"}
+
+# The modules streaming each compression, by the name stored in a format.
+COMPRESSIONS = {"gzip": gzip, "bz2": bz2, "xz": lzma}
+
+# The compression a new file is saved with, by its suffix.
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+# The errors raised reading a file which is unreadable, corrupt or cut
+# short, or not valid in its encoding.
+READ_ERRORS = (OSError, EOFError, lzma.LZMAError, UnicodeDecodeError)
+
+
+
+
+class TextFormat:
+    """
+    The encoding, byte order mark, newline style and compression of a
+    text file.
+
+    Files are always edited with LF newlines, the newline style is only
+    used to translate them back when the file is saved. A compressed
+    file is streamed through its compression on both read and write.
+
+    """
+
+
+    def __init__(self, encoding: str = "utf-8", bom: bool = False,
+            newline: str = "\n", compression: str | None = None):
+        self.encoding = encoding
+        self.bom = bom                         # the file starts with a BOM
+        self.newline = newline                 # newline written on save
+        self.compression = compression         # a key of COMPRESSIONS or None
+
+
+    @property
+    def label(self) -> str:
+        """The format as shown in the Status Bar."""
+        name = ENCODING_NAMES.get(self.encoding, self.encoding.upper())
+        if self.bom:
+            name += " with BOM"
+        label = f"{name} ({NEWLINE_NAMES[self.newline]})"
+        if self.compression is not None:
+            label += f", {self.compression}"
+        return label
+
+
+    def for_path(self, path: Path) -> "TextFormat":
+        """
+        Return this format with the compression of a new file saved to
+        PATH, given by its suffix.
+
+        """
+        return TextFormat(self.encoding, self.bom, self.newline,
+            COMPRESSION_SUFFIXES.get(Path(path).suffix.lower()))
+
+
+    def open(self, file: int | str, mode: str) -> io.TextIOWrapper:
+        """
+        Open FILE for reading or writing text in this format. A
+        compressed file is opened by name, use wrap for a file which is
+        already open.
+
+        The byte order mark is not handled, use write_bom or strip_bom.
+
+        """
+        newline = self.newline if "w" in mode else None
+        if self.compression is not None:
+            return COMPRESSIONS[self.compression].open(file, mode + "t",
+                encoding=self.encoding, newline=newline)
+        return open(file=file, mode=mode, encoding=self.encoding,
+            newline=newline)
+
+
+    def wrap(self, f: BinaryIO, mode: str, name: str = "") -> io.TextIOWrapper:
+        """
+        Return a stream reading or writing text in this format through
+        the open binary file F. NAME is the file name stored in the
+        header of a gzip file. Finish the stream with unwrap, which
+        leaves F open.
+
+        """
+        if self.compression == "gzip":
+            f = gzip.GzipFile(filename=name, mode=mode + "b", fileobj=f)
+        elif self.compression is not None:
+            f = COMPRESSIONS[self.compression].open(f, mode + "b")
+        return io.TextIOWrapper(f, encoding=self.encoding,
+            newline=self.newline if "w" in mode else None)
+
+
+    def unwrap(self, f: io.TextIOWrapper) -> None:
+        """
+        Finish the stream F from wrap, writing the end of any compressed
+        stream, without closing the binary file under it.
+
+        """
+        f.flush()
+        stream = f.detach()
+        if self.compression is not None:
+            stream.close()
+
+
+    def write_bom(self, f: io.TextIOWrapper) -> None:
+        """Write the byte order mark to F if the format has one."""
+        if self.bom:
+            f.write("\ufeff")
+
+
+    def strip_bom(self, text: str) -> str:
+        """Return the TEXT read from the start of a file without its BOM."""
+        if self.bom and text.startswith("\ufeff"):
+            return text[1:]
+        return text
+
+
+    def to_dict(self) -> dict:
+        """Return the format as a dict which can be stored as JSON."""
+        return {"encoding": self.encoding, "bom": self.bom,
+            "newline": self.newline, "compression": self.compression}
+
+
+
+
+def detect_encoding(prefix: bytes, complete: bool) -> tuple[str, bool]:
+    """
+    Return the encoding of a file starting with PREFIX and whether it has
+    a byte order mark. COMPLETE is True if PREFIX is the whole file.
+
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, True
+
+    # UTF-16 without a mark shows up as a NUL byte beside most ASCII
+    # chars.
+    if len(prefix) >= 2 and prefix.count(0) > len(prefix) // 4:
+        even = prefix[0::2].count(0)
+        odd = prefix[1::2].count(0)
+        if odd > 2 * even:
+            return "utf-16-le", False
+        if even > 2 * odd:
+            return "utf-16-be", False
+
+    # The prefix may end part way through a UTF-8 sequence.
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, complete)
+        return "utf-8", False
+    except UnicodeDecodeError:
+        pass
+    try:
+        prefix.decode("cp1252")
+        return "cp1252", False
+    except UnicodeDecodeError:
+        return "latin-1", False
+
+
+def text_suffix(path: Path) -> str:
+    """
+    Return the suffix of PATH, or of the file inside the compression
+    if PATH has the suffix of one, as in "log.txt.gz".
+
+    """
+    path = Path(path)
+    if path.suffix.lower() in COMPRESSION_SUFFIXES:
+        path = path.with_suffix("")
+    return path.suffix
+
+
+def detect_compression(f: BinaryIO) -> str | None:
+    """
+    Return the compression of the binary file F from the magic bytes it
+    starts with, or None if it is not compressed. F is left where it
+    was.
+
+    """
+    position = f.tell()
+    prefix = f.read(10)
+    f.seek(position)
+
+    if prefix.startswith(b"\x1f\x8b\x08"):
+        return "gzip"
+    if prefix.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+
+    # Text can start with BZh as well, so the block size and the magic
+    # of the first block, or of the end of an empty stream, are checked.
+    if (prefix[:3] == b"BZh" and prefix[3:4].isdigit() and prefix[3:4] != b"0"
+            and prefix[4:] in (b"1AY&SY", b"\x17rE8P\x90")):
+        return "bz2"
+    return None
+
+
+def decompress(f: BinaryIO, compression: str | None) -> BinaryIO:
+    """
+    Return a binary file streaming the bytes of F decompressed with
+    COMPRESSION, or F itself if COMPRESSION is None.
+
+    """
+    if compression is None:
+        return f
+    return COMPRESSIONS[compression].open(f, "rb")
+
+
+def detect_newline(text: str) -> str:
+    """Return the first newline style used in TEXT, LF if there is none."""
+    cr = text.find("\r")
+    lf = text.find("\n")
+    if cr == -1 and lf == -1:
+        return "\n"
+    if cr == -1 or (lf != -1 and lf < cr):
+        return "\n"
+    return "\r\n" if text[cr + 1:cr + 2] == "\n" else "\r"
+
+
+
+
+class TextReader:
+    """
+    Decodes a binary file a chunk at a time.
+
+    The format of the file is detected from a bounded prefix when the
+    reader is created. The text is then decoded incrementally, with the
+    newlines translated to LF, so the whole file never has to be held
+    in memory. A compressed file is decompressed as it is read, so the
+    compressed and decompressed file are never held either.
+
+    """
+
+    prefix_size = 1 << 16                      # bytes read to detect the format
+
+
+    def __init__(self, f: BinaryIO):
+        compression = detect_compression(f)
+        f = decompress(f, compression)
+        self._file = f
+        prefix = f.read(self.prefix_size)
+        complete = len(prefix) < self.prefix_size
+        encoding, bom = detect_encoding(prefix, complete)
+        if bom:
+            prefix = prefix[len(codecs.lookup(encoding).encode("\ufeff")[0]):]
+
+        newline = detect_newline(prefix.decode(encoding, errors="replace"))
+        self.text_format = TextFormat(encoding, bom, newline, compression)
+
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(), translate=True)
+        self._pending = prefix
+
+
+    def read(self, size: int) -> str:
+        """
+        Return the next text decoded from up to SIZE bytes of the file,
+        an empty string at the end of the file.
+
+        Raises UnicodeDecodeError if the file is not valid in its
+        detected encoding.
+
+        """
+        while True:
+            if self._pending:
+                data, self._pending = self._pending, b""
+            else:
+                data = self._file.read(size)
+            text = self._decoder.decode(data, final=not data)
+            if text or not data:
+                return text
@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import messagebox
+from typing import Callable
+
+import instrumentation
+from document_stats import longest_line
+from file_encoding import READ_ERRORS, TextFormat, TextReader
+
+
+
+
+class FileLoader:
+    """
+    Streams a file into the Text Area of a notebook.
+
+    The file is read in chunks on a worker thread, which detects its
+    encoding and newline style and decodes it incrementally, and handed
+    to the main loop through a bounded queue. The main loop inserts the
+    chunks one at a time from after callbacks, checking the time between
+    inserts so a batch spends at most BATCH_TIME milliseconds plus one
+    chunk, and the window stays responsive while a large file loads.
+    Progress is shown in the Status Bar. Escape cancels the load, keeping
+    the text loaded so far, and closing the window cancels it too.
+
+    """
+
+    chunk_size = 1 << 16                       # bytes read per chunk
+    queue_size = 32                            # chunks buffered in memory
+    batch_time = 8                             # ms spent inserting per batch
+
+
+    def __init__(self, notebook: tk.Toplevel, filepath: Path,
+            on_complete: Callable[[], None] | None = None):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.status_bar = notebook.status_bar
+        self.filepath = filepath
+        self.on_complete = on_complete
+        self.size = 0                          # size of the file in bytes
+        self.position = 0                      # bytes read by the worker
+        self.text_format = TextFormat()        # detected by the worker
+        self.longest_line = 0                  # longest line read so far
+
+        self._chunks = queue.Queue(self.queue_size)
+        self._cancelled = threading.Event()
+        self._worker = threading.Thread(target=self._read, daemon=True)
+        self._job = None
+
+
+    def start(self) -> None:
+        """Start loading the file into the Text Area."""
+
+        self.size = os.path.getsize(self.filepath)
+        self.notebook.loader = self
+        self._started = time.perf_counter()
+
+        # The load must not be recorded by undo or the journal and the
+        # user cannot edit the text until it has finished.
+        self.notebook.journal.suspend()
+        self.text_area.configure(undo=False, state="disabled")
+        self._binding = self.notebook.bind("<Escape>",
+            lambda _ : self.cancel())
+
+        self._worker.start()
+        self._job = self.notebook.after(1, self._poll)
+
+
+    def cancel(self) -> None:
+        """Stop loading the file, keeping what has been inserted."""
+        if not self._cancelled.is_set():
+            self._cancelled.set()
+            self._finish()
+
+
+    def _read(self) -> None:
+        """Internal function. Read the file into the queue of chunks."""
+        try:
+            with open(file=self.filepath, mode="rb") as f:
+                reader = TextReader(f)
+                self.text_format = reader.text_format
+                carry = 0
+                while not self._cancelled.is_set():
+                    chunk = reader.read(self.chunk_size)
+                    self.position = f.tell()
+                    if not chunk:
+                        break
+
+                    # The line lengths are scanned before the chunk is
+                    # queued so long line mode is on before it is
+                    # inserted.
+                    longest, carry = longest_line(chunk, carry)
+                    self.longest_line = max(self.longest_line, longest)
+                    self._put(chunk)
+            self._put(None)
+        except READ_ERRORS as error:
+            self._put(error)
+
+
+    def _put(self, item) -> None:
+        """
+        Internal function.
+
+        Put ITEM in the queue, waiting while it is full unless the load
+        is cancelled.
+
+        """
+        while not self._cancelled.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+    def _poll(self) -> None:
+        """Internal function. Insert the next batch of chunks."""
+
+        self._job = None
+        if self._cancelled.is_set():
+            return
+
+        if self.longest_line > self.text_area.long_line_length:
+            self.text_area.set_long_lines(True)
+
+        # Insert chunks until the batch time runs out or the worker has
+        # nothing more ready. The time is checked between inserts, a
+        # single insert of the whole queue could take several frames.
+        deadline = time.perf_counter() + self.batch_time / 1000
+        inserted = False
+        done = False
+        error = None
+        self.text_area.configure(state="normal")
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    item = self._chunks.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                elif isinstance(item, Exception):
+                    error = item
+                    break
+                self.text_area.insert("end", item)
+                inserted = True
+        finally:
+            self.text_area.configure(state="disabled")
+
+        if error is not None:
+            self.cancel()
+            messagebox.showerror(message="The file could not be opened.",
+                detail=str(error), icon="error", parent=self.notebook)
+            self.notebook.manager.close_notebook(self.notebook.name)
+        elif done:
+            self.notebook.menu.file_menu._update_text_format(self.text_format)
+            self._finish()
+            if instrumentation.enabled:
+                self.notebook.metrics.record("file.open",
+                    time.perf_counter() - self._started)
+            if self.on_complete:
+                self.on_complete()
+        else:
+            percent = 100 * self.position // self.size if self.size else 100
+            self.status_bar.update_progress(
+                f"Loading {percent}% (Esc to cancel)")
+            self._job = self.notebook.after(1 if inserted else 10, self._poll)
+
+
+    def _finish(self) -> None:
+        """Internal function. Return the Text Area to normal editing."""
+
+        if self._job is not None:
+            self.notebook.after_cancel(self._job)
+            self._job = None
+
+        self.notebook.loader = None
+        self.notebook.unbind("<Escape>", self._binding)
+        self.status_bar.update_progress("")
+
+        self.text_area.configure(undo=True, state="normal")
+        self.text_area.edit_reset()
+        self.text_area.edit_modified(False)
+
+        # The journal starts from the file, or from what was loaded of
+        # it if the load was cancelled.
+        if self._cancelled.is_set():
+            self.notebook.journal.rebase()
+        else:
+            self.notebook.journal.rebase(self.filepath, self.text_format)
+            self.notebook.manager.file_watcher.update(self.filepath)
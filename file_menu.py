@@ -1,7 +1,9 @@
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, messagebox
 from pathlib import Path
 
+from file_encoding import COMPRESSION_SUFFIXES, TextFormat, text_suffix
+
 
 
 
@@ -15,16 +17,37 @@ class FileMenu(tk.Menu):
         self.manager = parent.notebook.manager
         self.filepath: Path | None = None
         self.filetype = tk.StringVar(value="Text File")
+        self.text_format = TextFormat()        # encoding and newlines on save
+        self.encoding = tk.StringVar(value=self.text_format.label)
+        self._saver = None                     # background saves, on first save
 
-        super().__init__(parent)             
-
-        # configure the menubar
-        self._configure_menu()
+        # The commands are only added when the menu is first opened so
+        # that a new window does not pay for a menu it may never use.
+        super().__init__(parent, postcommand=self._configure_menu)
     
 
+    @property
+    def saver(self):
+        """The background saves of the window, built on first use."""
+
+        if self._saver is None:
+            from file_saver import FileSaver
+            self._saver = FileSaver(self.notebook)
+        return self._saver
+
+
+    @property
+    def saving(self) -> bool:
+        """True while a save of the window is running."""
+        return self._saver is not None and self._saver.running
+
+
     def _configure_menu(self) -> None:
         """Internal function. Configure menu commands."""
 
+        # Only build the commands once.
+        self.configure(postcommand="")
+
         # This command creates a new blank window.
         self.add_command(label="New Book", accelerator="Command+N", 
             command=self.manager.open_notebook)
@@ -34,6 +57,9 @@ class FileMenu(tk.Menu):
         self.add_command(label="Open...", accelerator="Command+O", 
             command=self.file_open)
 
+        # Reload the open file from disk, keeping the window.
+        self.add_command(label="Reload", command=self.file_reload)
+
         self.add_separator()
 
         # Save commands.
@@ -58,12 +84,21 @@ class FileMenu(tk.Menu):
         self.add_command(label="Close All",
             command=lambda: self.manager.close_all_notebook)
 
+        # On macOS Quit is already in the application menu.
+        if self.manager.platform != "aqua":
+            self.add_separator()
+            self.add_command(label="Quit", accelerator="Command+Q",
+                command=self.manager.quit_application)
+
 
     def file_open(self) -> None:
         """Create a new window with the content of the selected file."""
         
         new_filepath = filedialog.askopenfilename(defaultextension=".txt",
-            filetypes=(("txt files","*.txt"),("All files","*.*")),
+            filetypes=(("txt files","*.txt"),
+                ("Compressed files", " ".join(f"*{suffix}"
+                    for suffix in COMPRESSION_SUFFIXES)),
+                ("All files","*.*")),
             parent=self.notebook)
 
         # Check a file was selected from the dialog
@@ -74,21 +109,50 @@ class FileMenu(tk.Menu):
 
             # Create a new window with the name filename
             new_notebook = self.manager.open_notebook(new_filepath.name)
+            new_file_menu = new_notebook.menu.file_menu
 
-            # Insert the file contents to the text widget.
-            with open(file=new_filepath, mode="r") as f:
-                new_notebook.text_area.insert("1.0", f.read())
-
-            # Set the modified status of the text area to False
-            new_notebook.text_area.edit_modified(False)
+            # Set the new filetype
+            new_file_menu._update_filetype(text_suffix(new_filepath))
 
-            # Save the new filepath
-            new_notebook.menu.file_menu.filepath = new_filepath
+            # The loader is imported on first use to keep startup fast.
+            from file_loader import FileLoader
 
-            # Set the new filetype
-            new_notebook.menu.file_menu._update_filetype(new_filepath.suffix)
+            # Stream the file contents into the text widget. The filepath
+            # is only saved once the whole file has loaded so a partly
+            # loaded window can never overwrite the file.
+            FileLoader(new_notebook, new_filepath,
+                on_complete=lambda: setattr(new_file_menu, "filepath",
+                    new_filepath)).start()
 
     
+    def file_reload(self) -> None:
+        """
+        Reload the open file from disk in place.
+
+        Only the lines which differ from the file are replaced, as a
+        single undo step. The user is asked first if the text has
+        unsaved changes.
+
+        """
+        if self.filepath is None or self.notebook.loader is not None \
+                or self.notebook.reloader is not None:
+            return
+
+        if self.notebook.text_area.edit_modified():
+            confirm_reload = messagebox.askyesno(
+                message="Window contains unsaved changes, reload anyway?",
+                detail="The changes can be undone after reloading.",
+                icon="warning",
+                default="no",
+                parent=self.notebook)
+            if not confirm_reload:
+                return
+
+        # The reload is imported on first use to keep startup fast.
+        from file_reload import Reload
+        Reload(self.notebook, self.filepath).start()
+
+
     def file_save(self) -> None:
         """Save the open file if it has a path. Otherwise invoke save
         as."""
@@ -96,8 +160,7 @@ class FileMenu(tk.Menu):
         if not self.filepath:
             self.file_save_as()
         else:
-            with open(file=self.filepath, mode="w") as f:
-                f.write(self.notebook.text_area.get("1.0", "end"))
+            self.saver.save(self.filepath)
 
     
     def file_save_as(self) -> None:
@@ -120,9 +183,11 @@ class FileMenu(tk.Menu):
             # Create a new window with the name filename
             new_notebook = self.manager.open_notebook(new_filepath.name)
 
-            # Write the file contents to the new file
-            with open(file=new_filepath, mode="w") as f:
-                f.write(self.notebook.text_area.get("1.0", "end"))
+            # Write the file contents to the new file, compressed if its
+            # suffix is that of a compression.
+            text_format = self.text_format.for_path(new_filepath)
+            self.saver.save(new_filepath, text_format)
+            new_notebook.menu.file_menu._update_text_format(text_format)
 
             # Insert the file contents to the new window
             new_notebook.text_area.insert("1.0", 
@@ -132,7 +197,8 @@ class FileMenu(tk.Menu):
             new_notebook.menu.file_menu.filepath = new_filepath
 
             # Set the new filetype
-            new_notebook.menu.file_menu._update_filetype(new_filepath.suffix)
+            new_notebook.menu.file_menu._update_filetype(
+                text_suffix(new_filepath))
 
     
     def file_rename(self) -> None:
@@ -161,12 +227,18 @@ class FileMenu(tk.Menu):
                 self.filepath = self.filepath.replace(new_filepath)
 
                 # Set the new filetype
-                self._update_filetype(new_filepath.suffix)
+                self._update_filetype(text_suffix(self.filepath))
 
                 # Update the window title
                 self.notebook.title(self.filepath.name)
 
 
+    def _update_text_format(self, text_format: TextFormat) -> None:
+        """Internal function. Update the encoding to TEXT_FORMAT."""
+        self.text_format = text_format
+        self.encoding.set(text_format.label)
+
+
     def _update_filetype(self, file_ext: Path) -> None:
         """Internal function. Update filetype based on FILE_EXT."""
         if file_ext == ".txt":
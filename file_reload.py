@@ -0,0 +1,234 @@
+import difflib
+import queue
+import threading
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import messagebox
+
+import instrumentation
+from document import Document
+from file_encoding import READ_ERRORS, TextReader
+
+
+
+
+# Changed regions with more lines than this on either side are replaced
+# whole rather than diffed line by line.
+DIFF_LIMIT = 20000
+
+# Bytes read from the file per chunk.
+CHUNK_SIZE = 1 << 20
+
+
+
+
+def split_lines(text: str) -> list:
+    """Return the lines of TEXT, each with its newline."""
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def diff_lines(old: list, new: list) -> list:
+    """
+    Return the edits which turn the lines OLD into the lines NEW.
+
+    Each edit is a (start, end, text) tuple replacing the chars from
+    START up to END of the old text with TEXT. The edits are ordered
+    from the last to the first so each can be applied without shifting
+    the others.
+
+    """
+    # The lines the texts start and end with are skipped first, which is
+    # most of the text when a file has only gained or lost a few lines.
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+    old_middle = old[start:len(old) - end]
+    new_middle = new[start:len(new) - end]
+    offset = sum(map(len, old[:start]))
+
+    if not old_middle and not new_middle:
+        return []
+    if len(old_middle) > DIFF_LIMIT or len(new_middle) > DIFF_LIMIT:
+        opcodes = [("replace", 0, len(old_middle), 0, len(new_middle))]
+    else:
+        opcodes = difflib.SequenceMatcher(None, old_middle, new_middle,
+            autojunk=False).get_opcodes()
+
+    edits = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        length = sum(map(len, old_middle[i1:i2]))
+        if tag != "equal":
+            edits.append((offset, offset + length,
+                "".join(new_middle[j1:j2])))
+        offset += length
+    edits.reverse()
+    return edits
+
+
+
+
+class Reload:
+    """
+    Reloads the file of a notebook in place.
+
+    A worker thread reads and decodes the file and diffs its lines
+    against a snapshot of the text. Only the changed lines are then
+    replaced in the Text Area, as a single undo step, so the cursor,
+    selection and marks outside the changes stay where they are and the
+    view is kept on the same line. If the text is edited while the file
+    is being read the diff is started again.
+
+    """
+
+
+    def __init__(self, notebook: tk.Toplevel, filepath: Path):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.filepath = filepath
+        self.done = False
+
+        self._results = queue.Queue()
+        self._cancelled = threading.Event()
+        self._job = None
+
+
+    def start(self) -> None:
+        """Start reloading the file."""
+
+        self.notebook.reloader = self
+        self._started = time.perf_counter()
+        self.notebook.status_bar.update_progress("Reloading...")
+        self._diff()
+
+
+    def _diff(self) -> None:
+        """Internal function. Diff the file against the current text."""
+        self._revision = self.text_area.revision
+        threading.Thread(target=self._read, daemon=True,
+            args=(self.text_area.document.snapshot(),)).start()
+        self._job = self.notebook.after(10, self._poll)
+
+
+    def cancel(self) -> None:
+        """Stop the reload, leaving the text unchanged."""
+        if not self.done:
+            self._cancelled.set()
+            self._finish()
+
+
+    def _read(self, document: Document) -> None:
+        """
+        Internal function.
+
+        Read the file and pass the edits from DOCUMENT to it, or the
+        error, back to the main loop.
+
+        """
+        try:
+            with open(file=self.filepath, mode="rb") as f:
+                reader = TextReader(f)
+                chunks = []
+                while not self._cancelled.is_set():
+                    chunk = reader.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            if self._cancelled.is_set():
+                return
+            edits = diff_lines(split_lines(document.get()),
+                split_lines("".join(chunks)))
+            self._results.put((edits, reader.text_format, None))
+        except READ_ERRORS as error:
+            self._results.put((None, None, error))
+
+
+    def _poll(self) -> None:
+        """Internal function. Apply the edits once they are ready."""
+
+        self._job = None
+        try:
+            edits, text_format, error = self._results.get_nowait()
+        except queue.Empty:
+            self._job = self.notebook.after(10, self._poll)
+            return
+
+        if error is not None:
+            self._finish()
+            messagebox.showerror(message="The file could not be reloaded.",
+                detail=str(error), icon="error", parent=self.notebook)
+            return
+
+        # A case transform or paste holds the text until it finishes.
+        if str(self.text_area.cget("state")) != "normal":
+            self._results.put((edits, text_format, error))
+            self._job = self.notebook.after(100, self._poll)
+            return
+
+        # The edits only fit the text they were made from.
+        if self.text_area.revision != self._revision:
+            self._diff()
+            return
+
+        self._apply(edits)
+        file_menu = self.notebook.menu.file_menu
+        file_menu._update_text_format(text_format)
+        self.text_area.edit_modified(False)
+        self.notebook.journal.rebase(self.filepath, text_format)
+        self.notebook.manager.file_watcher.update(self.filepath)
+        self._finish()
+        if instrumentation.enabled:
+            self.notebook.metrics.record("file.reload",
+                time.perf_counter() - self._started)
+
+
+    def _apply(self, edits: list) -> None:
+        """Internal function. Apply EDITS as one undo step."""
+
+        if not edits:
+            return
+        text_area = self.text_area
+
+        # The line at the top of the view is followed with a mark, which
+        # stays before any text inserted at it.
+        text_area.mark_set("reload.top", "@0,0 linestart")
+        text_area.mark_gravity("reload.top", "left")
+
+        autoseparators = text_area.cget("autoseparators")
+        text_area.edit_separator()
+        text_area.configure(autoseparators=False)
+        try:
+            for start, end, text in edits:
+                index = text_area.index_of(start)
+                if start == end:
+                    text_area.insert(index, text)
+                elif text:
+                    text_area.replace(index, text_area.index_of(end), text)
+                else:
+                    text_area.delete(index, text_area.index_of(end))
+        finally:
+            text_area.configure(autoseparators=autoseparators)
+            text_area.edit_separator()
+
+        text_area.yview("reload.top")
+        text_area.mark_unset("reload.top")
+
+
+    def _finish(self) -> None:
+        """Internal function. Stop polling and clear the progress."""
+
+        self.done = True
+        if self._job is not None:
+            self.notebook.after_cancel(self._job)
+            self._job = None
+        self.notebook.reloader = None
+        self.notebook.status_bar.update_progress("")
@@ -0,0 +1,201 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import messagebox
+
+import instrumentation
+from document import Document
+from file_encoding import TextFormat
+
+
+
+
+# The permissions open gives a new file. The umask can only be read by
+# setting it, which is done once here rather than from the writer.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+
+
+class FileSaver:
+    """
+    Saves the contents of a notebook from a writer thread.
+
+    The writer is given a snapshot of the document model of the Text
+    Area, which is taken in constant time, and writes it out chunk by
+    chunk. The text is written to a temporary file next to the target,
+    synced to disk and renamed into place so the target is never left
+    partly written.
+
+    Only one save runs at a time. A save requested while another is
+    running replaces any other waiting request and starts with a fresh
+    snapshot once the running save has finished.
+
+    """
+
+
+    def __init__(self, notebook: tk.Toplevel):
+        self.notebook = notebook
+        self.manager = notebook.manager
+        self.running = False                   # a save is in progress
+        self.pending: tuple | None = None      # path and format of next save
+
+        self._results = queue.Queue()
+        self._writer = None                    # thread of the running save
+        self._job = None                       # pending after id
+
+
+    def save(self, filepath: Path,
+            text_format: TextFormat | None = None) -> None:
+        """
+        Save the contents of the Text Area to FILEPATH in TEXT_FORMAT,
+        by default the format of the window.
+
+        """
+        if self.running:
+            self.pending = (filepath, text_format)
+            return
+
+        # A window spilled to disk only holds the text put back so far,
+        # so the whole text is put back before it is saved.
+        if self.notebook.spill is not None:
+            self.notebook.spill.finish()
+
+        self.running = True
+        self._started = time.perf_counter()
+        text_area = self.notebook.text_area
+        revision = text_area.revision
+        if text_format is None:
+            text_format = self.notebook.menu.file_menu.text_format
+        self._writer = threading.Thread(target=self._write,
+            args=(filepath, text_area.document.snapshot(), revision,
+                text_format))
+        self._writer.start()
+
+        self.notebook.status_bar.update_progress("Saving...")
+        if self._job is None:
+            self._job = self.manager.after(10, self._poll)
+
+
+    def finish(self) -> None:
+        """
+        Wait for the running save and any save waiting behind it.
+
+        Used before the window is closed, a waiting save needs the Text
+        Area for its snapshot so it cannot be left until later.
+
+        """
+        while self.running:
+            self._writer.join()
+            self._report(*self._results.get())
+
+
+    def _write(self, filepath: Path, document: Document, revision: int,
+            text_format: TextFormat) -> None:
+        """
+        Internal function.
+
+        Write DOCUMENT to a temporary file in TEXT_FORMAT and rename it
+        to FILEPATH. The result is passed back to the main loop through
+        the results queue.
+
+        """
+        filepath = Path(filepath)
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=filepath.parent,
+                prefix=f".{filepath.name}.", suffix=".tmp")
+            with open(file=fd, mode="wb") as raw:
+                # A gzip header names the file saved, not the temporary
+                # file.
+                f = text_format.wrap(raw, "w", filepath.name)
+                text_format.write_bom(f)
+                for chunk in document.chunks():
+                    f.write(chunk)
+
+                # Also write the final newline kept by the Text widget.
+                f.write("\n")
+
+                # A compressed stream is only complete once it is ended.
+                text_format.unwrap(f)
+                raw.flush()
+                os.fsync(raw.fileno())
+
+            # Keep the permissions of the file being replaced, a new file
+            # gets those open would give it rather than the private ones
+            # of a temporary file.
+            if filepath.exists():
+                shutil.copymode(filepath, temp_path)
+            else:
+                os.chmod(temp_path, NEW_FILE_MODE)
+            os.replace(temp_path, filepath)
+            self._results.put((filepath, revision, text_format, None))
+        except Exception as error:
+            # Any failure is passed back, the main loop waits for a
+            # result and would otherwise wait forever.
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
+            self._results.put((filepath, revision, text_format, error))
+
+
+    def _poll(self) -> None:
+        """Internal function. Check for the result of the running save."""
+
+        self._job = None
+        if not self.running:
+            return
+
+        try:
+            result = self._results.get_nowait()
+        except queue.Empty:
+            self._job = self.manager.after(10, self._poll)
+            return
+
+        self._report(*result)
+        if self.running and self._job is None:
+            self._job = self.manager.after(10, self._poll)
+
+
+    def _report(self, filepath: Path, revision: int, text_format: TextFormat,
+            error: Exception | None) -> None:
+        """
+        Internal function.
+
+        Report the result of a finished save to the window and start the
+        save waiting behind it.
+
+        """
+        self.running = False
+        if instrumentation.enabled:
+            self.notebook.metrics.record("file.save",
+                time.perf_counter() - self._started)
+
+        # The window may have been closed while the save was running.
+        if self.notebook.winfo_exists():
+            self.notebook.status_bar.update_progress("")
+            if error is not None:
+                messagebox.showerror(message="The file could not be saved.",
+                    detail=str(error), icon="error", parent=self.notebook)
+            else:
+                # The window's own save is not reported back to it as a
+                # change on disk.
+                self.manager.file_watcher.update(filepath)
+
+                # The file now holds the text, plus the final newline, so
+                # the journal can start again from it.
+                if self.notebook.text_area.revision == revision:
+                    self.notebook.text_area.edit_modified(False)
+                    self.notebook.journal.rebase(filepath, text_format,
+                        trim=True)
+
+        if self.pending is not None:
+            (filepath, text_format), self.pending = self.pending, None
+            if self.notebook.winfo_exists():
+                self.save(filepath, text_format)
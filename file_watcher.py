@@ -0,0 +1,143 @@
+import os
+import time
+import tkinter as tk
+from pathlib import Path
+
+
+
+
+class FileWatcher:
+    """
+    Notices when the files open in any notebook change on disk.
+
+    A single timer on the Manager polls every open file in one pass,
+    however many windows are open, and a file open in several windows is
+    only checked once. Each file is polled on its own interval: a file
+    which has just changed is polled every MIN_INTERVAL seconds and the
+    interval doubles each time it is found unchanged, up to
+    MAX_INTERVAL, so idle files cost very little. The timer sleeps until
+    the next file is due.
+
+    A change is reported by generating the <<FileChanged>> virtual event
+    on each notebook with the file open. Files which are being loaded or
+    saved are skipped, the loader and saver record the state they leave
+    the file in with update.
+
+    """
+
+    min_interval = 0.5                         # s between polls of a busy file
+    max_interval = 8.0                         # s between polls of an idle file
+
+
+    def __init__(self, manager: tk.Tk):
+        self.manager = manager
+
+        # The state of each open file as [stat key, interval, next poll].
+        self._files = {}
+        self._job = None                       # pending poll after id
+        self._wake = 0.0                       # time of the pending poll
+        self.running = False                   # polling has been started
+
+
+    def start(self) -> None:
+        """Start polling the open files."""
+        self.running = True
+        self._schedule(self.min_interval)
+
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self.running = False
+        if self._job is not None:
+            self.manager.after_cancel(self._job)
+            self._job = None
+
+
+    def _schedule(self, delay: float) -> None:
+        """Internal function. Poll again in DELAY seconds."""
+        if self._job is not None:
+            self.manager.after_cancel(self._job)
+        self._wake = time.monotonic() + delay
+        self._job = self.manager.after(int(delay * 1000), self._poll)
+
+
+    def update(self, filepath: Path) -> None:
+        """
+        Record the current state of FILEPATH without reporting a change.
+        Used after the application itself has read or written the file.
+
+        """
+        due = time.monotonic() + self.min_interval
+        self._files[Path(filepath)] = [self._stat(filepath),
+            self.min_interval, due]
+
+        # A sleeping timer is woken for the new file.
+        if self.running and self._wake > due:
+            self._schedule(self.min_interval)
+
+
+    def _stat(self, filepath: Path) -> tuple | None:
+        """
+        Internal function.
+
+        Return the values of FILEPATH which change when it is written,
+        or None if it does not exist.
+
+        """
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+    def _poll(self) -> None:
+        """Internal function. Poll the files which are due."""
+
+        self._job = None
+        now = time.monotonic()
+
+        # Group the windows by the file they have open.
+        windows = {}
+        for notebook in self.manager.notebooks.values():
+            file_menu = notebook.menu.file_menu
+            if (file_menu.filepath is None or notebook.loader is not None
+                    or file_menu.saving):
+                continue
+            windows.setdefault(Path(file_menu.filepath), []).append(notebook)
+
+        # Files no longer open in any window are forgotten.
+        for filepath in list(self._files):
+            if filepath not in windows:
+                del self._files[filepath]
+
+        changed = []
+        for filepath, notebooks in windows.items():
+            state = self._files.get(filepath)
+            if state is None:
+                # A newly opened file is polled from its current state.
+                self.update(filepath)
+                continue
+            if now < state[2]:
+                continue
+
+            key = self._stat(filepath)
+            if key != state[0]:
+                state[0] = key
+                state[1] = self.min_interval
+                changed.extend(notebooks)
+            else:
+                state[1] = min(state[1] * 2, self.max_interval)
+            state[2] = now + state[1]
+
+        # The timer sleeps until the next file is due.
+        due = min((state[2] for state in self._files.values()),
+            default=now + self.max_interval)
+        self._schedule(min(max(due - now, self.min_interval),
+            self.max_interval))
+
+        # The windows are told after the pass so a window reacting to
+        # the event cannot change the files being polled.
+        for notebook in changed:
+            if notebook.winfo_exists():
+                notebook.event_generate("<<FileChanged>>")
@@ -0,0 +1,137 @@
+import re
+import tkinter as tk
+from tkinter import ttk
+
+
+
+
+class FindDialog(tk.Toplevel):
+    """The Find and Replace window of a notebook."""
+
+
+    def __init__(self, parent: tk.Toplevel):
+        self.notebook = parent
+        self.finder = parent.finder
+        self.pattern = tk.StringVar(value="")
+        self.replacement = tk.StringVar(value="")
+        self.regex = tk.BooleanVar(value=False)
+        self.match_case = tk.BooleanVar(value=False)
+        self.status = tk.StringVar(value="")
+
+        super().__init__(parent)
+        self.title(f"Find - {parent.title()}")
+        self.transient(parent)
+        self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.columnconfigure(1, weight=1)
+
+        self._configure_widgets()
+        self.finder.on_update = self._update_status
+        self.finder.on_replaced = self._on_replaced
+
+
+    def _configure_widgets(self) -> None:
+        """Internal function. Configure the widgets for the dialog."""
+
+        ttk.Label(self, text="Find:").grid(row=0, column=0, sticky="e",
+            padx=4, pady=4)
+        self.find_entry = ttk.Entry(self, textvariable=self.pattern, width=40)
+        self.find_entry.grid(row=0, column=1, columnspan=3, sticky="ew",
+            padx=4, pady=4)
+        self.find_entry.bind("<Return>", lambda _ : self.find())
+
+        ttk.Label(self, text="Replace:").grid(row=1, column=0, sticky="e",
+            padx=4, pady=4)
+        replace_entry = ttk.Entry(self, textvariable=self.replacement)
+        replace_entry.grid(row=1, column=1, columnspan=3, sticky="ew",
+            padx=4, pady=4)
+
+        ttk.Checkbutton(self, text="Regular expression", variable=self.regex,
+            command=self.find).grid(row=2, column=1, sticky="w", padx=4)
+        ttk.Checkbutton(self, text="Match case", variable=self.match_case,
+            command=self.find).grid(row=2, column=2, sticky="w", padx=4)
+
+        buttons = ttk.Frame(self)
+        buttons.grid(row=3, column=0, columnspan=4, sticky="ew", pady=4)
+        ttk.Button(buttons, text="Previous",
+            command=lambda: self.finder.find_next(backwards=True)
+            ).grid(row=0, column=0, padx=4)
+        ttk.Button(buttons, text="Next", command=self.find_next
+            ).grid(row=0, column=1, padx=4)
+        ttk.Button(buttons, text="Replace", command=self.replace
+            ).grid(row=0, column=2, padx=4)
+        ttk.Button(buttons, text="Replace All", command=self.replace_all
+            ).grid(row=0, column=3, padx=4)
+
+        ttk.Label(self, textvariable=self.status).grid(row=4, column=0,
+            columnspan=4, sticky="w", padx=4, pady=4)
+
+        self.find_entry.focus()
+
+
+    def find(self) -> None:
+        """Start a new search for the pattern."""
+
+        if self.pattern.get() == "":
+            self.finder.clear()
+            self.status.set("")
+            return
+
+        try:
+            self.finder.find(self.pattern.get(), self.regex.get(),
+                self.match_case.get())
+        except re.error as error:
+            self.finder.clear()
+            self.status.set(f"Invalid expression: {error}")
+
+
+    def find_next(self) -> None:
+        """Select the next match, starting a search if there is none."""
+        if self.finder.pattern is None:
+            self.find()
+        elif not self.finder.find_next():
+            self.status.set("Not found")
+
+
+    def replace(self) -> None:
+        """Replace the selected match and select the next."""
+        if self.finder.pattern is None:
+            self.find()
+        else:
+            self.finder.replace(self.replacement.get())
+
+
+    def replace_all(self) -> None:
+        """Replace every match."""
+        if self.finder.pattern is None:
+            self.find()
+        if self.finder.pattern is not None:
+            self.finder.replace_all(self.replacement.get())
+            self.status.set("Replacing...")
+
+
+    def close(self) -> None:
+        """Close the dialog and remove the highlighting."""
+        self.finder.on_update = None
+        self.finder.on_replaced = None
+        self.finder.clear()
+        self.notebook.find_dialog = None
+        self.destroy()
+
+
+    def _update_status(self) -> None:
+        """Internal function. Show the number of matches found."""
+        if self.finder.replacing:
+            return
+        if self.finder.searching:
+            self.status.set(f"Searching... {self.finder.count} matches")
+        else:
+            self.status.set(f"{self.finder.count} matches")
+
+
+    def _on_replaced(self, count: int, error: re.error | None) -> None:
+        """Internal function. Show the result of a replace all."""
+        if error is not None:
+            self.status.set(f"Invalid replacement: {error}")
+        else:
+            self.status.set(f"Replaced {count} matches")
@@ -0,0 +1,96 @@
+import functools
+import os
+import time
+from collections import deque
+
+
+# Recording is off unless turned on from the Latency Monitor or by
+# setting NOTEBOOK_INSTRUMENT=1. While it is off an instrumented call
+# costs a single check of this flag.
+enabled = os.environ.get("NOTEBOOK_INSTRUMENT") == "1"
+
+
+
+
+def enable(value: bool = True) -> None:
+    """Turn the recording of latencies on or off."""
+    global enabled
+    enabled = value
+
+
+def timed(key: str):
+    """
+    Record the latency of the decorated method under KEY.
+
+    The instance must have a metrics attribute. KEY is formatted with
+    the positional arguments of the call, so "updates.{0}" records each
+    value of the first argument separately.
+
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not enabled:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.metrics.record(key.format(*args),
+                    time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def percentile(samples: list, percent: float) -> float:
+    """Return the PERCENT percentile of the sorted SAMPLES."""
+    index = min(len(samples) - 1, int(len(samples) * percent / 100))
+    return samples[index]
+
+
+
+
+class Metrics:
+    """
+    Rolling latency samples for a notebook.
+
+    The last WINDOW samples of each key are kept, so the percentiles
+    follow the recent behaviour of the window rather than its whole
+    history.
+
+    """
+
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self.samples = {}                      # deque of seconds by key
+
+
+    def record(self, key: str, seconds: float) -> None:
+        """Record a latency of SECONDS for KEY."""
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+
+    def reset(self) -> None:
+        """Forget all recorded samples."""
+        self.samples.clear()
+
+
+    def summary(self) -> dict:
+        """Return the count and percentiles in ms of every key."""
+        summary = {}
+        for key, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            summary[key] = {
+                "count": len(ordered),
+                "p50": percentile(ordered, 50) * 1000,
+                "p95": percentile(ordered, 95) * 1000,
+                "p99": percentile(ordered, 99) * 1000,
+                "max": ordered[-1] * 1000,
+            }
+        return summary
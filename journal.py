@@ -0,0 +1,484 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+
+from document import Document
+from file_encoding import READ_ERRORS, TextFormat
+
+
+
+
+# A record is a header with the offset of an edit, the number of chars
+# it removed and the length in bytes of the UTF-8 text it inserted, then
+# the CRC-32 of the header and text, then the text itself.
+_HEADER = struct.Struct("<QII")
+_CRC = struct.Struct("<I")
+
+
+
+
+def encode_record(offset: int, removed: int, inserted: str) -> bytes:
+    """Return the journal record of an edit at OFFSET."""
+    data = inserted.encode("utf-8", errors="surrogatepass")
+    header = _HEADER.pack(offset, removed, len(data))
+    return header + _CRC.pack(zlib.crc32(data, zlib.crc32(header))) + data
+
+
+def replay(document: Document, data: bytes) -> int:
+    """
+    Apply the records in DATA to DOCUMENT. Returns the length of the
+    records which could be applied.
+
+    Replay stops at the first record which is cut short or corrupt, which
+    is where the process was stopped while writing it.
+
+    """
+    position = 0
+    while position + _HEADER.size + _CRC.size <= len(data):
+        header = data[position:position + _HEADER.size]
+        offset, removed, length = _HEADER.unpack(header)
+        crc, = _CRC.unpack_from(data, position + _HEADER.size)
+        start = position + _HEADER.size + _CRC.size
+        text = data[start:start + length]
+        if (len(text) < length or offset + removed > len(document)
+                or zlib.crc32(text, zlib.crc32(header)) != crc):
+            break
+        document.replace(offset, offset + removed, text.decode("utf-8",
+            errors="surrogatepass"))
+        position = start + length
+    return position
+
+
+def read_base(directory: Path, meta: dict) -> str | None:
+    """
+    Return the text the journal described by META starts from, or None
+    if it is no longer available.
+
+    """
+    base = meta["base"]
+    if base["type"] == "empty":
+        return ""
+    if base["type"] == "snapshot":
+        path = directory / f"{meta['id']}.{meta['generation']}.base"
+        with open(file=path, mode="r", encoding="utf-8",
+                errors="surrogatepass", newline="") as f:
+            return f.read()
+
+    # A file must not have changed since the journal started from it.
+    path = Path(base["path"])
+    stat = path.stat()
+    if stat.st_size != base["size"] or stat.st_mtime_ns != base["mtime_ns"]:
+        return None
+    text_format = TextFormat(**base["format"])
+    with text_format.open(path, mode="r") as f:
+        text = text_format.strip_bom(f.read())
+    if base["trim"] and text.endswith("\n"):
+        text = text[:-1]
+    return text
+
+
+def _running(pid: int) -> bool:
+    """
+    Internal function.
+
+    Return True if process PID is running. A journal with the pid of
+    this process was left by an earlier process given the same pid, the
+    journals of this process are told apart by their ids.
+
+    """
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def recover(directory: Path, owned: set = frozenset()) -> list[dict]:
+    """
+    Return the journals left in DIRECTORY by processes which stopped
+    without closing them. The journals with the ids in OWNED are still
+    being written by this process and are skipped.
+
+    Each journal is returned as its meta data, with the text rebuilt
+    from its base and records as "text", or None if it could not be
+    rebuilt, and the length of its valid records as "length".
+
+    """
+    journals = []
+    for path in sorted(directory.glob("*.json")):
+        try:
+            meta = json.loads(path.read_text())
+            if meta["id"] in owned or _running(meta["pid"]):
+                continue
+            text = read_base(directory, meta)
+            if text is not None:
+                document = Document(text)
+                log = directory / f"{meta['id']}.{meta['generation']}.log"
+                meta["length"] = replay(document, log.read_bytes())
+                text = document.get()
+        except READ_ERRORS + (KeyError, ValueError):
+            continue
+        meta["text"] = text
+        journals.append(meta)
+    return journals
+
+
+def remove(directory: Path, id: str) -> None:
+    """Remove every file of journal ID from DIRECTORY."""
+
+    # The meta data goes first so a journal is never half removed.
+    (directory / f"{id}.json").unlink(missing_ok=True)
+    for path in directory.glob(f"{id}.*"):
+        path.unlink(missing_ok=True)
+
+
+
+
+class Journal:
+    """
+    An append-only journal of the edits to the Text Area of a notebook.
+
+    The journal starts from a base: an empty text, a file the text was
+    loaded from or saved to, or a snapshot of the text written with the
+    journal. Every edit after that is appended as a small record by the
+    journal writer, so an edit to a very large document only writes the
+    bytes of the edit. Nothing is written until the first edit after a
+    new base.
+
+    Once the records grow past the size of the text, or COMPACT_SIZE if
+    that is larger, the journal starts again from a snapshot so recovery
+    never has to replay much more than the text itself.
+
+    """
+
+    compact_size = 1 << 22                     # bytes of records kept at least
+
+
+    def __init__(self, document: Document, writer: "JournalWriter"):
+        self.document = document
+        self.writer = writer
+        self.id = uuid.uuid4().hex
+        self.name = ""                         # window the journal is for
+        self.filetype = ""
+        self.generation = 0                    # incremented by each new base
+        self.active = False                    # edits are being recorded
+        self.size = 0                          # bytes of records since the base
+
+
+    def suspend(self) -> None:
+        """Stop recording edits until the next base."""
+        self.active = False
+
+
+    def resume(self) -> None:
+        """
+        Record edits again after suspend, without a new base. The text
+        must be the same as when the journal was suspended.
+
+        """
+        self.active = True
+
+
+    def rebase(self, filepath: Path | None = None,
+            text_format: TextFormat | None = None, trim: bool = False) -> None:
+        """
+        Start the journal again from the current text.
+
+        If FILEPATH is given the text is the contents of that file in
+        TEXT_FORMAT, without its final newline if TRIM is True.
+        Otherwise the text is written as a snapshot, unless it is empty.
+
+        """
+        self.generation += 1
+        self.size = 0
+        self.active = True
+
+        snapshot = None
+        try:
+            stat = os.stat(filepath) if filepath is not None else None
+        except OSError:
+            stat = None
+        if stat is not None:
+            base = {"type": "file", "path": str(filepath), "trim": trim,
+                "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                "format": (text_format or TextFormat()).to_dict()}
+        elif len(self.document) == 0:
+            base = {"type": "empty"}
+        else:
+            base = {"type": "snapshot"}
+            snapshot = self.document.snapshot()
+        self.writer.submit(self, "rebase", self._meta(base), snapshot)
+
+
+    def adopt(self, meta: dict) -> None:
+        """
+        Continue the recovered journal described by META, the text must
+        already be the recovered text.
+
+        """
+        self.id = meta["id"]
+        self.generation = meta["generation"]
+        self.size = meta["length"]
+        self.active = True
+        self.writer.submit(self, "adopt", self._meta(meta["base"]),
+            meta["length"])
+
+
+    def record(self, offset: int, removed: str, inserted: str) -> None:
+        """Append an edit to the journal. Used as an edit listener."""
+
+        if not self.active:
+            return
+        data = encode_record(offset, len(removed), inserted)
+        self.size += len(data)
+        self.writer.submit(self, "append", self.generation, data)
+
+        if self.size > max(self.compact_size, len(self.document)):
+            self.rebase()
+
+
+    def discard(self) -> None:
+        """Stop recording and remove the journal."""
+        self.active = False
+        self.writer.submit(self, "discard")
+
+
+    def _meta(self, base: dict) -> dict:
+        """
+        Internal function.
+
+        Return the meta data for BASE. The window name and filetype are
+        added when the meta data is written as they can still change.
+
+        """
+        return {"id": self.id, "pid": os.getpid(),
+            "generation": self.generation, "base": base}
+
+
+
+
+class JournalWriter:
+    """
+    Writes the journals of every notebook from a single thread.
+
+    Records are committed in groups. The writer waits COMMIT_DELAY
+    seconds after the first record of a group for more to arrive, then
+    writes each journal's records together and syncs each journal once,
+    so a burst of typing costs one sync rather than one per key.
+
+    """
+
+    directory = Path.home() / ".notebook" / "journal"
+    commit_delay = 0.05                        # s spent gathering a group
+
+
+    def __init__(self, directory: Path | None = None):
+        if directory is not None:
+            self.directory = directory
+        self._items = queue.Queue()
+        self._thread = None
+        self._state = {}                       # writer state by journal
+        self.failures = 0                      # operations which raised
+
+
+    def submit(self, journal: Journal, op: str, *args) -> None:
+        """Queue operation OP of JOURNAL for the writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._items.put((journal, op, args))
+
+
+    def flush(self) -> None:
+        """Wait until everything submitted has been written."""
+        if self._thread is not None:
+            self._items.join()
+
+
+    def _run(self) -> None:
+        """Internal function. Write the queued operations in groups."""
+        while True:
+            items = [self._items.get()]
+            time.sleep(self.commit_delay)
+            while True:
+                try:
+                    items.append(self._items.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Every item is marked done whatever happens to it, flush
+            # waits on them and the editor waits on flush to quit.
+            try:
+                self._commit(items)
+            finally:
+                for _ in items:
+                    self._items.task_done()
+
+
+    def _guard(self, func, *args) -> None:
+        """
+        Internal function.
+
+        Call FUNC with ARGS, counting rather than raising any error. A
+        journal is a safety net, a full or read only disk or a record
+        which cannot be written must not stop the writer or the editor.
+
+        """
+        try:
+            func(*args)
+        except Exception:
+            self.failures += 1
+
+
+    def _commit(self, items: list) -> None:
+        """Internal function. Apply a group of operations."""
+
+        dirty = set()
+        for journal, op, args in items:
+            self._guard(self._apply, journal, op, args, dirty)
+        for journal in dirty:
+            if journal in self._state:
+                self._guard(self._flush, journal, self._state[journal])
+
+
+    def _apply(self, journal: Journal, op: str, args: tuple,
+            dirty: set) -> None:
+        """
+        Internal function.
+
+        Apply operation OP of JOURNAL, adding JOURNAL to DIRTY if it has
+        records to write.
+
+        """
+        state = self._state.setdefault(journal, {"meta": None,
+            "log": None, "snapshot": None, "buffer": []})
+        if op == "rebase":
+            self._flush(journal, state)
+            self._rebase(journal, state, *args)
+        elif op == "adopt":
+            self._adopt(journal, state, *args)
+        elif op == "append":
+            generation, data = args
+            if state["meta"] and state["meta"]["generation"] == generation:
+                state["buffer"].append(data)
+                dirty.add(journal)
+        elif op == "discard":
+            dirty.discard(journal)
+            del self._state[journal]
+            self._close(state)
+            if state["meta"] is not None:
+                remove(self.directory, state["meta"]["id"])
+
+
+    def _rebase(self, journal: Journal, state: dict, meta: dict,
+            snapshot: Document | None) -> None:
+        """Internal function. Start JOURNAL again from META."""
+
+        old = state["meta"] if state["log"] is not None else None
+        self._close(state)
+        state["meta"] = meta
+        state["snapshot"] = snapshot
+
+        # A snapshot holds text found nowhere else so it is written
+        # before the old journal is removed, other bases are only
+        # written along with their first record.
+        if snapshot is not None:
+            self._open(journal, state)
+        if old is not None:
+            self._remove_generation(old)
+
+
+    def _adopt(self, journal: Journal, state: dict, meta: dict,
+            length: int) -> None:
+        """Internal function. Continue the recovered journal META."""
+        self._close(state)
+        state["meta"] = meta
+        state["snapshot"] = None
+        path = self.directory / f"{meta['id']}.{meta['generation']}.log"
+        state["log"] = open(path, mode="r+b")
+        state["log"].truncate(length)
+        state["log"].seek(length)
+        self._write_meta(journal, meta)
+
+
+    def _open(self, journal: Journal, state: dict) -> None:
+        """
+        Internal function.
+
+        Write the base and meta data of JOURNAL and open a new log.
+
+        """
+        meta = state["meta"]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{meta['id']}.{meta['generation']}"
+
+        if state["snapshot"] is not None:
+            with open(self.directory / f"{name}.base", mode="w",
+                    encoding="utf-8", errors="surrogatepass",
+                    newline="") as f:
+                for chunk in state["snapshot"].chunks():
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            state["snapshot"] = None
+
+        state["log"] = open(self.directory / f"{name}.log", mode="wb")
+        self._write_meta(journal, meta)
+
+
+    def _write_meta(self, journal: Journal, meta: dict) -> None:
+        """Internal function. Write the meta data of JOURNAL."""
+
+        # The meta data is renamed into place so it always points at a
+        # complete base.
+        path = self.directory / f"{meta['id']}.json"
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, mode="w") as f:
+            json.dump(dict(meta, name=journal.name,
+                filetype=journal.filetype), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+    def _flush(self, journal: Journal, state: dict) -> None:
+        """Internal function. Write and sync the buffered records."""
+        if not state["buffer"]:
+            return
+        if state["log"] is None:
+            self._open(journal, state)
+        state["log"].write(b"".join(state["buffer"]))
+        state["log"].flush()
+        os.fsync(state["log"].fileno())
+        state["buffer"] = []
+
+
+    def _close(self, state: dict) -> None:
+        """Internal function. Close the log of STATE."""
+        if state["log"] is not None:
+            state["log"].close()
+            state["log"] = None
+
+
+    def _remove_generation(self, meta: dict) -> None:
+        """Internal function. Remove the base and log of META."""
+
+        # If the journal was not started again from a snapshot its meta
+        # data still points at this generation.
+        path = self.directory / f"{meta['id']}.json"
+        if path.exists() and json.loads(path.read_text())["generation"] \
+                == meta["generation"]:
+            path.unlink()
+        name = f"{meta['id']}.{meta['generation']}"
+        for suffix in (".base", ".log"):
+            (self.directory / f"{name}{suffix}").unlink(missing_ok=True)
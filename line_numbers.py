@@ -0,0 +1,119 @@
+import tkinter as tk
+from tkinter import font as tkfont
+
+from instrumentation import timed
+from update_scheduler import UpdateScheduler
+
+
+
+
+class LineNumbers(tk.Canvas):
+    """
+    A gutter showing the line numbers beside the Text Area.
+
+    Only the lines in view are drawn. The position of each line is read
+    with dlineinfo from the display lines the Text widget has already
+    laid out, which accounts for wrapped lines, so a redraw costs the
+    same for a document of ten lines or a million. The text items are
+    kept and moved between redraws rather than created again, and a
+    redraw which would draw the same numbers in the same places leaves
+    the canvas alone. Scrolls and edits only mark the gutter as out of
+    date, the redraws are coalesced to at most one per frame.
+
+    """
+
+    padding = 6                                # pixels either side of a number
+
+
+    def __init__(self, notebook: tk.Toplevel):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.visible = True
+
+        super().__init__(notebook, borderwidth=0, highlightthickness=0,
+            takefocus=False)
+        self.font = tkfont.Font(font=self.text_area.cget("font"))
+        self.updates = UpdateScheduler(self, self._refresh)
+        self._items = []                       # text items, reused
+        self._drawn = []                       # (line, y) of each drawn number
+        self._digits = 0                       # digits the width allows for
+
+        # Edits can move the lines after them or change how a line wraps
+        # and a resize can rewrap every line in view.
+        self.text_area.edit_listeners.append(self._on_edit)
+        self.text_area.bind("<Configure>",
+            lambda _: self.on_view_change(), "+")
+
+
+    def destroy(self) -> None:
+        """Destroy this widget and cancel any pending redraw."""
+        self.updates.cancel()
+        super().destroy()
+
+
+    def set_visible(self, visible: bool) -> None:
+        """Show or hide the gutter."""
+        self.visible = visible
+        if visible:
+            self.grid()
+            self.on_view_change()
+        else:
+            self.grid_remove()
+            self.updates.cancel()
+
+
+    def on_view_change(self) -> None:
+        """Redraw the numbers for the lines now in view."""
+        if self.visible:
+            self.updates.mark("view")
+
+
+    def _on_edit(self, offset: int, removed: str, inserted: str) -> None:
+        """Internal function. Redraw after an edit."""
+        self.on_view_change()
+
+
+    @timed("gutter.refresh")
+    def _refresh(self, dirty: set) -> None:
+        """Internal function. Draw the numbers of the lines in view."""
+
+        # The gutter is only made wider or narrower when the number of
+        # digits in the last line number changes.
+        last = self.text_area.document.line_count
+        digits = len(str(last))
+        if digits != self._digits:
+            self._digits = digits
+            self.configure(width=self.font.measure("0" * digits)
+                + 2 * self.padding)
+            self._drawn = []
+
+        # Walk down from the line at the top of the view until a line
+        # starts below it. Only the first line can start above the view,
+        # when it wraps and has been scrolled part way.
+        lines = []
+        top = int(self.text_area.index("@0,0").split(".")[0])
+        height = self.text_area.winfo_height()
+        for line in range(top, last + 1):
+            info = self.text_area.dlineinfo(f"{line}.0")
+            if info is None:
+                if line > top:
+                    break
+            elif info[1] >= height:
+                break
+            else:
+                lines.append((line, info[1]))
+
+        if lines == self._drawn:
+            return
+        self._drawn = lines
+
+        x = int(self.cget("width")) - self.padding
+        for i, (line, y) in enumerate(lines):
+            if i == len(self._items):
+                self._items.append(self.create_text(0, 0, anchor="ne",
+                    font=self.font, fill="gray50"))
+            item = self._items[i]
+            self.itemconfigure(item, text=str(line), state="normal")
+            self.coords(item, x, y)
+        for item in self._items[len(lines):]:
+            self.itemconfigure(item, state="hidden")
@@ -1,6 +1,13 @@
+import time
+
+# Taken before anything else is imported so the startup time includes
+# importing the application.
+STARTED = time.perf_counter()
+
+import argparse
 import sys
 
-from manager import Manager
+import instrumentation
 
 
 
@@ -8,10 +15,47 @@ from manager import Manager
 def main() -> None:
     """Entry point of the notebook application."""
 
+    parser = argparse.ArgumentParser(description="Notebook text editor.",
+        fromfile_prefix_chars="@")
+    parser.add_argument("--startup-time", action="store_true",
+        help="print the seconds taken to show the first window and quit")
+    parser.add_argument("--stats", nargs="+", metavar="FILE",
+        help="print the statistics of each FILE, or of the files under "
+            "each directory, without opening a window. Paths can also be "
+            "read from a file given as @FILE")
+    parser.add_argument("--format", choices=("json", "csv"), default="json",
+        help="output format of --stats")
+    parser.add_argument("--jobs", type=int, default=None,
+        help="processes used by --stats, one per CPU by default")
+    args = parser.parse_args()
+
+    # The statistics are counted without Tk, so it is not imported.
+    if args.stats is not None:
+        import batch_stats
+        errors = batch_stats.run(batch_stats.expand(args.stats), args.format,
+            jobs=args.jobs)
+        sys.exit(1 if errors else 0)
+
+    from manager import Manager
+
     # Create an instance of the notebook application manager. By default
     # this opens a new blank notebook.
     app = Manager()
+
+    # Draw the first window straight away. The modules it does not need
+    # are imported and the pool of notebooks is filled afterwards.
+    app.update_idletasks()
+    startup_time = time.perf_counter() - STARTED
+    if instrumentation.enabled:
+        for notebook in app.notebooks.values():
+            notebook.metrics.record("startup", startup_time)
+
+    if args.startup_time:
+        print(f"{startup_time:.6f}")
+        app.destroy()
+        return
+
     app.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
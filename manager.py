@@ -1,7 +1,10 @@
+import importlib
+import time
 import tkinter as tk
+from pathlib import Path
 from tkinter import messagebox
 
-from notebook import Notebook
+import instrumentation
 
 
 
@@ -17,9 +20,29 @@ class Manager(tk.Tk):
 
     When the last toplevel window is closed, the main loop of Tk will be
     destroyed.
+
+    Only tkinter and the instrumentation are imported with this module.
+    The modules needed to show the first window are imported when it is
+    opened, and the helpers shared by the windows, such as the clipboard
+    ring and the file watcher, are only built on first use. Once the
+    first window is showing, the modules only needed by less used
+    commands are imported and a small pool of hidden notebooks is built
+    while the application is idle, so a new window only has to be shown
+    rather than built.
     
     """
 
+    pool_size = 2                              # hidden notebooks kept ready
+    pool_delay = 200                           # ms before refilling the pool
+
+    # Modules imported after startup rather than before the first window.
+    # None of them may be imported by this module or by the modules the
+    # first window is built from.
+    deferred_modules = ("analytics", "case_transform", "clipboard",
+        "debug_panel", "file_loader", "file_reload", "file_saver",
+        "file_watcher", "find_dialog", "memory_budget", "search",
+        "syntax_highlight")
+
 
     def __init__(self):
         self.xpos = 30                         # x position windows are opened
@@ -28,12 +51,75 @@ class Manager(tk.Tk):
         self.yoffset = 0                       # y offset for new notebooks
         self.notebooks = {}                    # track the open toplevels
         self.notebook_count = 1                # default notebook name number
+        self.debug_panel = None                # the latency monitor window
+        self.pool = []                         # hidden notebooks ready to show
+        self._pool_job = None                  # pending pool refill after id
+        self._clipboard_ring = None            # texts shared by all windows
+        self._file_watcher = None              # changes to the open files
+        self._analytics = None                 # statistics of the windows
+        self._memory_budget = None             # text held by the windows
+
+        # The journal and the session are needed before the first window
+        # is shown, so they are imported now rather than with the module.
+        from journal import JournalWriter
+        from session import Session
+
+        self.journal_writer = JournalWriter()
 
         super().__init__()
         self.platform = self.tk.call("tk", "windowingsystem")
         self.withdraw()                        # withdraw the default window
-        
-        self.open_notebook()                   # open first notebook on start
+        self.session = Session(self)           # windows saved on quit
+
+        # Quitting from the application menu keeps the open windows for
+        # the next start.
+        self.createcommand("tk::mac::Quit", self.quit_application)
+
+        # Restore the windows of the last session, otherwise open the
+        # first notebook on start.
+        if not self.session.restore():
+            self.open_notebook()
+        self._pool_job = self.after(self.pool_delay, self._warm_up)
+
+
+    @property
+    def clipboard_ring(self):
+        """The texts cut and copied in all the windows."""
+
+        if self._clipboard_ring is None:
+            from clipboard import ClipboardRing
+            self._clipboard_ring = ClipboardRing()
+        return self._clipboard_ring
+
+
+    @property
+    def file_watcher(self):
+        """The watcher of the files open in the windows."""
+
+        if self._file_watcher is None:
+            from file_watcher import FileWatcher
+            self._file_watcher = FileWatcher(self)
+        return self._file_watcher
+
+
+    @property
+    def analytics(self):
+        """The worker computing the statistics of the windows."""
+
+        if self._analytics is None:
+            from analytics import AnalyticsWorker
+            self._analytics = AnalyticsWorker(self)
+        return self._analytics
+
+
+    @property
+    def memory_budget(self):
+        """The budget for the text held by all the windows."""
+
+        if self._memory_budget is None:
+            from memory_budget import MemoryBudget
+            self._memory_budget = MemoryBudget(self)
+        return self._memory_budget
 
 
     def _update_offset(self) -> None:
@@ -60,7 +146,7 @@ class Manager(tk.Tk):
         self.ypos += self.yoffset
 
 
-    def open_notebook(self, name: str = None) -> Notebook:
+    def open_notebook(self, name: str = None) -> tk.Toplevel:
         """
         Open a new text editor window.
 
@@ -74,14 +160,25 @@ class Manager(tk.Tk):
         is displayed.
         
         """
+        started = time.perf_counter()
+
+        # The first window imports the modules it is built from.
+        from notebook import Notebook
+
         # Check if name is parsed, default name created from tracked
         # window count variable.
         if not name:
             name = f"Book{self.notebook_count}"
         
-        # Create the new window and record the instance
-        new_notebook = Notebook(self, name, self.xpos, self.ypos)
+        # Show a window from the pool if there is one ready, otherwise
+        # create the new window, and record the instance.
+        if self.pool:
+            new_notebook = self.pool.pop()
+            new_notebook.show(name, self.xpos, self.ypos)
+        else:
+            new_notebook = Notebook(self, name, self.xpos, self.ypos)
         self.notebooks[name] = new_notebook
+        self._schedule_fill_pool()
 
         # Update the window position attributes for the next window.
         self._update_window_position()
@@ -89,9 +186,113 @@ class Manager(tk.Tk):
         # update the window count for default window name numbering
         self.notebook_count += 1
 
+        if instrumentation.enabled:
+            new_notebook.metrics.record("window.open",
+                time.perf_counter() - started)
+
         return new_notebook
 
 
+    def _warm_up(self) -> None:
+        """
+        Internal function.
+
+        Import the deferred modules and fill the pool of notebooks once
+        the first window is showing.
+
+        """
+        self._pool_job = None
+        self.recover_journals()
+        for module in self.deferred_modules:
+            importlib.import_module(module)
+
+        # The open files are only polled once the first windows are
+        # showing.
+        self.file_watcher.start()
+        self._fill_pool()
+
+
+    def recover_journals(self) -> None:
+        """
+        Open a window with the recovered text of every journal left
+        behind when the application last stopped unexpectedly.
+
+        """
+        import journal
+        from file_encoding import TextFormat
+
+        # The windows already open may have journaled edits by now, their
+        # journals are not left behind.
+        owned = {notebook.journal.id
+            for notebook in [*self.notebooks.values(), *self.pool]}
+        directory = self.journal_writer.directory
+        for recovered in journal.recover(directory, owned):
+            if recovered["text"] is None:
+                messagebox.showwarning(
+                    message=f"{recovered['name']} could not be recovered.",
+                    detail="The file it was edited from has changed.",
+                    icon="warning")
+                journal.remove(directory, recovered["id"])
+                continue
+
+            name = f"{recovered['name']} (Recovered)"
+            while name in self.notebooks:
+                name += "'"
+            notebook = self.open_notebook(name)
+
+            # The recovered text is marked unsaved and the window carries
+            # on writing to the journal it was recovered from.
+            notebook.journal.suspend()
+            notebook.text_area.insert("1.0", recovered["text"])
+            notebook.text_area.edit_reset()
+            notebook.text_area.edit_modified(True)
+            if recovered["filetype"]:
+                notebook.menu.file_menu.filetype.set(recovered["filetype"])
+            if recovered["base"]["type"] == "file":
+                notebook.menu.file_menu.filepath = Path(
+                    recovered["base"]["path"])
+                notebook.menu.file_menu._update_text_format(
+                    TextFormat(**recovered["base"]["format"]))
+            notebook.journal.adopt(recovered)
+
+
+    def _schedule_fill_pool(self) -> None:
+        """Internal function. Refill the pool after a short delay."""
+        if self._pool_job is None and len(self.pool) < self.pool_size:
+            self._pool_job = self.after(self.pool_delay, self._fill_pool)
+
+
+    def _fill_pool(self) -> None:
+        """
+        Internal function.
+
+        Build one hidden notebook for the pool. Only one is built per
+        call so the application stays responsive while the pool fills.
+
+        """
+        from notebook import Notebook
+
+        self._pool_job = None
+        if len(self.pool) < self.pool_size:
+            notebook = Notebook(self, "", self.xpos, self.ypos)
+            notebook.withdraw()
+            self.pool.append(notebook)
+        self._schedule_fill_pool()
+
+
+    def open_debug_panel(self) -> None:
+        """Open the Latency Monitor, or raise it if it is already open."""
+
+        # The panel is imported on first use to keep startup fast.
+        from debug_panel import DebugPanel
+
+        if self.debug_panel is not None and self.debug_panel.winfo_exists():
+            self.debug_panel.deiconify()
+            self.debug_panel.lift()
+        else:
+            self.debug_panel = DebugPanel(self)
+
+
     def update_notebook(self, old_name: str, new_name: str) -> None:
         """
         Update a windows stored name. 
@@ -116,6 +317,17 @@ class Manager(tk.Tk):
         # now, only choose whether to save any unsaved changes.
         selected_notebook = self.notebooks.pop(name)
 
+        # A restored window which was never focused is filled first so
+        # its unsaved changes are not lost without asking.
+        self.session.hydrate(selected_notebook)
+        self._cancel_tasks(selected_notebook)
+
+        # Likewise a window spilled to disk is filled again if it has
+        # unsaved changes.
+        if (selected_notebook.spill is not None
+                and selected_notebook.text_area.edit_modified()):
+            selected_notebook.spill.finish()
+
         # We need to check that there are no unsaved changes to the
         # window the user is attempting to close. To do this we query
         # the modified attribute of the text widget.
@@ -127,14 +339,94 @@ class Manager(tk.Tk):
                 parent=selected_notebook)
 
             if confirm_close == True:
-                selected_notebook.notebook_menu.file_menu.file_save()
+                selected_notebook.menu.file_menu.file_save()
+
+        # Saves run in the background, make sure they have all been 
+        # started before the window and its text are destroyed.
+        if selected_notebook.menu.file_menu.saving:
+            selected_notebook.menu.file_menu.saver.finish()
+
+        # The window was closed as the user chose so its journal is no
+        # longer needed.
+        selected_notebook.journal.discard()
 
         selected_notebook.destroy()
         
+        # Closing the last window ends the session rather than saving it.
         if len(self.notebooks) == 0:
+            self.session.clear()
+            self.journal_writer.flush()
+            if self._pool_job is not None:
+                self.after_cancel(self._pool_job)
             self.destroy()
 
 
+    def quit_application(self) -> None:
+        """
+        Quit, saving every open window and its unsaved changes to the
+        session so they are restored on the next start.
+
+        """
+        for notebook in self.notebooks.values():
+            self._cancel_tasks(notebook)
+        try:
+            self.session.save()
+        except OSError as error:
+            messagebox.showerror(message="The session could not be saved.",
+                detail=str(error), icon="error")
+            return
+
+        # Saves run in the background, let them finish before quitting.
+        # The unsaved changes are in the session so the journals are no
+        # longer needed.
+        for notebook in self.notebooks.values():
+            if notebook.menu.file_menu.saving:
+                notebook.menu.file_menu.saver.finish()
+            notebook.journal.discard()
+        self.journal_writer.flush()
+
+        self.session.close()
+        if self._pool_job is not None:
+            self.after_cancel(self._pool_job)
+        self.destroy()
+
+
+    def _cancel_tasks(self, notebook: tk.Toplevel) -> None:
+        """
+        Internal function.
+
+        Stop the background tasks of NOTEBOOK before it is closed.
+
+        """
+        # A file still being loaded into the window is cancelled. The 
+        # window could not be edited while loading so nothing is lost.
+        if notebook.loader is not None:
+            notebook.loader.cancel()
+
+        # Likewise a case transform or paste still running is stopped.
+        if notebook.menu.edit_menu.transform is not None:
+            notebook.menu.edit_menu.transform.cancel()
+        if notebook.menu.edit_menu.paster is not None:
+            notebook.menu.edit_menu.paster.cancel()
+        if notebook.reloader is not None:
+            notebook.reloader.cancel()
+        if notebook.highlighter is not None:
+            notebook.highlighter.cancel()
+
+        # The analytics and the memory budget are not built just to
+        # forget a window they never saw.
+        if self._analytics is not None:
+            self._analytics.forget(notebook)
+        if self._memory_budget is not None:
+            self._memory_budget.forget(notebook)
+
+        # Text spilled to disk while being written or put back is kept
+        # in the window. Text already spilled stays on disk.
+        if notebook.spill is not None and (not notebook.spill.spilled
+                or notebook.spill.restoring):
+            notebook.spill.finish()
+
+
     def close_all_notebook(self) -> None:
         """
         Closes all open notebooks.
@@ -0,0 +1,385 @@
+import codecs
+import collections
+import queue
+import tempfile
+import threading
+import time
+import tkinter as tk
+import zlib
+
+import instrumentation
+from document import Document
+
+
+
+
+class Spill:
+    """
+    Holds the text of an idle notebook in a compressed temporary file.
+
+    The text is compressed on a worker thread from a snapshot of the
+    document, so the window stays responsive while it is written. If the
+    text has not been edited by the time it is written, the Text Area is
+    emptied, which frees the text held by the Text widget, the document
+    and the statistics index. The cursor, selection, view and modified
+    flag are kept with the file. The undo history and the journal are
+    left as they are, since the text put back is the same text.
+
+    When the window is focused again the text is decompressed and put
+    back in batches from after callbacks, spending at most BATCH_TIME
+    milliseconds per batch, as the file loader does.
+
+    """
+
+    chunk_size = 1 << 16                       # compressed bytes read per chunk
+    batch_time = 8                             # ms spent inserting per batch
+    level = 1                                  # zlib compression level
+
+
+    def __init__(self, notebook: tk.Toplevel):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.spilled = False                   # the Text Area has been emptied
+        self.restoring = False                 # the text is being put back
+        self.done = False
+        self.file_changed = False              # file changed on disk meanwhile
+
+        # The state of the window when it was emptied.
+        self.modified = False
+        self.cursor = "1.0"
+        self.selection = ()
+        self.top = "1.0"                       # index at the top of the view
+        self.scroll = 0.0                      # yview fraction, for the session
+        self.xscroll = 0.0
+
+        self._file = None
+        self._results = queue.Queue()
+        self._cancelled = threading.Event()
+        self._job = None
+
+
+    def start(self) -> None:
+        """Start writing the text out."""
+
+        self.notebook.spill = self
+        self._started = time.perf_counter()
+        self._revision = self.text_area.revision
+        threading.Thread(target=self._write, daemon=True,
+            args=(self.text_area.document.snapshot(),)).start()
+        self._job = self.notebook.after(10, self._poll)
+
+
+    def _write(self, document: Document) -> None:
+        """
+        Internal function.
+
+        Compress DOCUMENT into a temporary file and pass the file, or
+        the error, back to the main loop.
+
+        """
+        try:
+            f = tempfile.TemporaryFile(prefix="notebook-spill-")
+            compressor = zlib.compressobj(self.level)
+            for chunk in document.chunks():
+                if self._cancelled.is_set():
+                    f.close()
+                    return
+                f.write(compressor.compress(chunk.encode("utf-8")))
+            f.write(compressor.flush())
+            self._results.put((f, None))
+        except OSError as error:
+            self._results.put((None, error))
+
+
+    def _poll(self) -> None:
+        """Internal function. Empty the Text Area once the text is written."""
+
+        self._job = None
+        try:
+            self._file, error = self._results.get_nowait()
+        except queue.Empty:
+            self._job = self.notebook.after(10, self._poll)
+            return
+
+        # The file only holds the text it was written from, and a task
+        # holding the text disabled may still edit it. The text is kept
+        # and the budget tries again later.
+        if (error is not None or self.text_area.revision != self._revision
+                or str(self.text_area.cget("state")) != "normal"):
+            self.discard()
+            return
+
+        self._empty()
+        if instrumentation.enabled:
+            self.notebook.metrics.record("memory.spill",
+                time.perf_counter() - self._started)
+
+
+    def _empty(self) -> None:
+        """Internal function. Empty the Text Area, keeping its state."""
+
+        text_area = self.text_area
+        self.modified = bool(text_area.edit_modified())
+        self.cursor = text_area.index(tk.INSERT)
+        self.selection = tuple(str(index)
+            for index in text_area.tag_ranges(tk.SEL))
+        self.top = text_area.index("@0,0")
+        self.scroll = text_area.yview()[0]
+        self.xscroll = text_area.xview()[0]
+
+        # Neither undo nor the journal record the text being removed
+        # and put back, and the text cannot be edited while it is gone.
+        self._undo = text_area.cget("undo")
+        self.notebook.journal.suspend()
+        text_area.configure(undo=False)
+        text_area.delete("1.0", "end")
+        text_area.configure(state="disabled")
+        text_area.edit_modified(self.modified)
+
+        # The Status Bar keeps the counts of the text.
+        text_area.updates.cancel()
+        self.spilled = True
+        self.notebook.status_bar.update_progress("Spilled to disk")
+
+
+    def restore(self) -> None:
+        """Start putting the text back, or stop writing it out."""
+
+        if self.done or self.restoring:
+            return
+        if not self.spilled:
+            self.discard()
+            return
+
+        self.restoring = True
+        self._started = time.perf_counter()
+        self._length = self._file.seek(0, 2)
+        self._file.seek(0)
+        self._decompressor = zlib.decompressobj()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._job = self.notebook.after(1, self._poll_restore)
+
+
+    def finish(self) -> None:
+        """Put the whole text back now, or stop writing it out."""
+
+        if self.done:
+            return
+        if not self.spilled:
+            self.discard()
+            return
+
+        self.restore()
+        if self._job is not None:
+            self.notebook.after_cancel(self._job)
+            self._job = None
+        self._insert(None)
+        self._finish_restore()
+
+
+    def _poll_restore(self) -> None:
+        """Internal function. Put back the next batch of the text."""
+
+        self._job = None
+        if self._insert(time.perf_counter() + self.batch_time / 1000):
+            self._finish_restore()
+        else:
+            percent = 100 * self._file.tell() // max(self._length, 1)
+            self.notebook.status_bar.update_progress(f"Restoring {percent}%")
+            self._job = self.notebook.after(1, self._poll_restore)
+
+
+    def _insert(self, deadline: float | None) -> bool:
+        """
+        Internal function.
+
+        Insert the text read before DEADLINE, or the rest of the text if
+        DEADLINE is None. Returns True once the whole text is back.
+
+        """
+        batch = []
+        done = False
+        while deadline is None or time.perf_counter() < deadline:
+            data = self._file.read(self.chunk_size)
+            if not data:
+                batch.append(self._decoder.decode(
+                    self._decompressor.flush(), final=True))
+                done = True
+                break
+            batch.append(self._decoder.decode(
+                self._decompressor.decompress(data)))
+
+        self.text_area.configure(state="normal")
+        self.text_area.insert("end", "".join(batch))
+        self.text_area.configure(state="disabled")
+        return done
+
+
+    def _finish_restore(self) -> None:
+        """Internal function. Return the window to normal editing."""
+
+        text_area = self.text_area
+        text_area.configure(undo=self._undo, state="normal")
+        text_area.edit_modified(self.modified)
+        self.notebook.journal.resume()
+
+        text_area.mark_set(tk.INSERT, self.cursor)
+        if self.selection:
+            text_area.tag_add(tk.SEL, *self.selection)
+        text_area.yview(self.top)
+        text_area.xview_moveto(self.xscroll)
+
+        self.discard()
+        self.notebook._schedule_analytics()
+        if instrumentation.enabled:
+            self.notebook.metrics.record("memory.restore",
+                time.perf_counter() - self._started)
+
+        # A change to the file while the text was gone is handled now.
+        if self.file_changed:
+            self.notebook._on_file_changed()
+
+
+    def read(self) -> bytes:
+        """Return the text as UTF-8 without putting it back."""
+
+        self._file.seek(0)
+        decompressor = zlib.decompressobj()
+        chunks = []
+        while data := self._file.read(self.chunk_size):
+            chunks.append(decompressor.decompress(data))
+        chunks.append(decompressor.flush())
+        return b"".join(chunks)
+
+
+    def discard(self) -> None:
+        """
+        Stop the spill and remove the file. Any text which has not been
+        put back is lost, only used when the window is being closed or
+        the text was never removed.
+
+        """
+        self.done = True
+        self._cancelled.set()
+        if self._job is not None:
+            self.notebook.after_cancel(self._job)
+            self._job = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.notebook.spill = None
+        self.notebook.status_bar.update_progress("")
+
+
+
+
+class MemoryBudget:
+    """
+    Keeps the text held by all the windows within BUDGET bytes.
+
+    Every window's text is held by its Text widget, its document and its
+    statistics index, so dozens of large files can use more memory than
+    there is. The memory of each window is estimated from the length
+    and the line count of its document, which costs nothing to read.
+    Past the budget, the least recently focused windows are spilled to
+    compressed temporary files until the rest fit, and a spilled window
+    gets its text back when it is focused again.
+
+    The windows are checked CHECK_DELAY ms after an edit or a change of
+    focus, so a burst of typing only costs one check. The focused
+    window, windows smaller than MIN_SIZE and windows with a task
+    running are never spilled.
+
+    """
+
+    budget = 512 << 20                         # bytes of text held at most
+    min_size = 1 << 20                         # bytes below which a window stays
+    line_size = 120                            # bytes held per line of text
+    check_delay = 1000                         # ms from a change to a check
+
+
+    def __init__(self, manager: tk.Tk):
+        self.manager = manager
+
+        # The windows in the order they were focused, most recently last.
+        self._focused = collections.OrderedDict()
+        self._job = None                       # pending check after id
+
+
+    def size(self, notebook: tk.Toplevel) -> int:
+        """Return an estimate of the memory held by the text of NOTEBOOK."""
+
+        # The widget and the document each hold the text, and each line
+        # costs the widget and the statistics index a few structures.
+        document = notebook.text_area.document
+        return 2 * len(document) + self.line_size * document.line_count
+
+
+    def touch(self, notebook: tk.Toplevel) -> None:
+        """Record that NOTEBOOK was focused and give it back its text."""
+
+        self._focused[notebook] = None
+        self._focused.move_to_end(notebook)
+        if notebook.spill is not None:
+            notebook.spill.restore()
+        self.schedule()
+
+
+    def forget(self, notebook: tk.Toplevel) -> None:
+        """Forget NOTEBOOK, which is being closed."""
+        self._focused.pop(notebook, None)
+
+
+    def schedule(self) -> None:
+        """Check the windows against the budget after CHECK_DELAY."""
+        if self._job is None:
+            self._job = self.manager.after(self.check_delay, self._check)
+
+
+    def _idle(self, notebook: tk.Toplevel) -> bool:
+        """
+        Internal function.
+
+        Return True if no task is running in NOTEBOOK which needs its
+        text.
+
+        """
+        edit_menu = notebook.menu.edit_menu
+        return (notebook.loader is None and notebook.reloader is None
+            and notebook.spill is None and edit_menu.transform is None
+            and edit_menu.paster is None
+            and not notebook.menu.file_menu.saving
+            and notebook not in self.manager.session.pending)
+
+
+    def _check(self) -> None:
+        """Internal function. Spill windows until the rest fit the budget."""
+
+        self._job = None
+        sizes = {notebook: self.size(notebook)
+            for notebook in self.manager.notebooks.values()
+            if notebook.spill is None}
+        used = sum(sizes.values())
+        if used <= self.budget:
+            return
+
+        # The window with the focus is kept, as is the window focused
+        # last in case the focus is in one of its dialogs.
+        focus = self.manager.focus_get()
+        kept = {focus.winfo_toplevel() if focus is not None else None,
+            next(reversed(self._focused), None)}
+
+        # Windows never focused are spilled first, then the others from
+        # the least recently focused.
+        order = [notebook for notebook in sizes
+            if notebook not in self._focused]
+        order.extend(notebook for notebook in self._focused
+            if notebook in sizes)
+        for notebook in order:
+            if used <= self.budget:
+                break
+            if (notebook in kept or sizes[notebook] < self.min_size
+                    or not self._idle(notebook)):
+                continue
+            Spill(notebook).start()
+            used -= sizes[notebook]
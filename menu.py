@@ -4,6 +4,7 @@ import sys
 from apple_menu import AppleMenu
 from file_menu import FileMenu
 from edit_menu import EditMenu
+from view_menu import ViewMenu
 
 
 
@@ -38,4 +39,8 @@ class Menu(tk.Menu):
 
         # Edit menu
         self.edit_menu = EditMenu(self)
-        self.add_cascade(label="Edit", menu=self.edit_menu)     
\ No newline at end of file
+        self.add_cascade(label="Edit", menu=self.edit_menu)
+
+        # View menu
+        self.view_menu = ViewMenu(self)
+        self.add_cascade(label="View", menu=self.view_menu)     
\ No newline at end of file
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 
+from instrumentation import Metrics, timed
+from journal import Journal
+from line_numbers import LineNumbers
 from menu import Menu
 from text_area import TextArea
 from status_bar import StatusBar
@@ -11,72 +14,304 @@ from status_bar import StatusBar
 class Notebook(tk.Toplevel):
     """A Notebook window for editing text documents."""
 
+    analytics_delay = 250                      # ms between statistics updates
+
 
     def __init__(self, parent: tk.Tk, name: str, xpos: float, ypos: float):
         self.manager = parent
         self.name = name
         self.width = 600
         self.height = 400
+        self.loader = None                     # file loader while loading
+        self.metrics = Metrics()               # latencies of this window
+        self.finder = None                     # find and replace, when used
+        self.find_dialog = None
+        self.highlighter = None                # syntax highlighting, when used
+        self.reloader = None                   # in place reload while running
+        self.spill = None                      # text held on disk while idle
+        self._analytics_job = None             # pending statistics after id
 
         super().__init__(parent)
         self.title(name)
         self.minsize(self.width, self.height)
         self.geometry(f"+{xpos}+{ypos}")
         self.protocol("WM_DELETE_WINDOW", 
-            lambda: self.manager.close_notebook(name))
+            lambda: self.manager.close_notebook(self.name))
         self.rowconfigure(0, weight=1)
-        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=1)
 
         self._configure_widgets()
 
         self._configure_traces()
 
+        # Every edit is recorded in the journal so unsaved changes can be
+        # recovered if the application stops unexpectedly.
+        self.journal = Journal(self.text_area.document,
+            self.manager.journal_writer)
+        self.journal.name = name
+        self.text_area.edit_listeners.append(self.journal.record)
+        self.journal.rebase()
+
+        # The file watcher of the manager tells the window when its file
+        # changes on disk.
+        self.bind("<<FileChanged>>", lambda _: self._on_file_changed())
+
+        # The statistics computed in the background follow the edits and
+        # the selection.
+        self.text_area.edit_listeners.append(
+            lambda *_: self._schedule_analytics())
+        self.text_area.bind("<<Selection>>",
+            lambda _: self._schedule_analytics(), "+")
+        self._schedule_analytics()
+
+        # The memory budget of the manager follows the size of the text
+        # and which window was focused last.
+        self.text_area.edit_listeners.append(
+            lambda *_: self.manager.memory_budget.schedule())
+        self.bind("<FocusIn>", lambda _: self._on_focus_in(), "+")
+
+
+    def destroy(self) -> None:
+        """
+        Destroy this window, cancelling any pending statistics and
+        removing any text spilled to disk.
+
+        """
+        if self._analytics_job is not None:
+            self.after_cancel(self._analytics_job)
+            self._analytics_job = None
+        if self.spill is not None:
+            self.spill.discard()
+        super().destroy()
+
 
     def _configure_widgets(self) -> None:
         """Internal function. Configure the widgets for the notebook."""
 
+        self.text_area = TextArea(self)
+        self.text_area.grid(row=0, column=1, sticky="nsew")
+
+        # The line numbers are drawn in a gutter to the left of the text.
+        self.line_numbers = LineNumbers(self)
+        self.line_numbers.grid(row=0, column=0, sticky="ns")
+
+        # The menu is created after the Text Area as the Edit menu
+        # commands act on it.
         self.menu = Menu(self)
         self.configure(menu=self.menu)
 
-        self.text_area = TextArea(self)
-        self.text_area.grid(row=0, column=0, sticky="nsew")
-
         sep_right = ttk.Separator(self, orient="vertical")
-        sep_right.grid(row=0, column=1, sticky="ns")
+        sep_right.grid(row=0, column=2, sticky="ns")
 
-        vscroll = ttk.Scrollbar(self, orient="vertical",
+        self.vscroll = ttk.Scrollbar(self, orient="vertical",
             command=self.text_area.yview)
-        vscroll.grid(row=0, column=2, sticky="ns")
-        self.text_area.configure(yscrollcommand=vscroll.set)
+        self.vscroll.grid(row=0, column=3, sticky="ns")
+        self.text_area.configure(yscrollcommand=self._on_yscroll)
 
         sep_bottom = ttk.Separator(self, orient="horizontal")
-        sep_bottom.grid(row=1, column=0, columnspan=3, sticky="ew")
+        sep_bottom.grid(row=1, column=0, columnspan=4, sticky="ew")
 
         self.status_bar = StatusBar(self)
-        self.status_bar.grid(row=2, column=0, columnspan=3, sticky="ew")
+        self.status_bar.grid(row=2, column=0, columnspan=4, sticky="ew")
 
         # Lastly we request that the Text Area gets the focus on opening
         # from the window manager.
         self.text_area.focus()
 
 
+    def show(self, name: str, xpos: float, ypos: float) -> None:
+        """
+        Show a notebook which was built hidden as window NAME at XPOS
+        and YPOS.
+
+        """
+        self.name = name
+        self.journal.name = name
+        self.title(name)
+        self.geometry(f"+{xpos}+{ypos}")
+        self.deiconify()
+        self.text_area.focus()
+        self._schedule_analytics()
+
+
+    def open_find(self) -> None:
+        """Open the Find and Replace dialog for this notebook."""
+
+        # Find and replace are imported on first use to keep startup
+        # fast.
+        from find_dialog import FindDialog
+        from search import Finder
+
+        if self.finder is None:
+            self.finder = Finder(self)
+
+        if self.find_dialog is None:
+            self.find_dialog = FindDialog(self)
+        else:
+            self.find_dialog.deiconify()
+            self.find_dialog.lift()
+            self.find_dialog.find_entry.focus()
+
+
+    def find_next(self, backwards: bool = False) -> None:
+        """Select the next match of the current search."""
+        if self.finder is None or self.finder.pattern is None:
+            self.open_find()
+        else:
+            self.finder.find_next(backwards)
+
+
+    def _on_file_changed(self) -> None:
+        """
+        Internal function.
+
+        Reload the file in place when it changes on disk, unless the
+        text has unsaved changes which the reload would lose.
+
+        """
+        if self.loader is not None or self.reloader is not None:
+            return
+        if self.spill is not None:
+            # The text spilled to disk is reloaded once it is back.
+            self.spill.file_changed = True
+            return
+        if self.text_area.edit_modified():
+            self.status_bar.update_progress("Changed on disk")
+            return
+
+        from file_reload import Reload
+        Reload(self, self.menu.file_menu.filepath).start()
+
+
+    def _on_yscroll(self, first: str, last: str) -> None:
+        """
+        Internal function.
+
+        Update the scrollbar and anything drawn for the visible text
+        when the Text Area view changes.
+
+        """
+        self.vscroll.set(first, last)
+        self.line_numbers.on_view_change()
+        if self.highlighter is not None:
+            self.highlighter.on_view_change()
+        if self.finder is not None:
+            self.finder.on_view_change()
+
+
+    def _on_focus_in(self) -> None:
+        """
+        Internal function.
+
+        Fill a window restored from the session and give a window
+        spilled by the memory budget back its text. A single binding
+        serves both, as unbinding one binding of an event removes the
+        others with it.
+
+        """
+        self.manager.session.on_focus(self)
+        self.manager.memory_budget.touch(self)
+
+
+    def _schedule_analytics(self) -> None:
+        """
+        Internal function.
+
+        Update the statistics after ANALYTICS_DELAY, so a burst of edits
+        or a drag of the selection submits the text only once.
+
+        """
+        if self._analytics_job is None:
+            self._analytics_job = self.after(self.analytics_delay,
+                self._run_analytics)
+
+
+    def _run_analytics(self) -> None:
+        """Internal function. Submit the text to the statistics worker."""
+
+        self._analytics_job = None
+
+        # The hidden notebooks of the pool are counted once shown and a
+        # spilled window keeps the statistics of its text.
+        if self.state() != "withdrawn" and self.spill is None:
+            self.manager.analytics.submit(self)
+
+
     def _configure_traces(self) -> None:
         """Internal function. Configure the traces between widgets."""
 
         # Configure the traces to the Text Area variables tracking the
         # content changes so that the Status Bar variables can be 
         # updated.
-        self.text_area.chars.trace_add("write", 
-            lambda *args: self.status_bar.update_chars(
-                self.text_area.chars.get()))
-        self.text_area.lines.trace_add("write",
-            lambda *args: self.status_bar.update_lines(
-                self.text_area.lines.get()))
-        self.text_area.cursor.trace_add("write",
-            lambda *args: self.status_bar.update_cursor(
-                self.text_area.cursor.get()))
-
-        # Trace for the filetype variable
-        self.menu.file_menu.filetype.trace_add("write",
-            lambda *args: self.status_bar.update_filetype(
-                self.menu.file_menu.filetype.get()))  
\ No newline at end of file
+        self.text_area.chars.trace_add("write", self._trace_chars)
+        self.text_area.lines.trace_add("write", self._trace_lines)
+        self.text_area.cursor.trace_add("write", self._trace_cursor)
+        self.text_area.long_lines.trace_add("write", self._trace_long_lines)
+
+        # Trace for the filetype and encoding variables
+        self.menu.file_menu.filetype.trace_add("write", self._trace_filetype)
+        self.menu.file_menu.encoding.trace_add("write", self._trace_encoding)
+        self.status_bar.update_encoding(self.menu.file_menu.encoding.get())
+
+
+    @timed("trace.chars")
+    def _trace_chars(self, *args) -> None:
+        """Internal function. Show the char count in the Status Bar."""
+        self.status_bar.update_chars(self.text_area.chars.get())
+
+
+    @timed("trace.lines")
+    def _trace_lines(self, *args) -> None:
+        """Internal function. Show the line count in the Status Bar."""
+        self.status_bar.update_lines(self.text_area.lines.get())
+
+
+    @timed("trace.cursor")
+    def _trace_cursor(self, *args) -> None:
+        """Internal function. Show the cursor in the Status Bar."""
+        self.status_bar.update_cursor(self.text_area.cursor.get())
+
+
+    @timed("trace.long_lines")
+    def _trace_long_lines(self, *args) -> None:
+        """
+        Internal function. Show long line mode in the Status Bar and
+        stop highlighting while it is active.
+
+        """
+        self.status_bar.update_long_lines(self.text_area.long_lines.get())
+        if self.highlighter is not None:
+            self._trace_filetype()
+
+
+    @timed("trace.encoding")
+    def _trace_encoding(self, *args) -> None:
+        """Internal function. Show the encoding in the Status Bar."""
+        self.status_bar.update_encoding(self.menu.file_menu.encoding.get())
+        self._schedule_analytics()
+
+
+    @timed("trace.filetype")
+    def _trace_filetype(self, *args) -> None:
+        """
+        Internal function. Show the filetype in the Status Bar and
+        highlight the text for it.
+
+        """
+        filetype = self.menu.file_menu.filetype.get()
+        self.status_bar.update_filetype(filetype)
+        self.journal.filetype = filetype
+
+        # Lexing whole lines would undo long line mode, so the text is
+        # highlighted as plain text.
+        if self.text_area.long_lines.get():
+            filetype = "Text File"
+
+        # The highlighter is only created, and imported, once the text
+        # is something other than plain text.
+        if self.highlighter is None:
+            if filetype == "Text File":
+                return
+            from syntax_highlight import Highlighter
+            self.highlighter = Highlighter(self)
+        self.highlighter.set_language(filetype)
@@ -0,0 +1,515 @@
+import bisect
+import queue
+import re
+import threading
+import tkinter as tk
+from array import array
+from typing import Callable, Iterator
+
+from document import Document
+
+
+
+
+def compile_pattern(pattern: str, regex: bool, match_case: bool) -> re.Pattern:
+    """
+    Return the compiled search PATTERN.
+
+    The pattern is searched for literally unless REGEX is True. Raises
+    re.error if a regular expression is not valid.
+
+    """
+    if not regex:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, 0 if match_case else re.IGNORECASE)
+
+
+def _matches(pattern: re.Pattern, text: str) -> Iterator[re.Match]:
+    """
+    Internal function.
+
+    Return the matches of PATTERN in TEXT. Empty matches are skipped as
+    there is nothing to select, highlight or replace.
+
+    """
+    for match in pattern.finditer(text):
+        if match.end() != match.start():
+            yield match
+
+
+
+
+class Search:
+    """
+    A search of a document snapshot on a worker thread.
+
+    Matches are passed back to the main loop in batches of start and end
+    offsets through a queue, ending with None. A search which is no
+    longer needed is cancelled so a new one can start straight away.
+
+    """
+
+    batch_size = 4096                          # matches per batch
+
+
+    def __init__(self, document: Document, pattern: re.Pattern):
+        self.document = document
+        self.pattern = pattern
+        self.results = queue.Queue()
+
+        self._cancelled = threading.Event()
+        self._worker = threading.Thread(target=self._search, daemon=True)
+
+
+    def start(self) -> None:
+        """Start searching."""
+        self._worker.start()
+
+
+    def cancel(self) -> None:
+        """Stop searching."""
+        self._cancelled.set()
+
+
+    def _search(self) -> None:
+        """Internal function. Find the matches in the document."""
+        text = self.document.get()
+        starts = array("q")
+        ends = array("q")
+        for match in _matches(self.pattern, text):
+            starts.append(match.start())
+            ends.append(match.end())
+            if len(starts) == self.batch_size:
+                if self._cancelled.is_set():
+                    return
+                self.results.put((starts, ends))
+                starts = array("q")
+                ends = array("q")
+        self.results.put((starts, ends))
+        self.results.put(None)
+
+
+
+
+class ReplaceAll:
+    """
+    A replacement of every match in a document snapshot on a worker
+    thread.
+
+    The matches are the same as those of a search. The result is passed
+    back to the main loop through a queue as the offsets of the first
+    and the last match, the text to put between them and the number of
+    matches replaced, so it can be applied as a single edit. An invalid
+    group reference in the replacement is passed back instead.
+
+    """
+
+    batch_size = 4096                          # matches between cancel checks
+
+
+    def __init__(self, document: Document, pattern: re.Pattern,
+            replacement: str, regex: bool):
+        self.document = document
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = regex
+        self.results = queue.Queue()
+
+        self._cancelled = threading.Event()
+        self._worker = threading.Thread(target=self._replace, daemon=True)
+
+
+    def start(self) -> None:
+        """Start replacing."""
+        self._worker.start()
+
+
+    def cancel(self) -> None:
+        """Stop replacing."""
+        self._cancelled.set()
+
+
+    def _replace(self) -> None:
+        """Internal function. Build the replaced text."""
+        text = self.document.get()
+        pieces = []
+        first = last = None
+        count = 0
+        try:
+            for match in _matches(self.pattern, text):
+                if first is None:
+                    first = match.start()
+                else:
+                    pieces.append(text[last:match.start()])
+                pieces.append(match.expand(self.replacement)
+                    if self.regex else self.replacement)
+                last = match.end()
+                count += 1
+                if count % self.batch_size == 0 and self._cancelled.is_set():
+                    return
+        except re.error as error:
+            self.results.put(error)
+            return
+        self.results.put((first, last, "".join(pieces), count))
+
+
+
+
+class Finder:
+    """
+    Find and replace for the Text Area of a notebook.
+
+    The matches of the current search are kept as sorted arrays of
+    offsets. Only the matches in the visible part of the text, plus a
+    margin, are given the found tag. The tags are moved as the view
+    scrolls, so a search with a very large number of matches only ever
+    tags a screenful of them.
+
+    """
+
+    margin = 50                                # lines highlighted off screen
+    refresh_delay = 300                        # ms after an edit to search again
+
+
+    def __init__(self, notebook: tk.Toplevel):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.pattern: re.Pattern | None = None
+        self.regex = False                     # the pattern is a regex
+        self.starts = array("q")               # start offsets of the matches
+        self.ends = array("q")                 # end offsets of the matches
+        self.searching = False                 # the search is still running
+        self.replacing = False                 # a replace all is running
+        self.on_update: Callable[[], None] | None = None
+        self.on_replaced: Callable[[int, re.error | None], None] | None = None
+
+        self._search = None
+        self._replace = None                   # the running replace all
+        self._replace_job = None               # pending replace poll after id
+        self._job = None                       # pending poll after id
+        self._refresh_job = None               # pending search after an edit
+        self._highlighted = None               # offsets of the tagged range
+
+        self.text_area.tag_configure("found", background="#fff3a0")
+        self.text_area.tag_raise(tk.SEL)
+        self.text_area.edit_listeners.append(self._on_edit)
+
+
+    @property
+    def count(self) -> int:
+        """The number of matches found so far."""
+        return len(self.starts)
+
+
+    def find(self, pattern: str, regex: bool = False,
+            match_case: bool = False) -> None:
+        """
+        Search the text for PATTERN.
+
+        Raises re.error if a regular expression is not valid.
+
+        """
+        self.pattern = compile_pattern(pattern, regex, match_case)
+        self.regex = regex
+        self._restart()
+
+
+    def clear(self) -> None:
+        """End the search and remove its highlighting."""
+        self.pattern = None
+        self._stop()
+        self._stop_replace()
+        self.starts = array("q")
+        self.ends = array("q")
+        self.text_area.tag_remove("found", "1.0", "end")
+        self._highlighted = None
+
+
+    def find_next(self, backwards: bool = False) -> bool:
+        """
+        Select the next match after the insertion cursor.
+
+        The search wraps around the end of the text. Returns False if
+        nothing has been found.
+
+        """
+        if not self.starts:
+            return False
+
+        cursor = self.text_area.offset(tk.INSERT)
+        if backwards:
+            # The match before the start of the current selection.
+            if self.text_area.tag_ranges(tk.SEL):
+                cursor = self.text_area.offset(tk.SEL_FIRST)
+            i = bisect.bisect_left(self.starts, cursor) - 1
+        else:
+            i = bisect.bisect_left(self.starts, cursor)
+            if i == len(self.starts):
+                i = 0
+        self._select(i % len(self.starts))
+        return True
+
+
+    def replace(self, replacement: str) -> bool:
+        """
+        Replace the selected match with REPLACEMENT and find the next.
+
+        If the selection is not a match only the next match is found.
+
+        """
+        if self.pattern is None:
+            return False
+
+        selection = self.text_area.tag_ranges(tk.SEL)
+        if selection:
+            start = self.text_area.offset(selection[0])
+            end = self.text_area.offset(selection[1])
+            i = bisect.bisect_left(self.starts, start)
+            if i < len(self.starts) and self.starts[i] == start \
+                    and self.ends[i] == end:
+                text = self._expand(replacement, start, end)
+                if text is not None:
+                    self.text_area.replace(selection[0], selection[1], text)
+                    self.text_area.mark_set(tk.INSERT,
+                        self.text_area.index_of(start + len(text)))
+
+        return self.find_next()
+
+
+    def replace_all(self, replacement: str) -> None:
+        """
+        Replace every match with REPLACEMENT.
+
+        The replaced text is built from a snapshot on a worker thread
+        and applied as one edit, covering the first to the last match,
+        so the replacements are undone together. ON_REPLACED is called
+        with the number of replacements, or with the error if the
+        replacement of a regular expression is not valid. If the text
+        is edited in the meantime the replacement starts again.
+
+        """
+        if self.pattern is None:
+            return
+
+        self._stop_replace()
+        self._replace = ReplaceAll(self.text_area.document.snapshot(),
+            self.pattern, replacement, self.regex)
+        self._replace_revision = self.text_area.revision
+        self._replace_text = replacement
+        self._replace.start()
+        self.replacing = True
+        self._replace_job = self.notebook.after(10, self._poll_replace)
+
+
+    def _poll_replace(self) -> None:
+        """Internal function. Apply the replace all once it is built."""
+
+        self._replace_job = None
+        try:
+            result = self._replace.results.get_nowait()
+        except queue.Empty:
+            self._replace_job = self.notebook.after(20, self._poll_replace)
+            return
+
+        # The offsets only hold for the text the snapshot was taken of.
+        if self.text_area.revision != self._replace_revision:
+            self.replace_all(self._replace_text)
+            return
+
+        self._replace = None
+        self.replacing = False
+        if isinstance(result, re.error):
+            if self.on_replaced:
+                self.on_replaced(0, result)
+            return
+
+        first, last, text, count = result
+        if count:
+            self.text_area.edit_separator()
+            self.text_area.replace(self.text_area.index_of(first),
+                self.text_area.index_of(last), text)
+            self.text_area.edit_separator()
+        if self.on_replaced:
+            self.on_replaced(count, None)
+
+
+    def _stop_replace(self) -> None:
+        """Internal function. Cancel the running replace all."""
+
+        if self._replace_job is not None:
+            self.notebook.after_cancel(self._replace_job)
+            self._replace_job = None
+        if self._replace is not None:
+            self._replace.cancel()
+            self._replace = None
+        self.replacing = False
+
+
+    def _expand(self, replacement: str, start: int, end: int) -> str | None:
+        """
+        Internal function.
+
+        Return REPLACEMENT for the match from START to END, with group
+        references expanded for a regular expression. Returns None if
+        the text there no longer matches.
+
+        """
+        document = self.text_area.document
+
+        # Match against the whole lines holding the match so anchors and
+        # look arounds within the lines still see their context.
+        line_start = document.line_start(document.line_of(start))
+        line_end = document.line_end(document.line_of(end))
+        match = self.pattern.match(document.get(line_start, line_end),
+            start - line_start)
+        if match is None or match.end() != end - line_start:
+            return None
+        return match.expand(replacement) if self.regex else replacement
+
+
+    def on_view_change(self) -> None:
+        """Move the highlighting to the matches now in view."""
+        if self.starts:
+            self._highlight()
+
+
+    def _restart(self) -> None:
+        """Internal function. Start a new search of the current text."""
+
+        self._stop()
+        self.starts = array("q")
+        self.ends = array("q")
+        self.text_area.tag_remove("found", "1.0", "end")
+        self._highlighted = None
+
+        self._search = Search(self.text_area.document.snapshot(), self.pattern)
+        self._search.start()
+        self.searching = True
+        self._job = self.notebook.after(10, self._poll)
+
+
+    def _stop(self) -> None:
+        """Internal function. Cancel the running search."""
+
+        for job in (self._job, self._refresh_job):
+            if job is not None:
+                self.notebook.after_cancel(job)
+        self._job = self._refresh_job = None
+
+        if self._search is not None:
+            self._search.cancel()
+            self._search = None
+        self.searching = False
+
+
+    def _poll(self) -> None:
+        """Internal function. Collect the matches found so far."""
+
+        self._job = None
+        found = False
+        while True:
+            try:
+                batch = self._search.results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self.searching = False
+                break
+            self.starts.extend(batch[0])
+            self.ends.extend(batch[1])
+            found = True
+
+        if found:
+            self._highlight()
+        if self.on_update:
+            self.on_update()
+        if self.searching:
+            self._job = self.notebook.after(20, self._poll)
+
+
+    def _on_edit(self, offset: int, removed: str, inserted: str) -> None:
+        """
+        Internal function.
+
+        Search again shortly after the text has been edited. Until then
+        the matches after the edit are moved by the change in length and
+        those it overlaps are dropped, so a replace followed straight
+        away by another still finds the next match where it is now.
+
+        """
+        if self.pattern is None:
+            return
+        if not self.searching:
+            self._shift(offset, len(removed), len(inserted))
+        if self._refresh_job is not None:
+            self.notebook.after_cancel(self._refresh_job)
+        self._refresh_job = self.notebook.after(self.refresh_delay,
+            self._restart)
+
+
+    def _shift(self, offset: int, removed: int, inserted: int) -> None:
+        """
+        Internal function.
+
+        Update the matches for an edit replacing REMOVED chars at OFFSET
+        with INSERTED chars.
+
+        """
+        # The matches do not overlap so both arrays are sorted. The
+        # first dropped match ends after OFFSET, the first kept one
+        # starts at or after the end of the removed text.
+        first = bisect.bisect_right(self.ends, offset)
+        last = bisect.bisect_left(self.starts, offset + removed)
+        delta = inserted - removed
+        if first == last and delta == 0:
+            return
+        self.starts[first:] = array("q", map(delta.__add__,
+            self.starts[last:]))
+        self.ends[first:] = array("q", map(delta.__add__, self.ends[last:]))
+        self._highlighted = None
+
+
+    def _visible_range(self) -> tuple[int, int]:
+        """
+        Internal function.
+
+        Return the offsets of the visible text extended by the margin.
+
+        """
+        document = self.text_area.document
+        top = int(self.text_area.index("@0,0").split(".")[0]) - 1
+        bottom = int(self.text_area.index(
+            f"@0,{self.text_area.winfo_height()}").split(".")[0]) - 1
+        return (document.line_start(top - self.margin),
+            document.line_end(bottom + self.margin))
+
+
+    def _highlight(self) -> None:
+        """Internal function. Tag the matches in the visible range."""
+
+        start, end = self._visible_range()
+        if self._highlighted == (start, end, len(self.starts)):
+            return
+
+        first = bisect.bisect_left(self.ends, start + 1)
+        last = bisect.bisect_left(self.starts, end)
+        indices = []
+        for i in range(first, last):
+            indices.append(self.text_area.index_of(self.starts[i]))
+            indices.append(self.text_area.index_of(self.ends[i]))
+
+        self.text_area.tag_remove("found", "1.0", "end")
+        if indices:
+            self.text_area.tag_add("found", *indices)
+        self._highlighted = (start, end, len(self.starts))
+
+
+    def _select(self, i: int) -> None:
+        """Internal function. Select match I and scroll it into view."""
+        start = self.text_area.index_of(self.starts[i])
+        end = self.text_area.index_of(self.ends[i])
+        self.text_area.tag_remove(tk.SEL, "1.0", "end")
+        self.text_area.tag_add(tk.SEL, start, end)
+        self.text_area.mark_set(tk.INSERT, end)
+        self.text_area.see(start)
+        self._highlight()
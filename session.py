@@ -0,0 +1,304 @@
+import json
+import os
+import tempfile
+import time
+import tkinter as tk
+import zipfile
+from pathlib import Path
+
+import instrumentation
+from document_stats import longest_line
+from file_encoding import TextFormat
+
+
+
+
+class Session:
+    """
+    Saves the open windows on quit and restores them on the next start.
+
+    The session is a zip file holding a small JSON index with the path,
+    cursor, scroll position and geometry of every window, plus one
+    compressed member for the contents of each window with unsaved
+    changes. Windows with no unsaved changes are read back from their
+    file instead.
+
+    On restore the window which had the focus is shown and filled
+    straight away. The other windows are shown one per callback and
+    are only filled with their text when they are first focused, so
+    restoring a large session costs little more than opening its
+    windows.
+
+    """
+
+    path = Path.home() / ".notebook" / "session.zip"
+
+
+    def __init__(self, manager: tk.Tk, path: Path | None = None):
+        self.manager = manager
+        if path is not None:
+            self.path = path
+        self.restoring = False                 # windows are still being opened
+        self.pending = {}                      # window states not yet loaded
+
+        self._archive = None                   # the zip restored from
+        self._fill_on_focus = False            # pending windows fill on focus
+        self._notebook_count = 1               # window count of the session
+        self._job = None                       # pending window open after id
+
+
+    def save(self) -> None:
+        """Save the state of every open window."""
+
+        windows = []
+        contents = {}
+        focus = self.manager.focus_get()
+        focused = focus.winfo_toplevel() if focus is not None else None
+
+        for name, notebook in self.manager.notebooks.items():
+            if notebook in self.pending:
+                # A window which was never focused keeps the state it
+                # was restored with.
+                state = dict(self.pending[notebook], name=name)
+                data = None
+                if state["contents"] is not None:
+                    data = self._archive.read(state["contents"])
+            else:
+                state = self._window_state(name, notebook)
+                data = None
+                if state["contents"] is not None and self._spilled(notebook):
+                    data = notebook.spill.read()
+                elif state["contents"] is not None:
+                    data = notebook.text_area.document.get().encode("utf-8")
+
+            if data is not None:
+                state["contents"] = f"contents/{len(contents)}"
+                contents[state["contents"]] = data
+            state["geometry"] = notebook.geometry()
+            state["focused"] = notebook is focused
+            windows.append(state)
+
+        index = {"notebook_count": self.manager.notebook_count,
+            "windows": windows}
+
+        # Write next to the session and rename into place so an
+        # interrupted save keeps the last session.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent,
+            prefix=".session-")
+        try:
+            with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w",
+                    compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("session.json", json.dumps(index))
+                for member, data in contents.items():
+                    archive.writestr(member, data)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+    def _spilled(self, notebook: tk.Toplevel) -> bool:
+        """Internal function. Return True if NOTEBOOK's text is on disk."""
+        return notebook.spill is not None and notebook.spill.spilled
+
+
+    def _window_state(self, name: str, notebook: tk.Toplevel) -> dict:
+        """
+        Internal function.
+
+        Return the state of window NOTEBOOK. The contents are left as
+        None if the text can be read back from the file, otherwise they
+        are set to True to be saved with the session.
+
+        """
+        text_area = notebook.text_area
+        file_menu = notebook.menu.file_menu
+        modified = bool(text_area.edit_modified())
+        cursor = text_area.index(tk.INSERT)
+        scroll = text_area.yview()[0]
+
+        # A window spilled to disk is saved as it was before.
+        if self._spilled(notebook):
+            cursor = notebook.spill.cursor
+            scroll = notebook.spill.scroll
+
+        # A file still loading is opened again from the file.
+        if notebook.loader is not None:
+            filepath = notebook.loader.filepath
+            unsaved = False
+        else:
+            filepath = file_menu.filepath
+            unsaved = modified or filepath is None
+
+        return {
+            "name": name,
+            "filepath": str(filepath) if filepath is not None else None,
+            "filetype": file_menu.filetype.get(),
+            "format": file_menu.text_format.to_dict(),
+            "contents": True if unsaved else None,
+            "modified": modified,
+            "cursor": cursor,
+            "scroll": scroll,
+        }
+
+
+    def clear(self) -> None:
+        """Forget the saved session."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+    def close(self) -> None:
+        """Stop restoring and close the session file."""
+        if self._job is not None:
+            self.manager.after_cancel(self._job)
+            self._job = None
+        self.restoring = False
+        self.pending.clear()
+        self._fill_on_focus = False
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+
+    def restore(self) -> bool:
+        """
+        Open the windows of the saved session. Returns False if there
+        is no session to restore.
+
+        """
+        started = time.perf_counter()
+        try:
+            self._archive = zipfile.ZipFile(self.path)
+            index = json.loads(self._archive.read("session.json"))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            self.close()
+            return False
+        windows = index["windows"]
+        if not windows:
+            self.close()
+            return False
+
+        # The focused window is opened and filled first, the rest are
+        # opened in order after it.
+        windows.sort(key=lambda state: not state["focused"])
+        focused = self._open_window(windows[0])
+        self.hydrate(focused)
+        if instrumentation.enabled:
+            focused.metrics.record("session.restore",
+                time.perf_counter() - started)
+
+        self._notebook_count = index["notebook_count"]
+        self.restoring = True
+        self._job = self.manager.after(1, self._open_next, windows[1:],
+            focused)
+        return True
+
+
+    def _open_next(self, windows: list, focused: tk.Toplevel) -> None:
+        """
+        Internal function.
+
+        Open the next of WINDOWS, then raise FOCUSED once they are all
+        open.
+
+        """
+        self._job = None
+        if windows:
+            self._open_window(windows[0])
+            self._job = self.manager.after(1, self._open_next, windows[1:],
+                focused)
+            return
+
+        self.restoring = False
+        self.manager.notebook_count = max(self.manager.notebook_count,
+            self._notebook_count)
+        if focused.winfo_exists():
+            focused.lift()
+            focused.focus_force()
+            focused.text_area.focus()
+
+        # The windows are only filled once they are focused after the
+        # restore, the window manager focuses each one as it opens.
+        self._fill_on_focus = True
+        if not self.pending:
+            self.close()
+
+
+    def _open_window(self, state: dict) -> tk.Toplevel:
+        """
+        Internal function.
+
+        Open the window for STATE. Its text is only loaded when it is
+        first focused.
+
+        """
+        notebook = self.manager.open_notebook(state["name"])
+        notebook.geometry(state["geometry"])
+        self.pending[notebook] = state
+        return notebook
+
+
+    def on_focus(self, notebook: tk.Toplevel) -> None:
+        """Fill NOTEBOOK once it is focused after the restore."""
+        if self._fill_on_focus:
+            self.hydrate(notebook)
+
+
+    def hydrate(self, notebook: tk.Toplevel) -> None:
+        """
+        Fill NOTEBOOK with its text and restore its cursor and scroll
+        position if it has not been filled yet.
+
+        """
+        state = self.pending.pop(notebook, None)
+        if state is None:
+            return
+
+        text_area = notebook.text_area
+        file_menu = notebook.menu.file_menu
+        filepath = Path(state["filepath"]) if state["filepath"] else None
+        if state["filetype"]:
+            file_menu.filetype.set(state["filetype"])
+
+        def restore_view() -> None:
+            text_area.mark_set(tk.INSERT, state["cursor"])
+            text_area.yview_moveto(state["scroll"])
+
+        if state["contents"] is None:
+            # The file had no unsaved changes so it is read again.
+            from file_loader import FileLoader
+
+            def on_complete() -> None:
+                file_menu.filepath = filepath
+                restore_view()
+
+            # A file which has since been removed leaves an empty window.
+            try:
+                FileLoader(notebook, filepath, on_complete=on_complete).start()
+            except OSError:
+                pass
+        else:
+            text = self._archive.read(state["contents"]).decode("utf-8")
+            text_area.set_long_lines(
+                longest_line(text)[0] > text_area.long_line_length)
+
+            # As with a file being loaded, neither undo nor the journal
+            # record the text put back. The journal starts again from it
+            # instead.
+            notebook.journal.suspend()
+            text_area.configure(undo=False)
+            text_area.insert("1.0", text)
+            text_area.configure(undo=True)
+            text_area.edit_reset()
+            text_area.edit_modified(state["modified"])
+            notebook.journal.rebase()
+            file_menu.filepath = filepath
+            file_menu._update_text_format(TextFormat(**state["format"]))
+            restore_view()
+
+        # Nothing more is read from the session once every window has
+        # been filled.
+        if not self.pending and not self.restoring:
+            self.close()
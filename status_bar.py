@@ -4,6 +4,17 @@ from tkinter import ttk
 
 
 
+def format_size(size: int) -> str:
+    """Return SIZE in bytes as a short readable string."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+
+
 class StatusBar(ttk.Frame):
     """A Status Bar providing updates on Text Area content."""
 
@@ -11,13 +22,19 @@ class StatusBar(ttk.Frame):
     def __init__(self, parent: tk.Toplevel):
         self.notebook = parent
         self.filetype = tk.StringVar(value="")
+        self.encoding = tk.StringVar(value="")
+        self.mode = tk.StringVar(value="")
+        self.progress = tk.StringVar(value="")
         self.chars = tk.StringVar(value="Chars 0")
         self.lines = tk.StringVar(value="Lines 1")
+        self.words = tk.StringVar(value="")
+        self.analytics = tk.StringVar(value="")
         self.cursor = tk.StringVar(value="Ln 1, Col 1, Pos 1")
+        self._values = {}                      # last value shown by each label
 
         super().__init__(parent)
         self.rowconfigure(0, weight=1)
-        self.columnconfigure((0,1,2,3,4), weight=1)
+        self.columnconfigure((0,1,2,3,4,5,6,7,8), weight=1)
 
         self._configure_widgets()
 
@@ -25,35 +42,105 @@ class StatusBar(ttk.Frame):
     def _configure_widgets(self) -> None:
         """Internal function. Configure the widgets for the Status Bar"""
 
-        # Create the labels for the document type, current line, total 
-        # lines and chars
+        # Create the labels for the document type, encoding and editing
+        # mode, current line, total lines and chars, and the statistics
+        # computed in the background
         lbl_filetype = ttk.Label(self, textvariable=self.filetype)
+        lbl_encoding = ttk.Label(self, textvariable=self.encoding)
+        lbl_mode = ttk.Label(self, textvariable=self.mode)
+        lbl_progress = ttk.Label(self, textvariable=self.progress)
         lbl_chars = ttk.Label(self, textvariable=self.chars)
         lbl_lines = ttk.Label(self, textvariable=self.lines)
+        lbl_words = ttk.Label(self, textvariable=self.words)
+        lbl_analytics = ttk.Label(self, textvariable=self.analytics)
         lbl_curpos = ttk.Label(self, textvariable=self.cursor)
 
         # Grid the labels
-        lbl_filetype.grid(row=0, column=0, columnspan=2)
-        lbl_chars.grid(row=0, column=2)
-        lbl_lines.grid(row=0, column=3)
-        lbl_curpos.grid(row=0, column=4)
+        lbl_filetype.grid(row=0, column=0)
+        lbl_encoding.grid(row=0, column=1)
+        lbl_mode.grid(row=0, column=2)
+        lbl_progress.grid(row=0, column=3)
+        lbl_chars.grid(row=0, column=4)
+        lbl_lines.grid(row=0, column=5)
+        lbl_words.grid(row=0, column=6)
+        lbl_analytics.grid(row=0, column=7)
+        lbl_curpos.grid(row=0, column=8)
+
+    
+    def _changed(self, label: str, value) -> bool:
+        """
+        Internal function.
+
+        Return True if VALUE differs from the value last shown by LABEL
+        and record it, so unchanged labels are not redrawn.
+
+        """
+        if self._values.get(label) == value:
+            return False
+        self._values[label] = value
+        return True
 
     
     def update_filetype(self, filetype: str) -> None:
         """Update the filetype label."""
-        self.filetype.set(filetype)
+        if self._changed("filetype", filetype):
+            self.filetype.set(filetype)
+
+
+    def update_encoding(self, encoding: str) -> None:
+        """Update the encoding label."""
+        if self._changed("encoding", encoding):
+            self.encoding.set(encoding)
+
+
+    def update_long_lines(self, active: bool) -> None:
+        """Show whether long line mode is active."""
+        if self._changed("mode", active):
+            self.mode.set("Long Lines" if active else "")
+
+
+    def update_progress(self, progress: str) -> None:
+        """Update the progress label of a long running task."""
+        if self._changed("progress", progress):
+            self.progress.set(progress)
 
 
     def update_chars(self, count: int) -> None:
         """Update the character count label."""
-        self.chars.set(f"Chars {count}")
+        if self._changed("chars", count):
+            self.chars.set(f"Chars {count}")
 
 
     def update_lines(self, count: int) -> None:
         """Update the line count label."""
-        self.lines.set(f"Lines {count}")
+        if self._changed("lines", count):
+            self.lines.set(f"Lines {count}")
+
+
+    def update_analytics(self, results: dict) -> None:
+        """Update the labels showing the statistics in RESULTS."""
+
+        # The counts of the selection replace the word count while
+        # there is one.
+        selection = results.get("selection")
+        if selection is not None:
+            words = "Selected {} chars, {} lines, {} words".format(*selection)
+        else:
+            words = f"Words {results['words']}"
+        if self._changed("words", words):
+            self.words.set(words)
+
+        analytics = (f"Unique {results['unique_words']}, "
+            f"Longest {results['longest_line']}, "
+            f"{results['reading_time']} min read, "
+            f"{format_size(results['disk_size'])}")
+        if results["uncompressed"]:
+            analytics += " uncompressed"
+        if self._changed("analytics", analytics):
+            self.analytics.set(analytics)
 
 
     def update_cursor(self, cursor: str) -> None:
         """Update the cursor position label."""
-        self.cursor.set(cursor)
\ No newline at end of file
+        if self._changed("cursor", cursor):
+            self.cursor.set(cursor)
\ No newline at end of file
@@ -0,0 +1,369 @@
+import re
+import time
+import tkinter as tk
+from array import array
+
+from update_scheduler import UpdateScheduler
+
+
+
+
+class Language:
+    """
+    A line based lexer for the syntax of a language.
+
+    TOKENS is a list of (tag, pattern) pairs for tokens which end on the
+    line they start on. SPANS is a list of (tag, open, close) patterns
+    for tokens such as block comments which can run over several lines.
+    Lines are lexed one at a time, starting in the state returned for
+    the line before, which is 0 outside any span or the number of the
+    span the line starts inside.
+
+    """
+
+
+    def __init__(self, tokens: list[tuple[str, str]],
+            spans: list[tuple[str, str, str]] = ()):
+        parts = [f"(?P<s{i}>{open})" for i, (_, open, _) in enumerate(spans)]
+        parts += [f"(?P<t{i}>{pattern})"
+            for i, (_, pattern) in enumerate(tokens)]
+        self.pattern = re.compile("|".join(parts))
+        self.tags = [tag for tag, _ in tokens]
+        self.spans = [(tag, re.compile(close)) for tag, _, close in spans]
+
+
+    def lex(self, line: str, state: int = 0) -> tuple[list, int]:
+        """
+        Return the tokens of LINE starting in STATE and the state at the
+        end of the line. Tokens are (tag, start, end) tuples.
+
+        """
+        tokens = []
+        pos = 0
+
+        # Finish the span left open by the line before.
+        if state:
+            tag, close = self.spans[state - 1]
+            match = close.match(line)
+            if match is None:
+                return [(tag, 0, len(line))], state
+            tokens.append((tag, 0, match.end()))
+            pos = match.end()
+
+        while True:
+            match = self.pattern.search(line, pos)
+            if match is None:
+                return tokens, 0
+            kind, i = match.lastgroup[0], int(match.lastgroup[1:])
+            if kind == "s":
+                tag, close = self.spans[i]
+                end = close.match(line, match.end())
+                if end is None:
+                    tokens.append((tag, match.start(), len(line)))
+                    return tokens, i + 1
+                pos = end.end()
+            else:
+                tag = self.tags[i]
+                pos = match.end()
+            tokens.append((tag, match.start(), pos))
+
+            # Never loop on an empty match.
+            if pos == match.start():
+                pos += 1
+
+
+def _words(*words: str) -> str:
+    """Internal function. Return a pattern matching any of WORDS."""
+    return rf"\b(?:{'|'.join(words)})\b"
+
+
+PYTHON = Language(
+    tokens=[
+        ("comment", r"#.*"),
+        ("string", r"\b[rRbBuUfF]{1,2}(?:\"(?:\\.|[^\"\\])*\"?"
+            r"|'(?:\\.|[^'\\])*'?)"),
+        ("string", r"\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?"),
+        ("definition", r"(?:(?<=\bdef )|(?<=\bclass ))[A-Za-z_]\w*"),
+        ("decorator", r"^\s*@[\w.]+"),
+        ("keyword", _words("False", "None", "True", "and", "as", "assert",
+            "async", "await", "break", "class", "continue", "def", "del",
+            "elif", "else", "except", "finally", "for", "from", "global",
+            "if", "import", "in", "is", "lambda", "nonlocal", "not", "or",
+            "pass", "raise", "return", "try", "while", "with", "yield")),
+        ("builtin", _words("abs", "all", "any", "bool", "bytes", "dict",
+            "enumerate", "filter", "float", "getattr", "hasattr", "int",
+            "isinstance", "iter", "len", "list", "map", "max", "min",
+            "next", "object", "open", "print", "range", "repr", "reversed",
+            "self", "set", "setattr", "sorted", "str", "sum", "super",
+            "tuple", "type", "zip")),
+        ("number", r"\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*\.?[\d_]*"
+            r"(?:[eE][+-]?\d+)?j?)"),
+    ],
+    spans=[
+        ("string", r"(?:\b[rRbBuUfF]{1,2})?\"\"\"", r"(?:\\.|[^\\])*?\"\"\""),
+        ("string", r"(?:\b[rRbBuUfF]{1,2})?'''", r"(?:\\.|[^\\])*?'''"),
+    ])
+
+
+_C_TOKENS = [
+    ("comment", r"//.*"),
+    ("preprocessor", r"^\s*#\s*\w+"),
+    ("string", r"\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?"),
+    ("number", r"\b(?:0[xX][\da-fA-F]+|\d+\.?\d*(?:[eE][+-]?\d+)?)"
+        r"[uUlLfF]*"),
+]
+
+_C_KEYWORDS = ("auto", "break", "case", "char", "const", "continue",
+    "default", "do", "double", "else", "enum", "extern", "float", "for",
+    "goto", "if", "inline", "int", "long", "register", "restrict",
+    "return", "short", "signed", "sizeof", "static", "struct", "switch",
+    "typedef", "union", "unsigned", "void", "volatile", "while", "NULL")
+
+_C_SPANS = [("comment", r"/\*", r".*?\*/")]
+
+C = Language(
+    tokens=_C_TOKENS + [("keyword", _words(*_C_KEYWORDS))],
+    spans=_C_SPANS)
+
+CPP = Language(
+    tokens=_C_TOKENS + [("keyword", _words(*_C_KEYWORDS, "bool", "catch",
+        "class", "constexpr", "delete", "false", "friend", "namespace",
+        "new", "noexcept", "nullptr", "operator", "override", "private",
+        "protected", "public", "template", "this", "throw", "true", "try",
+        "typename", "using", "virtual"))],
+    spans=_C_SPANS)
+
+# The languages by the filetype shown in the File menu. Plain text files
+# are not highlighted.
+LANGUAGES = {
+    "Python Source File": PYTHON,
+    "C Source File": C,
+    "C++ Source File": CPP,
+}
+
+COLOURS = {
+    "comment": "#8c8c8c",
+    "string": "#067d17",
+    "keyword": "#0033b3",
+    "builtin": "#000080",
+    "definition": "#00627a",
+    "decorator": "#9e880d",
+    "preprocessor": "#9e880d",
+    "number": "#1750eb",
+}
+
+
+
+
+class Highlighter:
+    """
+    Syntax highlighting for the Text Area of a notebook.
+
+    The lexer state at the start of every line is cached. An edit only
+    marks the lines it touched as dirty, and they are lexed again from
+    the first dirty line until the state at the start of a line after
+    the edit is the same as the cached state, as nothing after that
+    point can have changed. Only the lines in view, plus a margin, are
+    lexed on demand and tagged, so the cost of a refresh does not depend
+    on the length of the file. The rest of the file is lexed a batch at
+    a time while the window is idle.
+
+    """
+
+    margin = 20                                # lines tagged off screen
+    batch_time = 4                             # ms spent lexing when idle
+    batch_lines = 256                          # lines read from the document
+
+
+    def __init__(self, notebook: tk.Toplevel):
+        self.notebook = notebook
+        self.text_area = notebook.text_area
+        self.language: Language | None = None
+        self.states = array("b")               # lexer state of every line
+        self.updates = UpdateScheduler(self.text_area, self._refresh)
+
+        self._dirty_first = None               # first line to lex again
+        self._dirty_last = None                # last line changed by edits
+        self._tagged = None                    # lines and revision tagged
+        self._job = None                       # pending idle lexing after id
+
+        for tag, colour in COLOURS.items():
+            self.text_area.tag_configure(f"syntax.{tag}", foreground=colour)
+        self.text_area.tag_raise(tk.SEL)
+        self.text_area.mark_set("syntax.first", "1.0")
+        self.text_area.mark_gravity("syntax.first", "left")
+        self.text_area.mark_set("syntax.last", "1.0")
+        self.text_area.edit_listeners.append(self._on_edit)
+
+
+    def set_language(self, filetype: str) -> None:
+        """Highlight the text as the language of FILETYPE."""
+
+        language = LANGUAGES.get(filetype)
+        if language is self.language:
+            return
+        self.language = language
+        self._clear_tags()
+
+        # Every line has to be lexed again in the new language.
+        line_count = self.text_area.document.line_count
+        self.states = array("b", [-1]) * line_count
+        self.states[0] = 0
+        self._dirty_first = 0
+        self._dirty_last = line_count - 1
+        self.updates.mark("view")
+
+
+    def on_view_change(self) -> None:
+        """Tag the lines now in view."""
+        if self.language is not None:
+            self.updates.mark("view")
+
+
+    def cancel(self) -> None:
+        """Stop all pending highlighting work."""
+        self.updates.cancel()
+        if self._job is not None:
+            self.text_area.after_cancel(self._job)
+            self._job = None
+
+
+    def _on_edit(self, offset: int, removed: str, inserted: str) -> None:
+        """
+        Internal function.
+
+        Mark the lines touched by the edit as dirty. The cached states of
+        the lines after the edit are kept and moved with their lines.
+
+        """
+        if self.language is None:
+            return
+
+        line = self.text_area.document.line_of(offset)
+        removed_lines = removed.count("\n")
+        inserted_lines = inserted.count("\n")
+        self.states[line + 1:line + 1 + removed_lines] = \
+            array("b", [-1]) * inserted_lines
+
+        # Dirty lines after this edit move with it, those which were
+        # removed are now covered by it. The cached states from the
+        # first dirty line on are out of date, so the lexing can only
+        # converge after it.
+        shift = inserted_lines - removed_lines
+        first, last = line, line + inserted_lines
+        if self._dirty_first is not None:
+            def moved(dirty: int) -> int:
+                if dirty > line + removed_lines:
+                    return dirty + shift
+                return min(dirty, last)
+            first = min(first, moved(self._dirty_first))
+            last = max(last, moved(self._dirty_first),
+                moved(self._dirty_last))
+        self._dirty_first, self._dirty_last = first, last
+
+        self.updates.mark("view")
+
+
+    def _lex(self, stop: int, deadline: float | None = None) -> None:
+        """
+        Internal function.
+
+        Lex the dirty lines up to line STOP, or until DEADLINE, caching
+        the state at the start of each line.
+
+        """
+        document = self.text_area.document
+        states = self.states
+        line = self._dirty_first
+        while line is not None and line <= stop:
+            end = min(line + self.batch_lines, len(states))
+            text = document.get(document.line_start(line),
+                document.line_end(end - 1))
+            for line_text in text.split("\n"):
+                _, state = self.language.lex(line_text, states[line])
+                line += 1
+
+                # The state has converged once it matches the cached state
+                # of a line the edits did not touch.
+                if line == len(states) or (line > self._dirty_last
+                        and states[line] == state):
+                    self._dirty_first = self._dirty_last = line = None
+                    break
+                states[line] = state
+                if line > stop:
+                    break
+            else:
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+        if line is not None:
+            self._dirty_first = line
+
+
+    def _visible_lines(self) -> tuple[int, int]:
+        """
+        Internal function.
+
+        Return the first and last visible lines extended by the margin.
+
+        """
+        top = int(self.text_area.index("@0,0").split(".")[0]) - 1
+        bottom = int(self.text_area.index(
+            f"@0,{self.text_area.winfo_height()}").split(".")[0]) - 1
+        return (max(top - self.margin, 0),
+            min(bottom + self.margin, len(self.states) - 1))
+
+
+    def _clear_tags(self) -> None:
+        """Internal function. Remove the tags from the tagged lines."""
+        for tag in COLOURS:
+            self.text_area.tag_remove(f"syntax.{tag}",
+                "syntax.first", "syntax.last")
+        self._tagged = None
+
+
+    def _refresh(self, dirty: set) -> None:
+        """Internal function. Lex and tag the lines in view."""
+
+        if self.language is None:
+            return
+
+        first, last = self._visible_lines()
+        self._lex(last)
+        if self._tagged != (first, last, self.text_area.revision):
+            self._tag(first, last)
+
+        # Lex the rest of the file in the background.
+        if self._dirty_first is not None and self._job is None:
+            self._job = self.text_area.after(10, self._lex_idle)
+
+
+    def _tag(self, first: int, last: int) -> None:
+        """Internal function. Tag the tokens from line FIRST to LAST."""
+
+        document = self.text_area.document
+        text = document.get(document.line_start(first), document.line_end(last))
+        indices = {tag: [] for tag in COLOURS}
+        for line, line_text in enumerate(text.split("\n"), first + 1):
+            tokens, _ = self.language.lex(line_text, self.states[line - 1])
+            for tag, start, end in tokens:
+                indices[tag] += (f"{line}.{start}", f"{line}.{end}")
+
+        self._clear_tags()
+        self.text_area.mark_set("syntax.first", f"{first + 1}.0")
+        self.text_area.mark_set("syntax.last", f"{last + 1}.end")
+        for tag, tag_indices in indices.items():
+            if tag_indices:
+                self.text_area.tag_add(f"syntax.{tag}", *tag_indices)
+        self._tagged = (first, last, self.text_area.revision)
+
+
+    def _lex_idle(self) -> None:
+        """Internal function. Lex a batch of the remaining dirty lines."""
+
+        self._job = None
+        if self.language is None or self._dirty_first is None:
+            return
+        self._lex(len(self.states),
+            time.perf_counter() + self.batch_time / 1000)
+        if self._dirty_first is not None:
+            self._job = self.text_area.after(10, self._lex_idle)
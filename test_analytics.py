@@ -0,0 +1,60 @@
+import gzip
+
+from analytics import DiskSize, LongestLine, UniqueWords
+from file_encoding import TextFormat
+
+
+TEXT = "Naïve words, more WORDS\nand naïve text\n\nend"
+
+
+
+
+def _measure(metric, text: str, size: int, **request) -> dict:
+    """Return the result of METRIC fed TEXT in chunks of SIZE chars."""
+    request = {"text_format": TextFormat(), "modified": True,
+        "filepath": None, **request}
+    instance = metric(request)
+    for i in range(0, len(text), size):
+        instance.feed(text[i:i + size])
+    return instance.result()
+
+
+def test_unique_words_across_chunks():
+    # Words cut between chunks are counted once, and whole.
+    for size in (1, 2, 3, 5, len(TEXT)):
+        assert _measure(UniqueWords, TEXT, size) == {"unique_words": 6}
+    assert _measure(UniqueWords, "word word", 3) == {"unique_words": 1}
+    assert _measure(UniqueWords, "", 1) == {"unique_words": 0}
+
+
+def test_longest_line_across_chunks():
+    for size in (1, 4, len(TEXT)):
+        assert _measure(LongestLine, TEXT, size) == {"longest_line": 23}
+
+
+def test_disk_size_matches_saved_file():
+    # The saver writes a byte order mark and a final newline.
+    text_format = TextFormat("utf-16-le", bom=True, newline="\r\n")
+    saved = ("\ufeff" + TEXT + "\n").replace("\n", "\r\n")
+    for size in (1, 7, len(TEXT)):
+        assert _measure(DiskSize, TEXT, size, text_format=text_format) \
+            == {"disk_size": len(saved.encode("utf-16-le")),
+                "uncompressed": False}
+
+    text_format = TextFormat("utf-8", bom=True, newline="\r\n")
+    assert _measure(DiskSize, "é\n", 1, text_format=text_format) \
+        == {"disk_size": 3 + 2 + 4, "uncompressed": False}
+
+
+def test_disk_size_of_compressed_file(tmp_path):
+    path = tmp_path / "file.txt.gz"
+    path.write_bytes(gzip.compress(b"text\n"))
+    text_format = TextFormat(compression="gzip")
+
+    # An unmodified file is as large as on disk, a modified one is only
+    # known uncompressed.
+    assert _measure(DiskSize, "text", 4, text_format=text_format,
+        modified=False, filepath=path) \
+        == {"disk_size": path.stat().st_size, "uncompressed": False}
+    assert _measure(DiskSize, "text", 4, text_format=text_format,
+        filepath=path) == {"disk_size": 5, "uncompressed": True}
@@ -0,0 +1,85 @@
+import csv
+import gzip
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import batch_stats
+from document_stats import DocumentStats
+
+
+
+
+def _files(directory: Path) -> list[str]:
+    (directory / "sub").mkdir()
+    (directory / "a.txt").write_bytes(b"one two\r\nthree\r\n")
+    (directory / "sub" / "b.txt.gz").write_bytes(
+        gzip.compress("café \tau lait".encode("utf-16")))
+    (directory / "sub" / "c.txt").write_bytes(b"")
+    return batch_stats.expand([str(directory)])
+
+
+def test_file_stats_match_document_stats(tmp_path):
+    a, b, c = _files(tmp_path)
+    for path, text, encoding in ((a, "one two\nthree\n", "UTF-8 (CRLF)"),
+            (b, "café \tau lait", "UTF-16 LE with BOM (LF), gzip"),
+            (c, "", "UTF-8 (LF)")):
+        stats = batch_stats.file_stats(path)
+        expected = DocumentStats(text)
+        assert stats["encoding"] == encoding
+        assert stats["chars"] == expected.chars
+        assert stats["lines"] == expected.lines
+        assert stats["words"] == expected.words
+    assert batch_stats.file_stats(a)["bytes"] == 16
+
+
+def test_unreadable_file(tmp_path):
+    path = str(tmp_path / "missing.txt")
+    stats = batch_stats.file_stats(path)
+    assert stats["path"] == path and "error" in stats
+
+
+def test_expand(tmp_path):
+    paths = _files(tmp_path)
+    assert paths == [str(tmp_path / "a.txt"),
+        str(tmp_path / "sub" / "b.txt.gz"), str(tmp_path / "sub" / "c.txt")]
+    assert batch_stats.expand(["missing"]) == ["missing"]
+
+
+def test_run_json(tmp_path):
+    paths = _files(tmp_path) + [str(tmp_path / "missing.txt")]
+    output = io.StringIO()
+    assert batch_stats.run(paths, "json", output, jobs=2) == 1
+    results = json.loads(output.getvalue())
+    assert [result["path"] for result in results] == paths
+    assert results[0] == batch_stats.file_stats(paths[0])
+
+
+def test_run_empty():
+    output = io.StringIO()
+    assert batch_stats.run([], "json", output, jobs=1) == 0
+    assert json.loads(output.getvalue()) == []
+
+
+def test_run_csv(tmp_path):
+    paths = _files(tmp_path)
+    output = io.StringIO()
+    assert batch_stats.run(paths, "csv", output, jobs=1) == 0
+    rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+    assert [row["path"] for row in rows] == paths
+    assert rows[0]["words"] == str(batch_stats.file_stats(paths[0])["words"])
+
+
+def test_main_stats(tmp_path):
+    # The statistics are counted without a display or Tk.
+    _files(tmp_path)
+    code = ("import sys, runpy\n"
+        "sys.modules['tkinter'] = None\n"
+        "sys.argv = ['main.py', '--stats', sys.argv[1], '--jobs', '1']\n"
+        "runpy.run_path('main.py', run_name='__main__')\n")
+    result = subprocess.run([sys.executable, "-c", code, str(tmp_path)],
+        capture_output=True, text=True, cwd=Path(__file__).parent)
+    assert result.returncode == 0, result.stderr
+    assert len(json.loads(result.stdout)) == 3
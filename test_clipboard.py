@@ -0,0 +1,93 @@
+import sys
+import types
+
+from clipboard import ClipboardRing, Paste
+
+
+
+
+class TextArea:
+    """Records the calls a paste makes to the Text Area."""
+
+
+    def __init__(self):
+        self.calls = []
+        self.autoseparators = True
+
+
+    def cget(self, option: str):
+        return self.autoseparators
+
+
+    def configure(self, autoseparators: bool | None = None,
+            state: str | None = None) -> None:
+        if autoseparators is not None:
+            self.autoseparators = autoseparators
+            self.calls.append(("autoseparators", autoseparators))
+
+
+    def edit_separator(self) -> None:
+        self.calls.append(("separator",))
+
+
+    def delete(self, index1: str, index2: str) -> None:
+        self.calls.append(("delete", index1, index2, self.autoseparators))
+
+
+    def offset(self, index: str) -> int:
+        return 4
+
+
+
+
+def test_most_recently_used_first():
+    ring = ClipboardRing()
+    for text in ("one", "two", "three", "", "one"):
+        ring.add(text)
+    assert ring.entries() == ["one", "three", "two"]
+
+    ring.clear()
+    assert (ring.entries(), ring.size) == ([], 0)
+
+
+def test_entry_limit():
+    ring = ClipboardRing()
+    ring.max_entries = 3
+    for text in ("a", "b", "c", "a", "d"):
+        ring.add(text)
+
+    # The least recently used text is dropped, not the oldest added.
+    assert ring.entries() == ["d", "a", "c"]
+    assert ring.size == sum(map(sys.getsizeof, ring.entries()))
+
+
+def test_byte_limit():
+    ring = ClipboardRing()
+    ring.max_bytes = 3 * sys.getsizeof("x" * 100)
+    for text in ("a" * 100, "b" * 100, "c" * 100, "d" * 100):
+        ring.add(text)
+    assert ring.entries() == ["d" * 100, "c" * 100, "b" * 100]
+    assert ring.size <= ring.max_bytes
+
+
+def test_oversized_text_is_not_kept():
+    ring = ClipboardRing()
+    ring.max_bytes = sys.getsizeof("x" * 100)
+    ring.add("small")
+    ring.add("x" * 101)
+    assert ring.entries() == ["small"]
+    assert ring.size == sys.getsizeof("small")
+
+
+def test_paste_deletes_selection_in_its_undo_group():
+    text_area = TextArea()
+    notebook = types.SimpleNamespace(text_area=text_area,
+        after=lambda ms, callback: "after#1")
+    paste = Paste(notebook, "x" * (Paste.chunk_size + 1))
+    paste.start(("1.4", "1.8"))
+
+    # The selection is deleted after the group is started, with
+    # autoseparators off so the delete is not a group of its own.
+    assert text_area.calls == [("separator",), ("autoseparators", False),
+        ("delete", "1.4", "1.8", False)]
+    assert paste.offset == 4
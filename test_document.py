@@ -0,0 +1,88 @@
+import random
+
+from document import CHUNK_SIZE, Document
+
+
+
+
+def _check(document: Document, text: str) -> None:
+    """Check every way of reading DOCUMENT against the plain TEXT."""
+    assert len(document) == len(text)
+    assert document.get() == text
+    assert "".join(document.chunks()) == text
+    lines = text.split("\n")
+    assert document.line_count == len(lines)
+    offset = 0
+    for line, line_text in enumerate(lines):
+        assert document.line_start(line) == offset
+        assert document.line_end(line) == offset + len(line_text)
+        assert document.get_line(line) == line_text
+        assert document.line_of(offset) == line
+        offset += len(line_text) + 1
+
+
+def test_empty():
+    _check(Document(), "")
+    _check(Document(""), "")
+
+
+def test_build_large():
+    text = "".join(f"line {i}\n" for i in range(5000))
+    _check(Document(text), text)
+
+
+def test_get_range():
+    text = "abc\ndef\n" * (CHUNK_SIZE // 4)
+    document = Document(text)
+    for start, end in ((0, 0), (0, 5), (3, len(text)), (CHUNK_SIZE - 1,
+            CHUNK_SIZE + 7), (len(text) - 2, len(text))):
+        assert document.get(start, end) == text[start:end]
+        assert "".join(document.chunks(start, end)) == text[start:end]
+
+
+def test_line_bounds():
+    document = Document("one\ntwo")
+    assert document.line_start(-1) == 0
+    assert document.line_start(5) == len(document)
+    assert document.line_end(5) == len(document)
+    assert document.line_of(len(document)) == 1
+
+
+def test_random_edits():
+    # Edits made inside existing nodes and edits which split the tree
+    # must both leave the same text as a plain string.
+    rng = random.Random(0)
+    text = "".join(f"{i} {'x' * rng.randint(0, 40)}\n" for i in range(2000))
+    document = Document(text)
+    for _ in range(500):
+        start = rng.randint(0, len(text))
+        if rng.random() < 0.5:
+            inserted = "ab\ncd" * rng.choice((1, 2, CHUNK_SIZE // 2))
+            document.insert(start, inserted)
+            text = text[:start] + inserted + text[start:]
+        else:
+            end = min(len(text), start + rng.choice((1, 10, CHUNK_SIZE * 2)))
+            document.delete(start, end)
+            text = text[:start] + text[end:]
+    _check(document, text)
+
+
+def test_replace():
+    document = Document("hello world")
+    document.replace(6, 11, "there\nfriend")
+    _check(document, "hello there\nfriend")
+
+
+def test_snapshot_is_unchanged_by_edits():
+    document = Document("a\nb\nc")
+    snapshot = document.snapshot()
+    document.insert(0, "new\n")
+    document.delete(4, 6)
+    _check(snapshot, "a\nb\nc")
+    _check(document, "new\nb\nc")
+
+
+def test_reset():
+    document = Document("old")
+    document.reset("new\ntext")
+    _check(document, "new\ntext")
@@ -0,0 +1,71 @@
+import random
+
+from document_stats import (DocumentStats, TextCounter, count_words,
+    longest_line)
+
+
+TEXTS = ("", "one", " one", "one two\tthree ", "\tindented\n  two\n",
+    "a\n\nb c\n", "trailing \n lead")
+
+
+
+
+def _random_text(rng: random.Random, lines: int) -> str:
+    return "\n".join(" ".join(rng.choices(("", "a", "bc", "\t", " d"),
+        k=rng.randint(0, 6))) for _ in range(lines))
+
+
+def test_counts():
+    for text in TEXTS:
+        stats = DocumentStats(text)
+        assert stats.chars == len(text)
+        assert stats.lines == text.count("\n") + 1
+        assert stats.words == count_words(text)
+
+
+def test_replace_lines_matches_rebuild():
+    rng = random.Random(0)
+    lines = _random_text(rng, 200).split("\n")
+    stats = DocumentStats("\n".join(lines))
+    for _ in range(300):
+        start = rng.randint(0, len(lines) - 1)
+        end = rng.randint(start + 1, min(len(lines), start + 4))
+        new = _random_text(rng, rng.randint(1, 3)).split("\n")
+        lines[start:end] = new
+        stats.replace_lines(start, end, new)
+
+        expected = DocumentStats("\n".join(lines))
+        assert (stats.chars, stats.lines, stats.words) == \
+            (expected.chars, expected.lines, expected.words)
+    assert stats.words == count_words("\n".join(lines))
+
+
+def test_adjust_line():
+    stats = DocumentStats("ab\ncd")
+    stats.adjust_line(1, 2, 1)
+    assert stats.chars == 7
+    assert list(stats.line_chars) == [2, 4]
+    assert stats.words == DocumentStats("ab\ncd").words + 1
+
+
+def test_text_counter_matches_document_stats():
+    rng = random.Random(1)
+    text = _random_text(rng, 500)
+    for size in (1, 2, 7, 1000, len(text) + 1):
+        counter = TextCounter()
+        for i in range(0, len(text), size):
+            counter.feed(text[i:i + size])
+        stats = DocumentStats(text)
+        assert counter.chars == len(text)
+        assert counter.lines == stats.lines
+        assert counter.words == stats.words
+
+
+def test_longest_line_in_chunks():
+    text = "ab\nabcdef\nabc\nabcdefgh"
+    assert longest_line(text) == (8, 8)
+    longest = carry = 0
+    for i in range(0, len(text), 3):
+        chunk_longest, carry = longest_line(text[i:i + 3], carry)
+        longest = max(longest, chunk_longest)
+    assert (longest, carry) == (8, 8)
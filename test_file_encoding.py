@@ -0,0 +1,140 @@
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+
+import pytest
+
+from file_encoding import (READ_ERRORS, TextFormat, TextReader,
+    detect_compression, detect_encoding, detect_newline, text_suffix)
+
+
+
+
+def _read(data: bytes, size: int = 3) -> tuple[str, TextFormat]:
+    """Return the text of DATA read SIZE bytes at a time and its format."""
+    reader = TextReader(io.BytesIO(data))
+    chunks = []
+    while chunk := reader.read(size):
+        chunks.append(chunk)
+    return "".join(chunks), reader.text_format
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16-le", "utf-16-be",
+    "utf-32-le", "utf-32-be"])
+def test_bom(encoding):
+    data = codecs.lookup(encoding).encode("\ufeffnaïve\ntext")[0]
+    text, text_format = _read(data)
+    assert text == "naïve\ntext"
+    assert (text_format.encoding, text_format.bom) == (encoding, True)
+
+
+@pytest.mark.parametrize("encoding", ["utf-16-le", "utf-16-be"])
+def test_utf16_without_bom(encoding):
+    text, text_format = _read("plain text\n".encode(encoding))
+    assert text == "plain text\n"
+    assert (text_format.encoding, text_format.bom) == (encoding, False)
+
+
+def test_utf8_split_in_prefix():
+    # A prefix ending part way through a sequence is still UTF-8, but a
+    # complete file ending there is not.
+    data = "aé".encode("utf-8")
+    assert detect_encoding(data[:-1], complete=False) == ("utf-8", False)
+    assert detect_encoding(data[:-1], complete=True) == ("cp1252", False)
+
+
+def test_legacy_encodings():
+    assert detect_encoding("café €".encode("cp1252"), True) \
+        == ("cp1252", False)
+    assert detect_encoding(b"\x81\x8d", True) == ("latin-1", False)
+
+
+def test_newlines():
+    assert detect_newline("no newline") == "\n"
+    assert detect_newline("a\r\nb\n") == "\r\n"
+    assert detect_newline("a\rb\r\n") == "\r"
+    assert detect_newline("a\nb\r\n") == "\n"
+
+    # Newlines are read as LF, including a CRLF cut between two reads.
+    text, text_format = _read(b"one\r\ntwo\r\nthree", size=4)
+    assert text == "one\ntwo\nthree"
+    assert text_format.newline == "\r\n"
+    assert text_format.label == "UTF-8 (CRLF)"
+
+
+@pytest.mark.parametrize("compression, module",
+    [("gzip", gzip), ("bz2", bz2), ("xz", lzma)])
+def test_compressed(compression, module):
+    data = module.compress("line\r\n".encode("utf-16-le") * 1000)
+    text, text_format = _read(data, size=100)
+    assert text == "line\n" * 1000
+    assert text_format.compression == compression
+    assert text_format.encoding == "utf-16-le"
+    assert text_format.label == f"UTF-16 LE (CRLF), {compression}"
+
+
+def test_empty_bz2():
+    assert detect_compression(io.BytesIO(bz2.compress(b""))) == "bz2"
+
+
+@pytest.mark.parametrize("data", [b"", b"BZh", b"BZh9 is a tag\n",
+    b"BZh0" + bz2.compress(b"x")[4:], b"\x1f\x8b"])
+def test_text_is_not_compressed(data):
+    f = io.BytesIO(data)
+    assert detect_compression(f) is None
+    assert f.tell() == 0
+    text, text_format = _read(data)
+    assert text == data.decode(text_format.encoding)
+    assert text_format.compression is None
+
+
+def test_detect_compression_keeps_position():
+    f = io.BytesIO(b"text" + gzip.compress(b"x"))
+    f.seek(4)
+    assert detect_compression(f) == "gzip"
+    assert f.tell() == 4
+
+
+def test_corrupt_compression_is_a_read_error():
+    data = gzip.compress(b"text" * 1000)
+    with pytest.raises(READ_ERRORS):
+        _read(data[:len(data) // 2])
+
+
+def test_invalid_encoding_is_a_read_error():
+    # The prefix is valid UTF-8 but the rest of the file is not.
+    data = b"a" * TextReader.prefix_size + b"\xff"
+    with pytest.raises(UnicodeDecodeError):
+        _read(data, size=1 << 16)
+
+
+def test_text_suffix():
+    assert text_suffix("notes.txt") == ".txt"
+    assert text_suffix("log.txt.GZ") == ".txt"
+    assert text_suffix("archive.gz") == ""
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "bz2", "xz"])
+def test_wrap_round_trip(compression):
+    text_format = TextFormat("utf-8", bom=True, newline="\r\n",
+        compression=compression)
+    raw = io.BytesIO()
+    f = text_format.wrap(raw, "w", "file.txt")
+    text_format.write_bom(f)
+    f.write("a\nb\n")
+    text_format.unwrap(f)
+    assert not raw.closed
+
+    text, read_format = _read(raw.getvalue())
+    assert text == "a\nb\n"
+    assert read_format.to_dict() == text_format.to_dict()
+
+
+def test_for_path():
+    text_format = TextFormat("cp1252", newline="\r\n", compression="gzip")
+    assert text_format.for_path("new.txt.xz").to_dict() == {
+        "encoding": "cp1252", "bom": False, "newline": "\r\n",
+        "compression": "xz"}
+    assert text_format.for_path("new.txt").compression is None
@@ -0,0 +1,61 @@
+import random
+
+import file_reload
+from file_reload import diff_lines, split_lines
+
+
+
+
+def _apply(old: str, new: str) -> str:
+    """Return OLD with the edits which turn it into NEW applied."""
+    for start, end, text in diff_lines(split_lines(old), split_lines(new)):
+        old = old[:start] + text + old[end:]
+    return old
+
+
+def test_split_lines():
+    assert split_lines("") == []
+    assert split_lines("a\nb\n") == ["a\n", "b\n"]
+    assert split_lines("a\n\nb") == ["a\n", "\n", "b"]
+    assert "".join(split_lines("a\n\nb")) == "a\n\nb"
+
+
+def test_unchanged():
+    assert diff_lines(split_lines("a\nb"), split_lines("a\nb")) == []
+
+
+def test_last_line_without_newline():
+    assert diff_lines(split_lines("a\nb"), split_lines("a\nb\n")) \
+        == [(2, 3, "b\n")]
+    assert _apply("a\nb\n", "a\nb") == "a\nb"
+    assert _apply("a\nb", "a\nbc") == "a\nbc"
+
+
+def test_insert():
+    old = "one\ntwo\nthree\n"
+    edits = diff_lines(split_lines(old), split_lines("one\nnew\ntwo\nthree\n"))
+    assert edits == [(4, 4, "new\n")]
+
+
+def test_edits_last_first():
+    rng = random.Random(0)
+    for _ in range(200):
+        old = "".join(rng.choices("ab\n", k=rng.randint(0, 30)))
+        new = "".join(rng.choices("ab\n", k=rng.randint(0, 30)))
+        edits = diff_lines(split_lines(old), split_lines(new))
+        assert _apply(old, new) == new
+        assert [edit[0] for edit in edits] \
+            == sorted((edit[0] for edit in edits), reverse=True)
+
+
+def test_diff_limit(monkeypatch):
+    old = "same\na\nb\nc\nsame\n"
+    new = "same\nx\nb\ny\nsame\n"
+    assert diff_lines(split_lines(old), split_lines(new)) \
+        == [(9, 11, "y\n"), (5, 7, "x\n")]
+
+    # Past the limit the changed lines are replaced as a whole.
+    monkeypatch.setattr(file_reload, "DIFF_LIMIT", 2)
+    assert diff_lines(split_lines(old), split_lines(new)) \
+        == [(5, 11, "x\nb\ny\n")]
+    assert _apply(old, "same\nsame\n") == "same\nsame\n"
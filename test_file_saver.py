@@ -0,0 +1,84 @@
+import gzip
+import os
+import stat
+import types
+
+from document import Document
+from file_encoding import TextFormat
+from file_saver import NEW_FILE_MODE, FileSaver
+
+
+
+
+def _save(path, text: str, text_format: TextFormat | None = None) -> tuple:
+    """
+    Write TEXT to PATH on this thread as the writer thread would, and
+    return the result passed back to the main loop.
+
+    """
+    saver = FileSaver(types.SimpleNamespace(manager=None))
+    saver._write(path, Document(text), 7, text_format or TextFormat())
+    return saver._results.get_nowait()
+
+
+def test_new_file(tmp_path):
+    path = tmp_path / "new.txt"
+    result = _save(path, "one\ntwo")
+    assert result == (path, 7, result[2], None)
+    assert path.read_bytes() == b"one\ntwo\n"
+    assert stat.S_IMODE(path.stat().st_mode) == NEW_FILE_MODE
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_replace_keeps_mode(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("old text which is longer than the new")
+    os.chmod(path, 0o640)
+    inode = path.stat().st_ino
+
+    _save(path, "new")
+    assert path.read_text() == "new\n"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+    # The file was renamed into place, not written over.
+    assert path.stat().st_ino != inode
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_format(tmp_path):
+    path = tmp_path / "file.txt"
+    _save(path, "a\nb", TextFormat("utf-16-le", bom=True, newline="\r\n"))
+    assert path.read_bytes() == "\ufeffa\r\nb\r\n".encode("utf-16-le")
+
+
+def test_compressed(tmp_path):
+    path = tmp_path / "file.txt.gz"
+    _save(path, "text", TextFormat(compression="gzip"))
+    assert gzip.decompress(path.read_bytes()) == b"text\n"
+
+    # The gzip header holds the name of the file, without the .gz, not
+    # that of the temporary file.
+    data = path.read_bytes()
+    assert data[3] & gzip.FNAME
+    assert data[10:data.index(b"\0", 10)] == b"file.txt"
+
+
+def test_unencodable_text_keeps_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("saved")
+    *_, error = _save(path, "€", TextFormat("latin-1"))
+    assert isinstance(error, UnicodeEncodeError)
+    assert path.read_text() == "saved"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_missing_directory(tmp_path):
+    *_, error = _save(tmp_path / "missing" / "file.txt", "text")
+    assert isinstance(error, FileNotFoundError)
+
+
+def test_unknown_encoding_is_reported(tmp_path):
+    path = tmp_path / "file.txt"
+    *_, error = _save(path, "text", TextFormat("no-such-encoding"))
+    assert isinstance(error, LookupError)
+    assert list(tmp_path.iterdir()) == []
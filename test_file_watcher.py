@@ -0,0 +1,113 @@
+import os
+import types
+
+import file_watcher
+from file_watcher import FileWatcher
+
+
+
+
+class Manager:
+    """The timers and windows the watcher uses, without Tk."""
+
+
+    def __init__(self):
+        self.notebooks = {}
+        self.delays = []                       # delay of each poll scheduled
+
+
+    def after(self, ms: int, callback) -> str:
+        self.delays.append(ms / 1000)
+        return f"after#{len(self.delays)}"
+
+
+    def after_cancel(self, job: str) -> None:
+        pass
+
+
+    def open(self, filepath) -> types.SimpleNamespace:
+        """Open FILEPATH in a new window and return the window."""
+        notebook = types.SimpleNamespace(loader=None, events=[],
+            winfo_exists=lambda: True)
+        notebook.menu = types.SimpleNamespace(file_menu=types.SimpleNamespace(
+            filepath=filepath, saving=False))
+        notebook.event_generate = notebook.events.append
+        self.notebooks[len(self.notebooks)] = notebook
+        return notebook
+
+
+
+
+def _watcher(monkeypatch, tmp_path):
+    """Return a watcher on a clock which only moves when told to."""
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(file_watcher.time, "monotonic", lambda: clock.now)
+    watcher = FileWatcher(Manager())
+    path = tmp_path / "file.txt"
+    path.write_text("text")
+    return watcher, clock, path
+
+
+def _poll_when_due(watcher: FileWatcher, clock) -> None:
+    clock.now = watcher._wake
+    watcher._poll()
+
+
+def test_idle_file_backs_off(monkeypatch, tmp_path):
+    watcher, clock, path = _watcher(monkeypatch, tmp_path)
+    notebook = watcher.manager.open(path)
+    watcher.start()
+    _poll_when_due(watcher, clock)
+
+    intervals = []
+    for _ in range(6):
+        _poll_when_due(watcher, clock)
+        intervals.append(watcher._files[path][1])
+    assert intervals == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+    assert watcher.manager.delays[-1] == watcher.max_interval
+    assert notebook.events == []
+
+
+def test_change_resets_interval(monkeypatch, tmp_path):
+    watcher, clock, path = _watcher(monkeypatch, tmp_path)
+    first = watcher.manager.open(path)
+    second = watcher.manager.open(str(path))
+    watcher.start()
+    _poll_when_due(watcher, clock)
+    for _ in range(4):
+        _poll_when_due(watcher, clock)
+    assert watcher._files[path][1] == 8.0
+
+    # Every window with the file open is told once.
+    path.write_text("changed text")
+    _poll_when_due(watcher, clock)
+    assert watcher._files[path][1] == watcher.min_interval
+    assert watcher.manager.delays[-1] == watcher.min_interval
+    assert first.events == second.events == ["<<FileChanged>>"]
+
+    _poll_when_due(watcher, clock)
+    assert first.events == ["<<FileChanged>>"]
+
+
+def test_saving_and_closed_files(monkeypatch, tmp_path):
+    watcher, clock, path = _watcher(monkeypatch, tmp_path)
+    notebook = watcher.manager.open(path)
+    watcher.start()
+    _poll_when_due(watcher, clock)
+
+    # A file being saved is not reported, the saver records its state.
+    notebook.menu.file_menu.saving = True
+    path.write_text("saved text")
+    _poll_when_due(watcher, clock)
+    notebook.menu.file_menu.saving = False
+    watcher.update(path)
+    _poll_when_due(watcher, clock)
+    assert notebook.events == []
+
+    # A deleted file is a change, a closed one is forgotten.
+    os.remove(path)
+    _poll_when_due(watcher, clock)
+    assert notebook.events == ["<<FileChanged>>"]
+    del watcher.manager.notebooks[0]
+    _poll_when_due(watcher, clock)
+    assert watcher._files == {}
@@ -0,0 +1,216 @@
+import os
+
+import journal
+from document import Document
+from file_encoding import TextFormat
+from journal import Journal, JournalWriter, encode_record, replay
+
+
+
+
+class Editor:
+    """
+    A document and its journal edited together, as the Text Area edits
+    its document and passes each edit to the journal.
+
+    """
+
+
+    def __init__(self, directory, text: str = ""):
+        self.document = Document(text)
+        self.writer = JournalWriter(directory)
+        self.writer.commit_delay = 0
+        self.journal = Journal(self.document, self.writer)
+        self.journal.name = "Book1"
+
+
+    def edit(self, offset: int, length: int, text: str) -> None:
+        removed = self.document.get(offset, offset + length)
+        self.document.replace(offset, offset + length, text)
+        self.journal.record(offset, removed, text)
+
+
+
+
+def test_record_round_trip():
+    document = Document("hello world")
+    data = (encode_record(0, 5, "goodbye") + encode_record(8, 0, "é\n")
+        + encode_record(0, 0, "\ud800"))
+    assert replay(document, data) == len(data)
+    assert document.get() == "\ud800goodbye é\nworld"
+
+
+def test_replay_stops_at_cut_record():
+    data = encode_record(0, 0, "abc") + encode_record(3, 0, "def")
+    for cut in range(len(data) - 1, len(data) // 2, -1):
+        document = Document()
+        assert replay(document, data[:cut]) == len(data) // 2
+        assert document.get() == "abc"
+
+
+def test_replay_stops_at_corrupt_record():
+    first = encode_record(0, 0, "abc")
+    second = bytearray(encode_record(3, 0, "def"))
+    second[-1] ^= 0xFF
+    document = Document()
+    assert replay(document, first + bytes(second)) == len(first)
+    assert document.get() == "abc"
+
+
+def test_replay_stops_at_record_past_the_end():
+    document = Document("ab")
+    assert replay(document, encode_record(1, 5, "")) == 0
+    assert document.get() == "ab"
+
+
+def test_recover_from_empty_base(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.edit(0, 0, "hello")
+    editor.edit(5, 0, " world")
+    editor.edit(0, 1, "J")
+    editor.writer.flush()
+
+    recovered, = journal.recover(tmp_path)
+    assert recovered["text"] == "Jello world"
+    assert recovered["name"] == "Book1"
+    assert recovered["base"] == {"type": "empty"}
+
+
+def test_nothing_written_before_first_edit(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.writer.flush()
+    assert journal.recover(tmp_path) == []
+
+
+def test_recover_from_snapshot(tmp_path):
+    editor = Editor(tmp_path, "line one\nline two\n")
+    editor.journal.rebase()
+    editor.edit(5, 3, "1")
+    editor.writer.flush()
+
+    recovered, = journal.recover(tmp_path)
+    assert recovered["base"] == {"type": "snapshot"}
+    assert recovered["text"] == "line 1\nline two\n"
+
+
+def test_recover_from_file(tmp_path):
+    path = tmp_path / "file.txt"
+    text_format = TextFormat("utf-16-le", bom=True, newline="\r\n")
+    with text_format.open(path, mode="w") as f:
+        text_format.write_bom(f)
+        f.write("café\nbar\n")
+
+    editor = Editor(tmp_path / "journal", "café\nbar")
+    editor.journal.rebase(path, text_format, trim=True)
+    editor.edit(len(editor.document), 0, "!")
+    editor.writer.flush()
+
+    recovered, = journal.recover(tmp_path / "journal")
+    assert recovered["text"] == "café\nbar!"
+
+    # The records only apply to the file they were made to.
+    path.write_text("changed")
+    recovered, = journal.recover(tmp_path / "journal")
+    assert recovered["text"] is None
+
+
+def test_compaction(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.compact_size = 64
+    editor.journal.rebase()
+    for i in range(50):
+        editor.edit(len(editor.document), 0, f"{i},")
+    editor.writer.flush()
+
+    recovered, = journal.recover(tmp_path)
+    assert recovered["text"] == editor.document.get()
+    assert recovered["generation"] > 1
+
+    # Only the newest generation is kept.
+    names = {path.name for path in tmp_path.iterdir()}
+    generation = f"{recovered['id']}.{recovered['generation']}"
+    assert names <= {f"{recovered['id']}.json", f"{generation}.base",
+        f"{generation}.log"}
+
+
+def test_discard(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.edit(0, 0, "text")
+    editor.journal.discard()
+    editor.writer.flush()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_adopt(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.edit(0, 0, "abc")
+    editor.writer.flush()
+
+    # A record cut short by the crash is dropped when the journal is
+    # continued.
+    recovered, = journal.recover(tmp_path)
+    log = tmp_path / f"{recovered['id']}.{recovered['generation']}.log"
+    with open(log, mode="ab") as f:
+        f.write(encode_record(3, 0, "lost")[:-2])
+
+    recovered, = journal.recover(tmp_path)
+    assert recovered["text"] == "abc"
+    editor = Editor(tmp_path, recovered["text"])
+    editor.journal.adopt(recovered)
+    editor.edit(3, 0, "d")
+    editor.writer.flush()
+
+    recovered, = journal.recover(tmp_path)
+    assert recovered["text"] == "abcd"
+    assert log.stat().st_size == len(encode_record(0, 0, "abc")
+        + encode_record(3, 0, "d"))
+
+
+def test_remove(tmp_path):
+    editor = Editor(tmp_path, "snapshot")
+    editor.journal.rebase()
+    editor.writer.flush()
+    journal.remove(tmp_path, editor.journal.id)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_writer_survives_failed_operation(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.writer.submit(editor.journal, "append", "not a record")
+    editor.writer.flush()
+
+    # The same writer still writes the next edits.
+    editor.edit(0, 0, "after")
+    editor.writer.flush()
+    assert [recovered["text"] for recovered in journal.recover(tmp_path)] \
+        == ["after"]
+    assert editor.writer.failures == 1
+
+
+def test_running_process_is_skipped(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.edit(0, 0, "open")
+    editor.writer.flush()
+
+    # The journal of another process still running is in use.
+    path, = tmp_path.glob("*.json")
+    path.write_text(path.read_text().replace(f'"pid": {os.getpid()}',
+        f'"pid": {os.getppid()}'))
+    assert journal.recover(tmp_path) == []
+
+
+def test_own_journal_is_skipped(tmp_path):
+    editor = Editor(tmp_path)
+    editor.journal.rebase()
+    editor.edit(0, 0, "unsaved text")
+    editor.writer.flush()
+
+    # The journal is still being written by this process.
+    assert journal.recover(tmp_path, {editor.journal.id}) == []
+    assert journal.recover(tmp_path, {"other"})[0]["text"] == "unsaved text"
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+
+
+def _imported(*modules: str) -> set[str]:
+    """
+    Return the modules of the application imported by a fresh interpreter
+    after importing MODULES. Other tests may already have imported any
+    module into this one.
+
+    """
+    code = (f"import sys\nimport {', '.join(modules)}\n"
+        "print('\\n'.join(sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], check=True,
+        capture_output=True, text=True, cwd=Path(__file__).parent)
+    return set(result.stdout.split())
+
+
+def test_manager_defers_modules():
+    from manager import Manager
+
+    imported = _imported("manager")
+    assert not imported & set(Manager.deferred_modules)
+
+
+def test_first_window_defers_modules():
+    from manager import Manager
+
+    # The first window is built from the notebook module and everything
+    # it imports, none of which may pull in a deferred module.
+    imported = _imported("manager", "notebook")
+    assert not imported & set(Manager.deferred_modules)
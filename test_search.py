@@ -0,0 +1,193 @@
+import tkinter as tk
+
+from document import Document
+from search import Finder, ReplaceAll, Search, compile_pattern
+
+
+
+
+class TextArea:
+    """
+    A document standing in for the Text Area, with offsets as its
+    indices and only the insertion cursor and selection as its marks
+    and tags.
+
+    """
+
+
+    def __init__(self, text: str):
+        self.document = Document(text)
+        self.edit_listeners = []
+        self.cursor = 0
+        self.selection = ()
+
+
+    def offset(self, index) -> int:
+        if index == tk.INSERT:
+            return self.cursor
+        if index == tk.SEL_FIRST:
+            return self.selection[0]
+        return index
+
+
+    def index_of(self, offset: int) -> int:
+        return offset
+
+
+    def index(self, index: str) -> str:
+        return "1.0"
+
+
+    def winfo_height(self) -> int:
+        return 0
+
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        removed = self.document.get(start, end)
+        self.document.replace(start, end, text)
+        self.selection = ()
+        for listener in self.edit_listeners:
+            listener(start, removed, text)
+
+
+    def mark_set(self, mark: str, offset: int) -> None:
+        self.cursor = offset
+
+
+    def tag_ranges(self, tag: str) -> tuple:
+        return self.selection if tag == tk.SEL else ()
+
+
+    def tag_add(self, tag: str, *indices) -> None:
+        if tag == tk.SEL:
+            self.selection = indices
+
+
+    def tag_remove(self, tag: str, *indices) -> None:
+        if tag == tk.SEL:
+            self.selection = ()
+
+
+    def tag_configure(self, *args, **kwargs) -> None:
+        pass
+
+
+    def tag_raise(self, *args) -> None:
+        pass
+
+
+    def see(self, index) -> None:
+        pass
+
+
+
+
+class Notebook:
+    """A notebook whose after callbacks are only run when asked."""
+
+
+    def __init__(self, text: str):
+        self.text_area = TextArea(text)
+        self.jobs = {}
+
+
+    def after(self, delay: int, func) -> int:
+        self.jobs[len(self.jobs) + 1] = func
+        return len(self.jobs)
+
+
+    def after_cancel(self, job: int) -> None:
+        self.jobs.pop(job, None)
+
+
+
+
+def _finder(text: str, pattern: str) -> Finder:
+    """Return a Finder over TEXT which has finished searching PATTERN."""
+    finder = Finder(Notebook(text))
+    finder.find(pattern)
+    finder._search._worker.join()
+    finder._poll()
+    assert not finder.searching
+    return finder
+
+
+def _search(text: str, pattern: str) -> list[tuple[int, int]]:
+    search = Search(Document(text), compile_pattern(pattern, True, True))
+    search._search()
+    starts, ends = search.results.get()
+    assert search.results.get() is None
+    return list(zip(starts, ends))
+
+
+def _replace_all(text: str, pattern: str, replacement: str,
+        regex: bool = True) -> tuple:
+    replace = ReplaceAll(Document(text),
+        compile_pattern(pattern, regex, True), replacement, regex)
+    replace._replace()
+    return replace.results.get()
+
+
+def test_search_skips_empty_matches():
+    assert _search("abc aXc", "a?") == [(0, 1), (4, 5)]
+
+
+def test_replace_all_skips_empty_matches():
+    # The same two matches the search found are replaced, and nothing
+    # is inserted between the other characters.
+    assert _replace_all("abc aXc", "a?", "Z") == (0, 5, "Zbc Z", 2)
+
+
+def test_replace_all_covers_first_to_last_match():
+    first, last, text, count = _replace_all("one two three", "t(\\w)",
+        "<\\1>")
+    assert (first, last, count) == (4, 10, 2)
+    assert "one two three"[:first] + text + "one two three"[last:] \
+        == "one <w>o <h>ree"
+
+
+def test_replace_all_literal():
+    # Without a regular expression the replacement is not expanded.
+    assert _replace_all("a.b a.b", ".", "\\1", regex=False) \
+        == (1, 6, "\\1b a\\1", 2)
+
+
+def test_replace_all_no_matches():
+    assert _replace_all("abc", "x", "y") == (None, None, "", 0)
+
+
+def test_replace_all_invalid_group():
+    error = _replace_all("abc", "(b)", "\\2")
+    assert "invalid group reference" in str(error)
+
+
+def test_replace_twice_with_longer_text():
+    finder = _finder("a b a b a", "a")
+    text_area = finder.text_area
+    assert finder.find_next()
+    assert text_area.selection == (0, 1)
+
+    # Each replace selects the next match at its offset after the edit,
+    # before the search has been run again.
+    assert finder.replace("xyz")
+    assert text_area.selection == (6, 7)
+    assert finder.replace("xyz")
+    assert text_area.selection == (12, 13)
+    finder.replace("xyz")
+    assert text_area.document.get() == "xyz b xyz b xyz"
+
+
+def test_replace_twice_with_shorter_text():
+    finder = _finder("abc-abc-abc", "abc")
+    finder.find_next()
+    finder.replace("")
+    finder.replace("")
+    assert finder.text_area.document.get() == "--abc"
+    assert finder.text_area.selection == (2, 5)
+
+
+def test_edit_moves_matches():
+    finder = _finder("ab ab ab ab", "ab")
+    finder.text_area.replace(4, 7, "Z")
+    assert finder.text_area.document.get() == "ab aZb ab"
+    assert list(zip(finder.starts, finder.ends)) == [(0, 2), (7, 9)]
@@ -0,0 +1,204 @@
+from undo_history import COMPRESS_SIZE, UndoHistory
+
+
+
+
+class TextArea:
+    """
+    A plain string standing in for the Text Area, with offsets as its
+    indices. Every edit is passed to the history, as the edit listeners
+    of the Text Area are.
+
+    """
+
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.modified = False
+        self.autoseparators = True
+        self.history = UndoHistory(self)
+
+
+    def cget(self, option: str):
+        return self.autoseparators if option == "autoseparators" else "normal"
+
+
+    def edit_modified(self, arg=None):
+        if arg is None:
+            return self.modified
+        if not arg:
+            self.history.mark_saved()
+        self.modified = bool(arg)
+
+
+    def index_of(self, offset: int) -> int:
+        return offset
+
+
+    def insert(self, index: int, text: str) -> None:
+        self.replace(index, index, text)
+
+
+    def delete(self, start: int, end: int) -> None:
+        self.replace(start, end, "")
+
+
+    def replace(self, start: int, end: int, text: str) -> None:
+        removed = self.text[start:end]
+        self.text = self.text[:start] + text + self.text[end:]
+        self.modified = True
+        self.history.record(start, removed, text)
+
+
+    def mark_set(self, *args) -> None:
+        pass
+
+
+    def see(self, *args) -> None:
+        pass
+
+
+
+
+def _type(text_area: TextArea, offset: int, text: str) -> None:
+    for i, char in enumerate(text):
+        text_area.insert(offset + i, char)
+
+
+def test_typing_is_merged():
+    text_area = TextArea()
+    _type(text_area, 0, "hello")
+    history = text_area.history
+    assert len(history._undo) == 1 and len(history._undo[0]) == 1
+    assert history._undo[0][0].inserted == "hello"
+    assert history.undo()
+    assert text_area.text == ""
+    assert history.redo()
+    assert text_area.text == "hello"
+
+
+def test_backspace_and_delete_are_merged():
+    text_area = TextArea("abcdef")
+    for offset in (5, 4, 3):
+        text_area.delete(offset, offset + 1)
+    for _ in range(2):
+        text_area.delete(0, 1)
+    assert text_area.text == "c"
+
+    # Switching from backspacing to deleting forwards did not start a
+    # new group, both are deletes.
+    history = text_area.history
+    assert len(history._undo) == 1
+    assert [edit.removed for edit in history._undo[0]] == ["def", "ab"]
+    history.undo()
+    assert text_area.text == "abcdef"
+
+
+def test_autoseparators_group_by_kind():
+    text_area = TextArea()
+    _type(text_area, 0, "abc")
+    text_area.delete(2, 3)
+    _type(text_area, 2, "xy")
+    assert text_area.text == "abxy"
+    history = text_area.history
+    assert len(history._undo) == 3
+    history.undo()
+    assert text_area.text == "ab"
+    history.undo()
+    assert text_area.text == "abc"
+    history.undo()
+    assert text_area.text == ""
+    assert not history.undo()
+
+
+def test_separator_without_autoseparators():
+    text_area = TextArea()
+    text_area.autoseparators = False
+    _type(text_area, 0, "ab")
+    text_area.delete(0, 1)
+    text_area.history.separator()
+    text_area.insert(0, "z")
+    history = text_area.history
+    assert len(history._undo) == 2
+    history.undo()
+    history.undo()
+    assert text_area.text == ""
+
+
+def test_large_text_is_compressed():
+    text = "0123456789\n" * COMPRESS_SIZE
+    text_area = TextArea()
+    text_area.insert(0, text)
+    edit = text_area.history._undo[0][0]
+    assert isinstance(edit.inserted, bytes)
+    assert edit.size < len(text)
+    assert edit.inserted_length == len(text)
+
+    text_area.history.separator()
+    text_area.delete(0, len(text))
+    text_area.history.undo()
+    assert text_area.text == text
+    text_area.history.undo()
+    text_area.history.redo()
+    assert text_area.text == text
+
+
+def test_history_is_trimmed():
+    text_area = TextArea()
+    history = text_area.history
+    history.max_bytes = 4096
+    for i in range(100):
+        text_area.insert(0, "x" * 100)
+        history.separator()
+    assert history.size <= history.max_bytes
+    assert 1 < len(history._undo) < 100
+    while history.undo():
+        pass
+    assert text_area.text == "x" * 100 * (100 - len(history._redo))
+
+
+def test_new_edit_clears_redo():
+    text_area = TextArea()
+    _type(text_area, 0, "ab")
+    history = text_area.history
+    history.undo()
+    text_area.insert(0, "z")
+    assert not history.can_redo()
+    assert history.size == sum(history._group_size(group)
+        for group in history._undo)
+
+
+def test_undo_to_save_point_clears_modified():
+    text_area = TextArea()
+    _type(text_area, 0, "abc")
+    text_area.edit_modified(False)
+    _type(text_area, 3, "d")
+    history = text_area.history
+    assert text_area.modified
+
+    history.undo()
+    assert text_area.text == "abc" and not text_area.modified
+    history.undo()
+    assert text_area.modified
+    history.redo()
+    assert not text_area.modified
+
+
+def test_save_point_lost_with_redo():
+    text_area = TextArea()
+    _type(text_area, 0, "abc")
+    text_area.edit_modified(False)
+    history = text_area.history
+    history.undo()
+    text_area.insert(0, "z")
+    history.undo()
+    assert text_area.text == "" and text_area.modified
+
+
+def test_reset():
+    text_area = TextArea()
+    _type(text_area, 0, "abc")
+    history = text_area.history
+    history.reset()
+    assert not history.can_undo() and not history.can_redo()
+    assert history.size == 0
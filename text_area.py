@@ -1,17 +1,35 @@
 import tkinter as tk
 
+from document import Document
+from document_stats import DocumentStats, count_words
+from instrumentation import timed
+from undo_history import UndoHistory
+from update_scheduler import UpdateScheduler
+
 
 
 
 class TextArea(tk.Text):
-    """The Text Area is a custom tk Text widget for a notebook window."""
+    """
+    The Text Area is a custom tk Text widget for a notebook window.
+
+    Text with a line longer than LONG_LINE_LENGTH is edited in long line
+    mode. The text is not wrapped and an edit within a line only counts
+    the words around it rather than the whole line.
+
+    """
+
+    long_line_length = 10000                   # chars before long line mode
+    tab_segment = 1 << 12                      # chars per cached tab count
 
 
     def __init__(self, parent):
+        self.metrics = parent.metrics
         self.chars = tk.IntVar(value=0)
         self.lines = tk.IntVar(value=1)
         self.cursor = tk.StringVar(value="Ln 1, Col 1, Pos 1")
         self.words = tk.IntVar(value=0)
+        self.long_lines = tk.BooleanVar(value=False)
 
         super().__init__(
             parent,
@@ -19,13 +37,359 @@ class TextArea(tk.Text):
             highlightthickness=0,
             tabstyle="wordprocessor",
             wrap="word",
-            undo=True,
-            maxundo=100
+            undo=False
         )
         self.tabspace = 8       # default used in the Text widget
-
+        self.revision = 0       # incremented by every edit
+        self.document = Document()
+        self.stats = DocumentStats()
+        self.updates = UpdateScheduler(self, self._refresh)
+        self._pending_edits = []
+        self._tab_cache = {}    # tab counts of each line by line number
+        self._long_lines = False
+
+        # Callables run with the offset, removed text and inserted text
+        # of every edit once it has been applied to the document.
+        self.edit_listeners = []
+
+        # Undo and redo are handled by the history rather than the Text
+        # widget, which is created with its own undo turned off.
+        self.history = UndoHistory(self)
+        self.edit_listeners.append(self.history.record)
+
+        self._configure_proxy()
         self._configure_bindings()
 
+
+    def _configure_proxy(self) -> None:
+        """
+        Internal function.
+
+        Route the Tcl widget command through a proxy so that every edit
+        to the text, whether it comes from the class bindings, undo and
+        redo or a method call, can be recorded as a delta, and the undo
+        commands are answered by the history.
+
+        """
+        # The original widget command is renamed and replaced by a Tcl
+        # procedure. Only the insert, delete and replace commands and
+        # the edit commands of the undo stack call back into Python,
+        # everything else is passed straight through. Errors from the
+        # original command are returned to the caller unchanged so that
+        # the catch blocks in the Tk bindings work.
+        self._orig = f"{self._w}_orig"
+        before = self.register(self._before_edit)
+        after = self.register(self._after_edit)
+        history = self.register(self._edit_history)
+        self.tk.call("rename", self._w, self._orig)
+        self.tk.eval(f"""
+            proc {self._w} {{args}} {{
+                if {{[lindex $args 0] eq "edit" && [lindex $args 1] in
+                        {{undo redo separator reset canundo canredo}}}} {{
+                    return [{history} [lindex $args 1]]
+                }}
+                if {{[lindex $args 0] ni {{insert delete replace}}}} {{
+                    tailcall {self._orig} {{*}}$args
+                }}
+                {before} {{*}}$args
+                catch {{{self._orig} {{*}}$args}} result options
+                {after}
+                return -options $options $result
+            }}
+        """)
+
+
+    def destroy(self) -> None:
+        """Destroy this widget and the proxy command."""
+        self.updates.cancel()
+        super().destroy()
+        try:
+            self.tk.call("rename", self._w, "")
+        except tk.TclError:
+            pass
+
+
+    def configure(self, cnf=None, **kw):
+        """
+        Configure the widget. The undo option turns the recording of the
+        history on or off.
+
+        """
+        if "undo" in kw:
+            self.history.enabled = bool(kw.pop("undo"))
+            if cnf is None and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+
+    def cget(self, key: str):
+        """Return the value of option KEY."""
+        if key == "undo":
+            return int(self.history.enabled)
+        return super().cget(key)
+
+
+    def edit_modified(self, arg=None):
+        """
+        Get or set the modified flag. Clearing it marks the current text
+        as saved in the undo history.
+
+        """
+        if arg is not None and not arg:
+            self.history.mark_saved()
+        return super().edit_modified(arg)
+
+
+    def edit_undo(self) -> None:
+        """Undo the last group of edits. Raises TclError if there is none."""
+        if not self.history.undo():
+            raise tk.TclError("nothing to undo")
+
+
+    def edit_redo(self) -> None:
+        """Redo the last undone group. Raises TclError if there is none."""
+        if not self.history.redo():
+            raise tk.TclError("nothing to redo")
+
+
+    def _edit_history(self, command: str):
+        """
+        Internal function.
+
+        Run the edit COMMAND of the undo stack from Tcl against the
+        history.
+
+        """
+        if command == "undo":
+            self.history.undo()
+        elif command == "redo":
+            self.history.redo()
+        elif command == "separator":
+            self.history.separator()
+        elif command == "reset":
+            self.history.reset()
+        elif command == "canundo":
+            return int(self.history.can_undo())
+        elif command == "canredo":
+            return int(self.history.can_redo())
+        return ""
+
+
+    def set_long_lines(self, active: bool) -> None:
+        """Turn long line mode on or off."""
+        if active == self._long_lines:
+            return
+        self._long_lines = active
+        self.configure(wrap="none" if active else "word")
+        self.long_lines.set(active)
+
+
+    def _position(self, index: str) -> tuple[int, int]:
+        """Internal function. Return INDEX as a (line, column) pair."""
+        line, col = str(self.tk.call(self._orig, "index", index)).split(".")
+        return int(line), int(col)
+
+
+    def _offset(self, line: int, col: int) -> int:
+        """Internal function. Return the document offset of LINE.COL."""
+        return self.document.line_start(line - 1) + col
+
+
+    def offset(self, index: str) -> int:
+        """Return the document offset of the text widget INDEX."""
+        return self._offset(*self._position(index))
+
+
+    def index_of(self, offset: int) -> str:
+        """Return the text widget index of the document OFFSET."""
+        line = self.document.line_of(offset)
+        return f"{line + 1}.{offset - self.document.line_start(line)}"
+
+
+    def read(self, index1: str, index2: str) -> str:
+        """
+        Return the text between INDEX1 and INDEX2.
+
+        The text is read from the document model rather than copied out
+        of the widget.
+
+        """
+        start, end = self._position(index1), self._position(index2)
+        text = self.document.get(self._offset(*start), self._offset(*end))
+
+        # The final newline is kept by the widget but not the document.
+        if end[0] > self.document.line_count and start < end:
+            text += "\n"
+        return text
+
+
+    def _resolve_edit(self, op: str, *args) -> list:
+        """
+        Internal function.
+
+        Resolve the arguments of an insert, delete or replace command
+        into a list of (start, end, text) edits in the same way the Text
+        widget will apply them. Start and end are (line, column) pairs
+        in the content before the edit. Edits are ordered from the last
+        to the first so each can be applied without shifting the others.
+
+        """
+        if str(self.tk.call(self._orig, "cget", "-state")) == "disabled":
+            return []
+
+        # The line after the last line only holds the final newline
+        # which can never be edited.
+        dummy_line = self._position("end")[0]
+
+        if op == "insert":
+            start = self._position(args[0])
+            if start[0] >= dummy_line:
+                start = self._position("end-1c")
+            return [(start, start, "".join(args[1::2]))]
+
+        # Delete and replace both remove a range of text, delete may be
+        # given more than one range.
+        if op == "replace":
+            indices, text = args[:2], "".join(args[2::2])
+        else:
+            indices, text = args, ""
+
+        ranges = []
+        for i in range(0, len(indices), 2):
+            start = self._position(indices[i])
+            if i + 1 < len(indices):
+                end = self._position(indices[i + 1])
+            else:
+                end = self._position(f"{start[0]}.{start[1]}+1c")
+            if start < end:
+                ranges.append([start, end])
+        if not ranges:
+            if op == "replace" and start == end:
+                return [(start, start, text)]
+            return []
+
+        # Overlapping ranges are merged before deleting.
+        ranges.sort()
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            if start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        # Deleting the final newline deletes the newline before the
+        # range instead, matching the behaviour of the Text widget.
+        start, end = merged[-1]
+        if end[0] >= dummy_line:
+            end = self._position("end-1c")
+            if start[1] == 0 and start[0] != 1:
+                start = self._position(f"{start[0]}.0-1c")
+            merged[-1] = [start, end]
+
+        edits = [(start, end, "") for start, end in reversed(merged)]
+        if text:
+            start, end, _ = edits[-1]
+            edits[-1] = (start, end, text)
+        return edits
+
+
+    def _before_edit(self, op: str, *args) -> None:
+        """Internal function. Record the edit about to be applied."""
+        try:
+            self._pending_edits = self._resolve_edit(op, *args)
+        except tk.TclError:
+            # The command itself will fail with the same error.
+            self._pending_edits = []
+
+
+    def _apply(self, start: int, end: int, text: str) -> None:
+        """
+        Internal function.
+
+        Replace the document text from START up to END with TEXT and
+        tell the edit listeners.
+
+        """
+        removed = self.document.get(start, end) if self.edit_listeners else ""
+        self.document.replace(start, end, text)
+        for listener in self.edit_listeners:
+            listener(start, removed, text)
+
+
+    @timed("edit")
+    def _after_edit(self) -> None:
+        """
+        Internal function.
+
+        Apply the recorded edit to the document model and the indices.
+
+        """
+        edits, self._pending_edits = self._pending_edits, []
+        if not edits:
+            return
+        self.revision += 1
+
+        first = edits[-1][0][0]
+        last = edits[0][1][0]
+        shift = sum(text.count("\n") - (end[0] - start[0])
+            for start, end, text in edits)
+
+        start, end, text = edits[0]
+        if (self._long_lines and len(edits) == 1 and first == last
+                and not shift and start[1] > 0):
+            # In long line mode an edit within a line only recounts the
+            # words around it. A word end is a pair of chars, so only the
+            # pairs from the char before the edit to the char after it
+            # can change.
+            offset = self._offset(*start)
+            removed = self._offset(*end) - offset
+            line_end = self.document.line_end(first - 1)
+            before = self.document.get(offset - 1,
+                min(offset + removed + 1, line_end))
+            self._apply(offset, offset + removed, text)
+            after = self.document.get(offset - 1,
+                min(offset + len(text) + 1, line_end - removed + len(text)))
+            self.stats.adjust_line(first - 1, len(text) - removed,
+                count_words(after) - count_words(before))
+        else:
+            # The edits are ordered from last to first so the offsets of
+            # each one are still valid when it is applied to the document.
+            for start, end, text in edits:
+                self._apply(self._offset(*start), self._offset(*end), text)
+
+            # Every edit replaces the lines between its start and end
+            # line with the lines of its text. Together they replace one
+            # block of lines which is read back from the document and
+            # recounted.
+            lines = self.document.get(self.document.line_start(first - 1),
+                self.document.line_end(last + shift - 1)).split("\n")
+            self.stats.replace_lines(first - 1, last, lines)
+
+        # Cached tab counts are dropped for the edited lines, or for all
+        # lines if the edit moved the lines after it. Within a single
+        # line only the counts after the edit are dropped.
+        if shift:
+            self._tab_cache.clear()
+        elif first == last:
+            counts = self._tab_cache.get(first)
+            if counts is not None:
+                del counts[edits[-1][0][1] // self.tab_segment + 1:]
+        else:
+            for line in range(first, last + 1):
+                self._tab_cache.pop(line, None)
+
+        # If the model ever disagrees with the widget it is rebuilt from
+        # the full text so the two can never drift apart.
+        if self.document.line_count != self._position("end-1c")[0]:
+            text = self.get("1.0", "end-1c")
+            self._apply(0, len(self.document), text)
+            self.stats.reset(text)
+            self._tab_cache.clear()
+
+        self.updates.mark("cursor", "counts")
+
     
     def _configure_bindings(self) -> None:
         """Internal function. Configure the additional bindings."""
@@ -61,85 +425,114 @@ class TextArea(tk.Text):
         self.bind("<<Redo>>", lambda _ : self._call_updates("Redo"), "+")
 
 
+    @timed("events.{0}")
     def _call_updates(self, event: str) -> None:
-        """Internal function. Call the relevant update function."""
+        """
+        Internal function. Mark the values affected by EVENT as dirty.
+
+        The values are recalculated together by the update scheduler so
+        a burst of events only costs a single refresh.
 
+        """
         # The cursor needs to be updated on any additional event which 
         # has been binded to.
-        self._update_cursor()
+        self.updates.mark("cursor")
 
         # The ButtonPress and ButtonRelease events do not require calls
         # to update the char, line or word counts.
         if not (event == "ButtonPress" or event == "ButtonRelease"):
+            self.updates.mark("counts")
+
+
+    @timed("refresh")
+    def _refresh(self, dirty: set) -> None:
+        """Internal function. Call the update functions for DIRTY."""
+
+        if "cursor" in dirty:
+            self._update_cursor()
+
+        if "counts" in dirty:
             self._update_char_count()
             self._update_line_count()
             self._update_word_count()
 
 
+    def _set_variable(self, variable: tk.Variable, value) -> None:
+        """
+        Internal function.
+
+        Set VARIABLE to VALUE only if it changed so that the traces on
+        the variable are not run for nothing.
+
+        """
+        if variable.get() != value:
+            variable.set(value)
+
+
+    @timed("update.cursor")
     def _update_cursor(self, *args) -> None:
         """Internal function. Updates the cursor position attribute."""
 
         # Get the insertion cursor index in the text widget
-        cursor_index = self.index(tk.INSERT)
+        line, index = self._position(tk.INSERT)
 
-        # Set the new line number
-        line = cursor_index.split('.')[0]
+        # Get the column. Each tab before the cursor on the line takes up
+        # tabspace columns rather than one.
+        tabs = self._tabs_before(line, index)
+        col = 1 + index + tabs * (self.tabspace - 1)
 
-        # Get the column index. We need to retrieve the text on the 
-        # current line so we can check for things like tabs.
-        text = self.get(f"{line}.0", cursor_index)
+        # Get the position (number of characters up to this point) from
+        # the line index of the document model.
+        pos = self._offset(line, index) + 1
 
-        col = 1
-        for c in text:
-            if c == '\n':
-                break
-            elif c == '\t':
-                col += self.tabspace
-            else:
-                col += 1
+        self._set_variable(self.cursor, f"Ln {line}, Col {col}, Pos {pos}")
 
-        # Get the position index (number of characters up to this point).
-        pos = self.count("1.0", cursor_index, "chars")
-        if pos == None:
-            pos = 1
-        else:
-            pos = pos[0] + 1
-        
-        self.cursor.set(f"Ln {line}, Col {col}, Pos {pos}")
 
+    def _tabs_before(self, line: int, col: int) -> int:
+        """
+        Internal function.
+
+        Return the number of tabs on LINE before COL.
+
+        The line is counted in segments of TAB_SEGMENT chars. The number
+        of tabs before each segment is cached until the line is edited
+        before it, so only the segment holding COL is read again, however
+        long the line is.
+
+        """
+        counts = self._tab_cache.get(line)
+        if counts is None:
+            if len(self._tab_cache) >= 1024:
+                self._tab_cache.clear()
+            counts = self._tab_cache[line] = [0]
+
+        start = self.document.line_start(line - 1)
+        segment = col // self.tab_segment
+        while len(counts) <= segment:
+            first = start + (len(counts) - 1) * self.tab_segment
+            counts.append(counts[-1] + self.document.get(first,
+                first + self.tab_segment).count("\t"))
+        first = start + segment * self.tab_segment
+        return counts[segment] + self.document.get(first,
+            start + col).count("\t")
 
+
+    @timed("update.chars")
     def _update_char_count(self, *args) -> None:
         """Internal function. Updates the character count."""
 
-        chars = self.count("1.0", "end-1c", "chars")
-        if chars == None:
-            self.chars.set(0)
-        else:
-            self.chars.set(chars[0])
-        
+        self._set_variable(self.chars, self.stats.chars)
+
 
+    @timed("update.lines")
     def _update_line_count(self, *args) -> None:
         """Internal function. Update the line count."""
 
-        lines = self.count("1.0", "end", "lines")
-
-        if lines == None:
-            self.lines.set(0)
-        else:
-            self.lines.set(lines[0])
+        self._set_variable(self.lines, self.stats.lines)
 
 
+    @timed("update.words")
     def _update_word_count(self, *args) -> None:
         """Internal function. Updates the word count."""
 
-        words = 0
-        text = self.get("1.0", "end")
-        word_length = 0
-        for char in text:
-            if char == ' ' or char == '\t':
-                if word_length > 0:
-                    words += 1
-                    word_length = 0
-            else:
-                word_length += 1
-        self.words.set(words)
\ No newline at end of file
+        self._set_variable(self.words, self.stats.words)
\ No newline at end of file
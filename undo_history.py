@@ -0,0 +1,283 @@
+import collections
+import tkinter as tk
+import zlib
+
+
+
+
+# Text at least this long is compressed in the history.
+COMPRESS_SIZE = 4096
+
+# Bytes counted for each edit on top of its text.
+EDIT_OVERHEAD = 64
+
+# Bytes counted for each group of edits.
+GROUP_OVERHEAD = 64
+
+# The save point of a history which was empty when the text was saved.
+_EMPTY = object()
+
+
+
+
+def _pack(text: str) -> str | bytes:
+    """Internal function. Return TEXT as it is kept in the history."""
+    if len(text) >= COMPRESS_SIZE:
+        return zlib.compress(text.encode("utf-8"), 1)
+    return text
+
+
+def _unpack(text: str | bytes) -> str:
+    """Internal function. Return the text of a value from _pack."""
+    if isinstance(text, bytes):
+        return zlib.decompress(text).decode("utf-8")
+    return text
+
+
+
+
+class _Edit:
+    """
+    One edit in the undo history.
+
+    Text of at least COMPRESS_SIZE chars is held as zlib compressed UTF-8
+    and only expanded again when the edit is undone or redone.
+
+    """
+
+    __slots__ = ("offset", "removed", "inserted", "removed_length",
+        "inserted_length")
+
+
+    def __init__(self, offset: int, removed: str, inserted: str):
+        self.offset = offset
+        self.removed_length = len(removed)
+        self.inserted_length = len(inserted)
+        self.removed = _pack(removed)
+        self.inserted = _pack(inserted)
+
+
+    @property
+    def size(self) -> int:
+        """The approximate bytes held by the edit."""
+        return EDIT_OVERHEAD + len(self.removed) + len(self.inserted)
+
+
+
+
+class UndoHistory:
+    """
+    The undo and redo history of a Text Area.
+
+    Replaces the undo stack of the Tk Text widget, which is capped by a
+    count of entries, with one capped by MAX_BYTES. Edits are recorded
+    as an edit listener and grouped between separators the same way as
+    Tk groups them, with the autoseparators option starting a new group
+    whenever typing switches between inserting and deleting. A run of
+    typing or deleting is merged into a single edit as it is recorded,
+    so a typed paragraph is one short string rather than an entry per
+    key, and large blocks of text are compressed.
+
+    Once the history holds more than MAX_BYTES the oldest groups are
+    dropped, the most recent group is always kept.
+
+    The group on top of the undo stack when the text was last saved is
+    kept as the save point, and the modified flag of the Text Area is
+    cleared again when undo or redo returns to it, as Tk does.
+
+    """
+
+    max_bytes = 16 << 20                       # bytes of history kept at most
+
+
+    def __init__(self, text_area: tk.Text):
+        self.text_area = text_area
+        self.enabled = True                    # edits are being recorded
+        self.size = 0                          # bytes held by both stacks
+
+        self._undo = collections.deque()       # groups of edits, newest last
+        self._redo = []                        # undone groups, newest last
+        self._open = False                     # edits join the newest group
+        self._last_kind = None                 # insert, delete or replace
+        self._applying = False                 # undo or redo is editing
+        self._saved = _EMPTY                   # newest group when saved
+
+
+    def record(self, offset: int, removed: str, inserted: str) -> None:
+        """Record an edit of the Text Area. Used as an edit listener."""
+
+        if not self.enabled or self._applying:
+            return
+
+        # A new edit makes the undone groups unreachable.
+        for group in self._redo:
+            self.size -= self._group_size(group)
+            if group is self._saved:
+                self._saved = None
+        self._redo.clear()
+
+        kind = "replace" if removed and inserted else \
+            "delete" if removed else "insert"
+        if kind != self._last_kind and self.text_area.cget("autoseparators"):
+            self._open = False
+        self._last_kind = kind
+
+        if not self._open:
+            self._undo.append([])
+            self.size += GROUP_OVERHEAD
+            self._open = True
+        group = self._undo[-1]
+
+        if not (group and self._merge(group[-1], offset, removed, inserted)):
+            edit = _Edit(offset, removed, inserted)
+            group.append(edit)
+            self.size += edit.size
+
+        # The oldest groups are dropped once the history is too large.
+        while self.size > self.max_bytes and len(self._undo) > 1:
+            group = self._undo.popleft()
+            self.size -= self._group_size(group)
+            if group is self._saved or self._saved is _EMPTY:
+                self._saved = None
+
+
+    def _merge(self, edit: _Edit, offset: int, removed: str,
+            inserted: str) -> bool:
+        """
+        Internal function.
+
+        Merge the edit at OFFSET into EDIT if it continues it and return
+        True. Only small plain inserts and deletes are merged.
+
+        """
+        if not (isinstance(edit.removed, str) and isinstance(edit.inserted, str)
+                and len(removed) + len(inserted) + edit.removed_length
+                + edit.inserted_length < COMPRESS_SIZE):
+            return False
+
+        old_size = edit.size
+        if (not removed and not edit.removed
+                and offset == edit.offset + edit.inserted_length):
+            # Typing on from the end of the last insert.
+            edit.inserted += inserted
+            edit.inserted_length += len(inserted)
+        elif not inserted and not edit.inserted \
+                and offset + len(removed) == edit.offset:
+            # Backspace before the last delete.
+            edit.offset = offset
+            edit.removed = removed + edit.removed
+            edit.removed_length += len(removed)
+        elif not inserted and not edit.inserted and offset == edit.offset:
+            # Forward delete at the last delete.
+            edit.removed += removed
+            edit.removed_length += len(removed)
+        else:
+            return False
+        self.size += edit.size - old_size
+        return True
+
+
+    def mark_saved(self) -> None:
+        """
+        Record the current text as saved, the next edit starts a new
+        group.
+
+        """
+        self._saved = self._undo[-1] if self._undo else _EMPTY
+        self._open = False
+
+
+    def _at_saved(self) -> bool:
+        """Internal function. Return True if the text is as last saved."""
+        top = self._undo[-1] if self._undo else _EMPTY
+        return top is self._saved
+
+
+    def separator(self) -> None:
+        """End the current group, the next edit starts a new one."""
+        self._open = False
+
+
+    def reset(self) -> None:
+        """Forget the whole history."""
+        self._undo.clear()
+        self._redo.clear()
+        self._open = False
+        self._last_kind = None
+        self._saved = None
+        self.size = 0
+
+
+    def can_undo(self) -> bool:
+        """Return True if there is a group to undo."""
+        return bool(self._undo)
+
+
+    def can_redo(self) -> bool:
+        """Return True if there is a group to redo."""
+        return bool(self._redo)
+
+
+    def undo(self) -> bool:
+        """Undo the newest group. Returns False if there is none."""
+        if not self._undo or not self._editable():
+            return False
+        group = self._undo.pop()
+        for edit in reversed(group):
+            self._replace(edit.offset, edit.inserted_length,
+                _unpack(edit.removed))
+        self._redo.append(group)
+        self._open = False
+        self._last_kind = None
+        if self._at_saved():
+            self.text_area.edit_modified(False)
+        return True
+
+
+    def redo(self) -> bool:
+        """Redo the newest undone group. Returns False if there is none."""
+        if not self._redo or not self._editable():
+            return False
+        group = self._redo.pop()
+        for edit in group:
+            self._replace(edit.offset, edit.removed_length,
+                _unpack(edit.inserted))
+        self._undo.append(group)
+        self._open = False
+        self._last_kind = None
+        if self._at_saved():
+            self.text_area.edit_modified(False)
+        return True
+
+
+    def _editable(self) -> bool:
+        """Internal function. Return True if the text can be edited."""
+        return str(self.text_area.cget("state")) == "normal"
+
+
+    def _replace(self, offset: int, length: int, text: str) -> None:
+        """
+        Internal function.
+
+        Replace LENGTH chars at OFFSET with TEXT without recording it
+        and move the insertion cursor to the end of TEXT, as Tk does.
+
+        """
+        text_area = self.text_area
+        start = text_area.index_of(offset)
+        self._applying = True
+        try:
+            if length:
+                text_area.replace(start, text_area.index_of(offset + length),
+                    text)
+            elif text:
+                text_area.insert(start, text)
+        finally:
+            self._applying = False
+        text_area.mark_set(tk.INSERT, text_area.index_of(offset + len(text)))
+        text_area.see(tk.INSERT)
+
+
+    def _group_size(self, group: list) -> int:
+        """Internal function. Return the bytes held by GROUP."""
+        return GROUP_OVERHEAD + sum(edit.size for edit in group)
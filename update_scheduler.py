@@ -0,0 +1,69 @@
+import time
+import tkinter as tk
+from typing import Callable
+
+
+
+
+class UpdateScheduler:
+    """
+    Coalesces refresh requests for a widget into a single callback.
+
+    Callers mark the metrics which have become out of date and the
+    scheduler runs CALLBACK once with the set of dirty metrics when Tk
+    is next idle. Refreshes are capped to one per INTERVAL milliseconds
+    so a burst of events, such as a held down key, only costs a single
+    recompute per frame.
+
+    """
+
+
+    def __init__(self, widget: tk.Misc, callback: Callable[[set], None],
+            interval: int = 16):
+        self.widget = widget
+        self.callback = callback
+        self.interval = interval               # minimum ms between refreshes
+        self.dirty = set()                     # metrics waiting for a refresh
+        self._job = None                       # pending after id
+        self._last_refresh = 0.0               # time of the last refresh
+
+
+    def mark(self, *metrics: str) -> None:
+        """Mark METRICS as dirty and schedule a refresh."""
+
+        self.dirty.update(metrics)
+        if self._job is not None:
+            return
+
+        # Refresh as soon as Tk is idle unless the last refresh was less
+        # than a frame ago, in which case wait for the frame to finish.
+        elapsed = (time.perf_counter() - self._last_refresh) * 1000
+        if elapsed >= self.interval:
+            self._job = self.widget.after_idle(self._refresh)
+        else:
+            self._job = self.widget.after(
+                int(self.interval - elapsed) + 1, self._refresh)
+
+
+    def flush(self) -> None:
+        """Run any pending refresh immediately."""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._refresh()
+
+
+    def cancel(self) -> None:
+        """Cancel any pending refresh and forget the dirty metrics."""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self.dirty.clear()
+
+
+    def _refresh(self) -> None:
+        """Internal function. Run the callback with the dirty metrics."""
+        self._job = None
+        self._last_refresh = time.perf_counter()
+        dirty, self.dirty = self.dirty, set()
+        if dirty:
+            self.callback(dirty)
@@ -0,0 +1,32 @@
+import tkinter as tk
+
+
+
+
+class ViewMenu(tk.Menu):
+    """A View menu to attach to the main window menu."""
+
+
+    def __init__(self, parent: tk.Menu):
+        self.notebook = parent.notebook
+        self.line_numbers = tk.BooleanVar(value=True)
+
+        # The commands are only added when the menu is first opened so
+        # that a new window does not pay for a menu it may never use.
+        super().__init__(parent, postcommand=self._configure_menu)
+
+
+    def _configure_menu(self) -> None:
+        """Internal function. Configure menu commands."""
+
+        # Only build the commands once.
+        self.configure(postcommand="")
+
+        # Show or hide the line number gutter
+        self.add_checkbutton(label="Line Numbers", variable=self.line_numbers,
+            command=self._toggle_line_numbers)
+
+
+    def _toggle_line_numbers(self) -> None:
+        """Internal function. Show or hide the line numbers."""
+        self.notebook.line_numbers.set_visible(self.line_numbers.get())